@@ -1,57 +1,154 @@
 from __future__ import annotations
 
+# first: times the imports below (JEEVES_STARTUP_PROFILE=1)
+from src.monitor import startup
+
+import argparse
+import asyncio
 import os
 import re
 import sys
-import subprocess
-from typing import Any, Callable, Dict, Optional
-
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
-import sounddevice as sd
+import pandas as pd
 
 import dialog_manager
+import whisper_mic_transcribe
 from whisper_mic_transcribe import transcribe_once
 from src.utils.normalize import fuzzy_choice
 from src.data.loader import load_restaurants
-from src.models.preferences import UserPreferences
-from src.dialog.manager import handle_turn
-
-analyze_sentiment: Optional[Callable[[str], Dict[str, Any]]]
-try:
-    from src.nlp.sentiment_en import analyze_sentiment as _analyze_sentiment
-
-    analyze_sentiment = _analyze_sentiment
-except Exception:
-    analyze_sentiment = None
-
+from src.dialog.manager import (
+    REQUIRED_PROMPTS,
+    badge_string,
+    format_rating,
+    handle_session_turn,
+)
+from src.dialog.pipeline import FRUSTRATION_REPLY, TurnPipeline, latency_report
+from src.dialog.slots import ACCESS_QUESTIONS
+from src.monitor import profiler, tracing
+from src.monitor.tracing import span
+from src.voice.tts import TTSCache, TTSWorker, pick_backend
 
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-
-# Local imports
-
-
-# --- Data & Preferences init -----------------------------------------------
-DATA_PATH = "data/restaurants_test.csv"
-df = load_restaurants(DATA_PATH)
-print(f"✅ Loaded {len(df)} restaurants with accessibility info")
-prefs = UserPreferences()  # persists across turns
-
 # --- Feature toggles --------------------------------------------------------
-USE_WHISPER = True  # mic + Whisper, else keyboard
-USE_TTS = True  # assistant speaks
-TTS_BACKEND = "say"  # "say" (macOS) or "pyttsx3"
-TTS_VOICE = "Samantha"  # "Anna" for German
+USE_WHISPER = os.environ.get("JEEVES_WHISPER", "1") == "1"  # mic + Whisper
+USE_TTS = os.environ.get("JEEVES_TTS", "1") == "1"  # assistant speaks
+USE_SENTIMENT = True  # frustration check (transformers)
+TTS_BACKEND = "auto"  # "say" (macOS), "espeak" (Linux), "pyttsx3" or "auto"
+TTS_VOICE = None  # e.g. "Samantha" / "Anna" for say, "en" / "de" for espeak
 RESULT_LINES_TO_SPEAK = 3  # speak first N recommendation lines
-
-# --- TTS engine cache -------------------------------------------------------
-_engine = None  # used only if TTS_BACKEND == "pyttsx3"
+USE_PIPELINE = False  # overlap capture/ASR/ranking/TTS (no per-slot voice hints)
+# pipelined loop: per-turn stage spans, written as Chrome/Perfetto JSON on exit
+TRACE_PATH = "data/traces/turns.json" if tracing.ENABLED else None
+PROFILE_STOP_TIMEOUT_S = 10.0  # on exit, wait this long for the profile files
+
+# --- Data & models (loaded after the greeting) ------------------------------
+# The catalog, the sentiment model and Whisper load on a background thread
+# started right before the greeting, instead of at import: the first prompt
+# appears without waiting for them (see tests/test_startup.py).
+DATA_PATH = "data/restaurants_test.csv"
+COMPACT_CATALOG = False  # category/float32/nullable-bool dtypes, less memory
+SESSION_ID = "local"  # dialog state persists across turns in the session store
+_df: Optional[pd.DataFrame] = None
+_sentiment: Optional[Callable[[str], Dict[str, Any]]] = None
+_sentiment_tried = False
+# one lock per resource: a turn needing the catalog never waits on the
+# warm-up thread loading the sentiment model
+_catalog_lock = threading.Lock()
+_sentiment_lock = threading.Lock()
+
+
+def catalog() -> pd.DataFrame:
+    global _df
+    df = _df
+    if df is not None:
+        return df
+    with _catalog_lock:
+        if _df is None:
+            with startup.phase("catalog"):
+                _df = load_restaurants(DATA_PATH, compact=COMPACT_CATALOG)
+            print(f"✅ Loaded {len(_df)} restaurants with accessibility info")
+        return _df
+
+
+def sentiment_model() -> Optional[Callable[[str], Dict[str, Any]]]:
+    """The sentiment analyzer (transformers pipeline loaded once), or None."""
+    global _sentiment, _sentiment_tried
+    if _sentiment_tried:
+        return _sentiment
+    with _sentiment_lock:
+        if not _sentiment_tried and USE_SENTIMENT:
+            with startup.phase("sentiment model"):
+                try:
+                    from src.nlp.sentiment_en import _get_pipeline
+                    from src.nlp.sentiment_en import analyze_sentiment as _analyze
+
+                    _get_pipeline()
+                    _sentiment = _analyze
+                except Exception:
+                    _sentiment = None
+            _sentiment_tried = True  # after loading: the fast path sees the model
+    return _sentiment
+
+
+def analyze_sentiment(text: str) -> Optional[Dict[str, Any]]:
+    model = sentiment_model()
+    return model(text) if model is not None else None
+
+
+def _warm_up() -> None:
+    catalog()
+    sentiment_model()
+    if USE_WHISPER:
+        with startup.phase("whisper model"):
+            try:
+                whisper_mic_transcribe.get_model("base", "cpu")
+            except Exception as e:
+                print(f"[WARN] Whisper unavailable: {e}")
+
+
+def warm_up_in_background() -> threading.Thread:
+    t = threading.Thread(target=_warm_up, name="warm-up", daemon=True)
+    t.start()
+    return t
+
+
+# --- TTS worker -------------------------------------------------------------
+GREETING = "Hi! How can I help?"
+# fixed strings, rendered once at startup so they play without synthesis
+FIXED_PROMPTS = [
+    GREETING,
+    FRUSTRATION_REPLY,
+    *REQUIRED_PROMPTS.values(),
+    *(p + " (you can also say 'skip')" for p in REQUIRED_PROMPTS.values()),
+    *ACCESS_QUESTIONS.values(),
+]
+_tts: Optional[TTSWorker] = None
+
+
+def tts_worker() -> Optional[TTSWorker]:
+    """The TTS worker, started (and the fixed prompts pre-rendered) on first use."""
+    global _tts
+    if _tts is None and USE_TTS:
+        backend = pick_backend(TTS_BACKEND)
+        if backend is None:
+            print("[WARN] No TTS backend found (install espeak-ng or pyttsx3)")
+            return None
+        _tts = TTSWorker(TTSCache(backend, TTS_VOICE))
+        _tts.prerender(FIXED_PROMPTS)
+    return _tts
 
 
 # --- Helpers ----------------------------------------------------------------
 def default_input_index() -> Optional[int]:
     """Return default input device index for sounddevice, or a safe fallback."""
     try:
+        import sounddevice as sd
+
         in_idx, _ = sd.default.device  # (input_idx, output_idx)
         idx = int(in_idx)
         if idx < 0:
@@ -72,27 +169,17 @@ def _safe_transcribe(**kwargs) -> str:
         return ""
 
 
-def speak(text: str) -> None:
-    """Text-to-speech with either macOS 'say' or pyttsx3."""
-    if not USE_TTS or not text:
-        return
-    if TTS_BACKEND == "say":
-        try:
-            subprocess.run(["say", "-v", TTS_VOICE, text], check=False)
-        except Exception:
-            pass
-    elif TTS_BACKEND == "pyttsx3":
-        global _engine
-        try:
-            if _engine is None:
-                import pyttsx3
-
-                _engine = pyttsx3.init()
-                _engine.setProperty("rate", 180)
-            _engine.say(text)
-            _engine.runAndWait()
-        except Exception:
-            pass
+def speak(text: str, wait: bool = False) -> None:
+    """Queue `text` for the TTS worker; returns at once unless `wait`."""
+    worker = tts_worker() if text else None
+    if worker is not None:
+        worker.say(text, wait=wait)
+
+
+def wait_for_speech() -> None:
+    """Let queued speech finish, so the microphone does not record it."""
+    if _tts is not None:
+        _tts.wait()
 
 
 def print_and_speak(msg: str) -> None:
@@ -312,6 +399,7 @@ def ask_user(slot: Optional[str] = None) -> str:
             sys.exit(0)
         return ans
 
+    wait_for_speech()
     idx = default_input_index()
 
     # per-slot hints
@@ -398,14 +486,14 @@ def ask_user(slot: Optional[str] = None) -> str:
             return typed
 
     # Sentiment
-    if analyze_sentiment:
-        try:
-            sent = analyze_sentiment(text)
+    try:
+        sent = analyze_sentiment(text)
+        if sent:
             print(f"[sentiment] {sent['label']} ({sent['score']:.2f})")
             if sent["label"] == "NEGATIVE" and sent["score"] > 0.8:
                 print_and_speak("I sense some frustration. Let's try again calmly.")
-        except Exception:
-            pass
+    except Exception:
+        pass
 
     print(f"[gehört] {text}")
 
@@ -431,8 +519,10 @@ def ask_user(slot: Optional[str] = None) -> str:
 
 # --- Main loop --------------------------------------------------------------
 def run():
+    warm_up_in_background()
     # greeting
-    print_and_speak("Hi! How can I help?")
+    print_and_speak(GREETING)
+    startup.ready()
 
     while True:
         user_text = ask_user()  # MIC/keyboard preserved
@@ -440,7 +530,8 @@ def run():
             print("Bye! 👋")
             break
 
-        reply, results = handle_turn(prefs, user_text, df)
+        reply, results = handle_session_turn(SESSION_ID, user_text, catalog())
+        profiler.turn_done()  # ends a turn-bounded profiling session
 
         # show & speak the reply
         print_and_speak(reply)
@@ -450,23 +541,102 @@ def run():
             for i, (_, row) in enumerate(
                 results.head(RESULT_LINES_TO_SPEAK).iterrows(), 1
             ):
-                badges = []
-                if row.get("access_wheelchair"):
-                    badges.append("♿ wheelchair")
-                if row.get("access_step_free"):
-                    badges.append("⬆ step-free")
-                if row.get("access_restroom"):
-                    badges.append("🚻 accessible restroom")
-                badge_str = " | ".join(badges) if badges else "—"
-                line = f"{i:>2}. {row['name']} ({row['cuisine']}, {row['price']}, ★{row['rating']}) [{badge_str}]"
+                badge_str = badge_string(row)
+                line = f"{i:>2}. {row['name']} ({row['cuisine']}, {row['price']}, ★{format_rating(row['rating'])}) [{badge_str}]"
                 print(line)
                 speak(line)
 
 
+# --- Pipelined loop ---------------------------------------------------------
+def result_lines(results) -> Iterable[str]:
+    for i, (_, row) in enumerate(results.iterrows(), 1):
+        yield (
+            f"{i:>2}. {row['name']} ({row['cuisine']}, {row['price']}, "
+            f"★{format_rating(row['rating'])}) [{badge_string(row)}]"
+        )
+
+
+def capture_audio() -> Any:
+    startup.ready()
+    if not USE_WHISPER:
+        return input("> ").strip()
+    print("(Speak now for ~3s…)")
+    wait_for_speech()
+    return whisper_mic_transcribe.record(seconds=3, input_device=default_input_index())
+
+
+def transcribe_audio(audio: Any) -> str:
+    if not USE_WHISPER:
+        return audio
+    with tempfile.TemporaryDirectory() as tmp:
+        wav = Path(tmp) / "turn.wav"
+        try:
+            with span("preprocess"):
+                whisper_mic_transcribe.save_wav(wav, audio, samplerate=16000)
+            with span("asr_decode"):
+                text = whisper_mic_transcribe.transcribe(
+                    "base", wav, None, "cpu", temperature=0.0
+                )
+        except Exception as e:
+            print(f"[WARN] Transcription failed: {e}")
+            return ""
+    print(f"[gehört] {text}")
+    return text
+
+
+def run_pipeline():
+    warm_up_in_background()
+    pipeline = TurnPipeline(
+        capture=capture_audio,
+        transcribe=transcribe_audio,
+        respond=lambda text: handle_session_turn(SESSION_ID, text, catalog()),
+        sentiment=analyze_sentiment,
+        format_lines=result_lines,
+        speak=lambda line: speak(line, wait=True),
+        lines_to_speak=RESULT_LINES_TO_SPEAK,
+    )
+    try:
+        asyncio.run(pipeline.run(greeting=GREETING))
+    finally:
+        print(f"[latency] {latency_report(pipeline.timings)}")
+        if TRACE_PATH:
+            n = tracing.export_chrome(TRACE_PATH)
+            print(f"[trace] {n} spans -> {TRACE_PATH} (open in ui.perfetto.dev)")
+    print("Bye! 👋")
+
+
 # --- Entrypoint -------------------------------------------------------------
-if __name__ == "__main__":
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Jeeves, the local voice assistant.")
+    ap.add_argument(
+        "--profile",
+        metavar="SPEC",
+        help="sample all threads for a time or a number of turns (30s, 5turns) "
+        "into data/profiles/; default: $JEEVES_PROFILE",
+    )
+    args = ap.parse_args(argv)
+    if args.profile:
+        try:
+            profiler.parse_spec(args.profile)
+        except ValueError as e:
+            ap.error(str(e))
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.profile is not None:
+        profiler.start_from_spec(args.profile, reason="cli")
+    else:
+        profiler.start_from_env()  # JEEVES_PROFILE=30s / =5turns
     try:
-        run()
+        run_pipeline() if USE_PIPELINE else run()
     except (KeyboardInterrupt, EOFError):
         print("\nBye! 👋")
-        sys.exit(0)
+    finally:
+        # the sampler is a daemon thread: write a running session before exit
+        profiler.stop_profile(timeout=PROFILE_STOP_TIMEOUT_S)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import itertools
+import weakref
+from typing import Any, Callable, Dict, Sequence, Tuple, TypeVar
+
+import pandas as pd
+
+T = TypeVar("T")
+
+# Per-catalog bookkeeping, keyed by id(df). DataFrames are unhashable, so we
+# cannot use a WeakKeyDictionary; a weakref.finalize drops the entry instead.
+#   id(df) -> (catalog version, {name: derived structure})
+_STATE: Dict[int, Tuple[int, Dict[str, Any]]] = {}
+_VERSIONS = itertools.count(1)
+
+
+def _forget(key: int) -> None:
+    _STATE.pop(key, None)
+
+
+def _entry(df: pd.DataFrame) -> Tuple[int, Dict[str, Any]]:
+    key = id(df)
+    entry = _STATE.get(key)
+    if entry is None:
+        entry = (next(_VERSIONS), {})
+        _STATE[key] = entry
+        weakref.finalize(df, _forget, key)
+    return entry
+
+
+def catalog_version(df: pd.DataFrame) -> int:
+    """Stable version number for this catalog object (new object -> new version)."""
+    return _entry(df)[0]
+
+
+def bump_version(df: pd.DataFrame) -> int:
+    """
+    Mark the catalog as changed after in-place edits.
+    Drops every derived structure and returns the new version.
+    """
+    key = id(df)
+    if key not in _STATE:
+        return catalog_version(df)
+    version = next(_VERSIONS)
+    _STATE[key] = (version, {})
+    return version
+
+
+def derived(df: pd.DataFrame, name: str, build: Callable[[pd.DataFrame], T]) -> T:
+    """
+    Return a structure derived from `df` (indexes, arrays, ...), building it
+    once per catalog version.
+    """
+    _, cache = _entry(df)
+    if name not in cache:
+        cache[name] = build(df)
+    return cache[name]
+
+
+def rows_changed(df: pd.DataFrame, positions: Sequence[int]) -> int:
+    """
+    Signal in-place edits (or appends) of the rows at `positions` (iloc).
+
+    Derived structures that implement ``refresh_rows(df, positions) -> bool``
+    update themselves and are kept when they return True; everything else is
+    dropped and rebuilt on next use. Returns the new catalog version.
+    """
+    key = id(df)
+    if key not in _STATE:
+        return catalog_version(df)
+    _, cache = _STATE[key]
+    kept: Dict[str, Any] = {}
+    for name, obj in cache.items():
+        refresh = getattr(obj, "refresh_rows", None)
+        if callable(refresh) and refresh(df, positions):
+            kept[name] = obj
+    version = next(_VERSIONS)
+    _STATE[key] = (version, kept)
+    return version
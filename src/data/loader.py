@@ -1,8 +1,12 @@
+from typing import Iterable, Optional
+
 import pandas as pd
 
 BOOL_TRUE = {"true", "1", "yes", "y", "t"}
 BOOL_FALSE = {"false", "0", "no", "n", "f", ""}
 
+ACCESS_COLS = ["access_wheelchair", "access_step_free", "access_restroom"]
+
 
 def _to_bool(x):
     if pd.isna(x):
@@ -15,13 +19,81 @@ def _to_bool(x):
     return None  # unknown / not provided
 
 
-def load_restaurants(csv_path: str) -> pd.DataFrame:
+def compact_dtypes(
+    df: pd.DataFrame,
+    categorical: Iterable[str] = (),
+    float32: Iterable[str] = (),
+    int32: Iterable[str] = (),
+    flags: Iterable[str] = (),
+) -> pd.DataFrame:
+    """
+    Narrow column dtypes in place: low-cardinality text -> category,
+    measures -> float32/int32, tri-state flags -> nullable boolean
+    (1 byte + mask instead of an 8-byte object pointer).
+    Columns that are absent are skipped.
+    """
+    for col in categorical:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in float32:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float32")
+    for col in int32:
+        if col in df.columns:
+            num = pd.to_numeric(df[col], errors="coerce")
+            df[col] = num.astype("int32" if num.notna().all() else "Int32")
+    for col in flags:
+        if col in df.columns:
+            df[col] = df[col].astype("boolean")
+    return df
+
+
+def load_restaurants(csv_path: str, compact: bool = False) -> pd.DataFrame:
     df = pd.read_csv(csv_path)
     # Ensure columns exist
-    for col in ["access_wheelchair", "access_step_free", "access_restroom"]:
+    for col in ACCESS_COLS:
         if col not in df.columns:
             df[col] = None
     # Normalize booleans
-    for col in ["access_wheelchair", "access_step_free", "access_restroom"]:
+    for col in ACCESS_COLS:
         df[col] = df[col].apply(_to_bool)
+    if compact:
+        compact_dtypes(
+            df,
+            categorical=["city", "cuisine", "price"],
+            float32=["rating", "lat", "lng"],
+            int32=["id", "rating_count"],
+            flags=ACCESS_COLS,
+        )
     return df
+
+
+def memory_report(
+    df: pd.DataFrame, baseline: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
+    """
+    Bytes per column (deep, i.e. including Python string payloads), with a
+    TOTAL row. Pass `baseline` to add its sizes and the saving ratio.
+    """
+    rep = pd.DataFrame(
+        {
+            "dtype": df.dtypes.astype(str),
+            "bytes": df.memory_usage(index=False, deep=True),
+        }
+    )
+    rep.loc["TOTAL"] = ["", int(rep["bytes"].sum())]
+    if baseline is not None:
+        base = baseline.memory_usage(index=False, deep=True)
+        rep["baseline_bytes"] = base.reindex(rep.index)
+        rep.loc["TOTAL", "baseline_bytes"] = int(base.sum())
+        rep["ratio"] = (rep["bytes"] / rep["baseline_bytes"]).round(3)
+    return rep
+
+
+if __name__ == "__main__":
+    from src.places_local import load_df
+
+    full = load_df()
+    small = load_df(compact=True)
+    with pd.option_context("display.width", 120):
+        print(memory_report(small, baseline=full))
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, List, Optional, Pattern, Tuple, TypeVar
+
+import pandas as pd
+
+from .session import Session
+
+Reply = Tuple[str, Optional[pd.DataFrame]]
+# handler(session, match, catalog) -> reply, or None to let the turn go on
+Handler = Callable[[Session, re.Match[str], pd.DataFrame], Optional[Reply]]
+H = TypeVar("H", bound=Handler)
+
+
+class CommandTable:
+    """
+    Command phrases (EN/DE regex fragments, lower case) mapped to handlers.
+
+    All phrases are compiled into one alternation with a named group per
+    command, so recognizing every command is a single regex scan of the
+    lower-cased utterance. Phrases start at a word start: the leading
+    lookbehind lets the scan skip mid-word positions, which is what makes
+    one scan cheaper than a dozen substring checks. Commands found in the
+    text are tried in registration order (priority); a handler returning
+    None passes the turn on to the next command and then to slot filling.
+    """
+
+    def __init__(self) -> None:
+        self._handlers: Dict[str, Handler] = {}
+        self._patterns: List[Tuple[str, str]] = []
+        self._rank: Dict[str, int] = {}  # command -> priority (0 = first)
+        self._regex: Optional[Pattern[str]] = None
+
+    def register(self, name: str, *phrases: str) -> Callable[[H], H]:
+        """Decorator: run the handler when any of `phrases` matches."""
+
+        def deco(handler: H) -> H:
+            if name in self._handlers:
+                raise ValueError(f"command {name!r} is already registered")
+            self._handlers[name] = handler
+            self._rank[name] = len(self._patterns)
+            self._patterns.append((name, "|".join(phrases)))
+            self._regex = None  # recompiled on next use
+            return handler
+
+        return deco
+
+    @property
+    def regex(self) -> Pattern[str]:
+        if self._regex is None:
+            alts = "|".join(f"(?P<{name}>{pat})" for name, pat in self._patterns)
+            self._regex = re.compile(rf"(?<!\w)(?:{alts})")
+        return self._regex
+
+    @property
+    def names(self) -> List[str]:
+        """Registered commands, highest priority first."""
+        return [name for name, _ in self._patterns]
+
+    def find(self, text: str) -> List[Tuple[str, re.Match[str]]]:
+        """(command, match) for each command in `text`, highest priority first."""
+        low = text.lower()
+        regex = self.regex
+        m = regex.search(low)
+        found: Dict[str, re.Match[str]] = {}
+        while m is not None:  # usually none or one command per utterance
+            name = m.lastgroup  # the command's group closes last
+            if name is not None and name not in found:
+                found[name] = m
+            m = regex.search(low, m.end())
+        if len(found) < 2:
+            return list(found.items())
+        return sorted(found.items(), key=lambda item: self._rank[item[0]])
+
+    def dispatch(
+        self, session: Session, text: str, df: pd.DataFrame
+    ) -> Optional[Reply]:
+        for name, m in self.find(text):
+            reply = self._handlers[name](session, m, df)
+            if reply is not None:
+                return reply
+        return None
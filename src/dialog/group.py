@@ -1,57 +1,53 @@
 from __future__ import annotations
-import re
 from typing import Optional
 from ..models.group import GroupState
 from ..models.preferences import UserPreferences
 from .basic_parse import _maybe_update_basic_prefs
 from .slots import update_accessibility_from_text
 
-# Commands:
+# Command phrases, registered with the dialog's command table (manager.py):
 #   "start group" / "start group of 3"
 #   "add" (add member)
-#   "end group" / "finish group"
-_START_RE = re.compile(r"\b(start|create|new)\s+group(?:\s+of\s+(\d+))?\b", re.I)
-_ADD_RE = re.compile(r"\b(add|member|person)\b", re.I)
-_END_RE = re.compile(r"\b(end|finish)\s+group\b", re.I)
-
-
-def _normalize_group_text(text: str) -> str:
-    t = (text or "").strip().lower()
-    # common whisper mishears
-    t = t.replace("and group", "end group")
-    t = t.replace("in group", "end group")
-    t = t.replace("ant group", "end group")
-    t = t.replace("en group", "end group")
-    t = t.replace("finish the group", "finish group")
-    return t
-
-
-def maybe_handle_group_command(group: GroupState, text: str) -> Optional[str]:
-    t = _normalize_group_text(text)
-
-    m = _START_RE.search(t)
-    if m:
-        size = None
-        if m.group(2):
-            try:
-                size = int(m.group(2))
-            except (TypeError, ValueError):
-                size = None
-        group.active = True
-        group.size = size
-        group.members.clear()
-        return f"Group mode started.{(' Expecting '+str(size)+' people.' if size else '')} Say 'add' to add a member."
-
-    if _END_RE.search(t):
-        group.active = False
-        # NEW: produce immediate guidance
-        return "Group mode ended. Say 'show results' to merge preferences."
-
-    if group.active and _ADD_RE.search(t):
-        group.members.append(UserPreferences())
-        return "OK. Describe this member's preferences (city, cuisine, time, and any accessibility needs)."
-
-    return None
+#   "end group" / "finish group", incl. common Whisper mishears of "end"
+#   "group mode least misery" / "group mode average" / "group mode union"
+# (phrases match at word starts)
+GROUP_START = r"(?:start|create|new)\s+group(?:\s+of\s+(?P<group_size>\d+))?\b"
+GROUP_END = r"(?:end|finish|and|in|ant|en)\s+group\b|finish\s+the\s+group\b"
+GROUP_ADD = r"(?:add|member|person)\b"
+GROUP_MODE = r"group\s+mode\s+(?P<group_strategy>least[\s_-]*misery|average|union)\b"
+
+# spoken strategy -> src.reco.group_rank strategy, with a short explanation
+_STRATEGIES = {
+    "union": ("union", "everyone's accessibility needs apply to all"),
+    "average": ("average", "ranking by the average member's happiness"),
+    "least misery": ("least_misery", "ranking by the least happy member"),
+}
+
+
+def start_group(group: GroupState, size: Optional[int]) -> str:
+    group.active = True
+    group.size = size
+    group.members.clear()
+    return f"Group mode started.{(' Expecting '+str(size)+' people.' if size else '')} Say 'add' to add a member."
+
+
+def end_group(group: GroupState) -> str:
+    group.active = False
+    # NEW: produce immediate guidance
+    return "Group mode ended. Say 'show results' to merge preferences."
+
+
+def set_strategy(group: GroupState, spoken: str) -> str:
+    name = " ".join(spoken.replace("_", " ").replace("-", " ").split())
+    group.strategy, why = _STRATEGIES[name]
+    return f"Group mode set to {name}: {why}."
+
+
+def add_member(group: GroupState) -> Optional[str]:
+    if not group.active:
+        return None
+    group.members.append(UserPreferences())
+    return "OK. Describe this member's preferences (city, cuisine, time, and any accessibility needs)."
 
 
 def update_last_member(group: GroupState, text: str) -> None:
@@ -4,8 +4,14 @@ import re
 from typing import Optional, Tuple, List, Dict
 import pandas as pd
 
-from ..models.preferences import UserPreferences
-from ..reco.recommender import filter_and_rank
+from ..models.preferences import AccessibilityNeeds, UserPreferences
+from ..monitor.tracing import traced
+from ..reco.group_rank import group_rank
+from ..reco.facets import ACCESS_FACETS
+from ..reco.prefetch import PREFETCHER
+from ..reco.engine import hard_flags
+from ..reco.recommender import filter_and_rank, suggest_relaxation
+from ..reco.state import session_state
 
 from .slots import (
     next_missing_access_slot,
@@ -13,7 +19,19 @@ from .slots import (
     classify_yes_no,
     ACCESS_QUESTIONS,
 )
-from .group import maybe_handle_group_command, update_last_member
+from .commands import CommandTable, Reply
+from .group import (
+    GROUP_ADD,
+    GROUP_END,
+    GROUP_MODE,
+    GROUP_START,
+    add_member,
+    end_group,
+    set_strategy,
+    start_group,
+    update_last_member,
+)
+from .session import SESSIONS, Session, SessionStore
 from ..models.group import GroupState, merge_group_preferences
 from ..privacy.data_privacy import (
     save_prefs_encrypted,
@@ -21,6 +39,8 @@ from ..privacy.data_privacy import (
     delete_prefs,
 )
 
+# preference slots kept by "remember my preferences" (not the pending_* state)
+STORED_FIELDS: Tuple[str, ...] = ("city", "cuisine", "guests", "time", "accessibility")
 # Order for required slot filling
 REQUIRED_ORDER: Tuple[str, ...] = ("city", "cuisine", "guests", "time")
 REQUIRED_PROMPTS: Dict[str, str] = {
@@ -29,9 +49,17 @@ REQUIRED_PROMPTS: Dict[str, str] = {
     "guests": "For how many people? (say a number like 2, 4)",
     "time": "What time? (e.g., 7 p.m. or 18:30)",
 }
-
-# module-level group state (per process)
-GROUP = GroupState()
+# results shown per recommendation (and prefetched while slots are asked)
+TOP_K = 5
+
+# what dropping each constraint lets in (see src.reco.facets.RELAXATIONS)
+RELAX_PHRASES: Dict[str, str] = {
+    "cuisine": "other cuisines",
+    "city": "other cities",
+    "wheelchair": "places without confirmed wheelchair access",
+    "step_free": "entrances with steps",
+    "restroom": "places without an accessible restroom",
+}
 
 # --- Slim helpers kept local to avoid import/name clashes ---
 
@@ -112,6 +140,7 @@ def _normalize_cuisine(s: str) -> str:
     return (s or "").strip().lower().split(",")[0].split()[0]
 
 
+@traced("slots")
 def _maybe_update_basic_prefs(prefs: UserPreferences, text: str) -> None:
     t = (text or "").lower().strip()
     if not getattr(prefs, "time", None):
@@ -145,6 +174,80 @@ def _has_value(v: object) -> bool:
     return True
 
 
+def _is_set(v: object) -> bool:
+    """True for a set accessibility flag; None/NaN/pd.NA (unknown) count as unset."""
+    return bool(pd.notna(v) and v)
+
+
+def badge_string(r: pd.Series) -> str:
+    badges: List[str] = []
+    if _is_set(r.get("access_wheelchair")):
+        badges.append("♿ wheelchair")
+    if _is_set(r.get("access_step_free")):
+        badges.append("⬆ step-free")
+    if _is_set(r.get("access_restroom")):
+        badges.append("🚻 accessible restroom")
+    return " | ".join(badges) if badges else "—"
+
+
+def format_rating(v: object) -> str:
+    # round so compact (float32) catalogs print 4.3, not 4.300000190734863
+    try:
+        return str(round(float(v), 2))  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return str(v)
+
+
+def _result_lines(results: pd.DataFrame, n: int = 3) -> List[str]:
+    return [
+        f"{r['name']} ({r['cuisine']}, {r['price']}, ★{format_rating(r['rating'])})  "
+        f"[{badge_string(r)}]"
+        for _, r in results.head(n).iterrows()
+    ]
+
+
+def _relaxation_prompt(name: str, n: int) -> str:
+    matches = "match" if n == 1 else "matches"
+    return f"If I include {RELAX_PHRASES[name]}, there are {n} {matches}. Should I?"
+
+
+def _relax(prefs: UserPreferences, name: str) -> None:
+    if name in ACCESS_FACETS:
+        setattr(prefs.accessibility, name, False)  # answered, but no longer required
+    else:
+        setattr(prefs, name, "")
+
+
+def _recommend(
+    prefs: UserPreferences, df: pd.DataFrame
+) -> Tuple[str, Optional[pd.DataFrame]]:
+    results = PREFETCHER.collect(df, prefs, TOP_K)
+    if results is None:
+        results = filter_and_rank(df, prefs, top_k=TOP_K, state=session_state(prefs))
+    if results.empty:
+        return "I couldn't find any matches. Want me to broaden the search?", None
+
+    reply = "Here are good matches:\n• " + "\n• ".join(_result_lines(results))
+    return reply, results
+
+
+def _prefetch(df: pd.DataFrame, prefs: UserPreferences, slot: str) -> None:
+    """Rank the known slots in the background while `slot` is being asked."""
+    if PREFETCHER.worth_it(df, prefs, slot):
+        PREFETCHER.submit(df, prefs, TOP_K)
+
+
+def _load_into(prefs: UserPreferences, loaded: UserPreferences) -> None:
+    """
+    Copy stored preferences into the session's object (keeps its identity).
+    Only the preference slots: the session's pending_* dialog state stays.
+    """
+    for name in STORED_FIELDS:
+        setattr(prefs, name, getattr(loaded, name))
+    if isinstance(prefs.accessibility, dict):  # JSON round trip
+        prefs.accessibility = AccessibilityNeeds(**prefs.accessibility)
+
+
 def _next_missing_required(prefs: UserPreferences) -> Optional[str]:
     for key in REQUIRED_ORDER:
         if not _has_value(getattr(prefs, key, None)):
@@ -152,63 +255,127 @@ def _next_missing_required(prefs: UserPreferences) -> Optional[str]:
     return None
 
 
+# --- Commands (one regex scan per turn; registration order = priority) -----
+COMMANDS = CommandTable()
+
+
+@COMMANDS.register("gdpr_info", r"what do you store", r"welche daten speicherst du")
+def _gdpr_info(session: Session, m: re.Match[str], df: pd.DataFrame) -> Reply:
+    return (
+        "I only store preferences if you ask me to. Everything runs locally. "
+        "You can say 'remember my preferences' to save, or 'delete my data' to remove them.",
+        None,
+    )
+
+
+@COMMANDS.register("gdpr_save", r"remember my preferences", r"speichere meine daten")
+def _gdpr_save(session: Session, m: re.Match[str], df: pd.DataFrame) -> Reply:
+    save_prefs_encrypted(session.prefs)
+    return (
+        "Saved your preferences locally with encryption. Say 'delete my data' anytime.",
+        None,
+    )
+
+
+@COMMANDS.register("gdpr_load", r"load my preferences", r"lade meine daten")
+def _gdpr_load(session: Session, m: re.Match[str], df: pd.DataFrame) -> Reply:
+    loaded = load_prefs_encrypted(UserPreferences)
+    if isinstance(loaded, UserPreferences):
+        _load_into(session.prefs, loaded)
+        return "Loaded your preferences.", None
+    return "I don’t have any stored data yet.", None
+
+
+@COMMANDS.register("gdpr_delete", r"delete my data", r"l(?:ö|oe)sche meine daten")
+def _gdpr_delete(session: Session, m: re.Match[str], df: pd.DataFrame) -> Reply:
+    ok = delete_prefs()
+    return ("Deleted locally stored data." if ok else "No stored data found."), None
+
+
+@COMMANDS.register("group_start", GROUP_START)
+def _group_start(session: Session, m: re.Match[str], df: pd.DataFrame) -> Reply:
+    size = m.group("group_size")
+    return start_group(session.group, int(size) if size else None), None
+
+
+@COMMANDS.register("group_end", GROUP_END)
+def _group_end(session: Session, m: re.Match[str], df: pd.DataFrame) -> Reply:
+    return end_group(session.group), None
+
+
+@COMMANDS.register("group_mode", GROUP_MODE)
+def _group_mode(session: Session, m: re.Match[str], df: pd.DataFrame) -> Reply:
+    return set_strategy(session.group, m.group("group_strategy")), None
+
+
+@COMMANDS.register("group_add", GROUP_ADD)
+def _group_add(session: Session, m: re.Match[str], df: pd.DataFrame) -> Optional[Reply]:
+    reply = add_member(session.group)
+    return (reply, None) if reply else None
+
+
+@COMMANDS.register(
+    "show_results", r"^\s*(?:show results|zeige ergebnisse|results|recommend)\s*$"
+)
+def _show_results(
+    session: Session, m: re.Match[str], df: pd.DataFrame
+) -> Optional[Reply]:
+    group = session.group
+    if group.active or group.pending_relaxation or not group.members:
+        return None  # a member's description / relaxation answer / solo turn
+    return _group_results(group, df)
+
+
+def _group_results(group: GroupState, df: pd.DataFrame) -> Reply:
+    results = group_rank(df, group.members, top_k=TOP_K, strategy=group.strategy)
+    if results.empty:
+        # the union of the members' needs leaves nothing: offer the
+        # cheapest need to drop, counted on the facet bitsets
+        needs = merge_group_preferences(group).accessibility
+        suggestion = suggest_relaxation(df, UserPreferences(accessibility=needs))
+        if suggestion:
+            group.pending_relaxation = suggestion[0]
+            return (
+                "I couldn't find any matches for your group. "
+                + _relaxation_prompt(*suggestion),
+                None,
+            )
+        group.members.clear()
+        return "I couldn't find any matches for your group.", None
+    group.members.clear()
+    return "Group matches:\n• " + "\n• ".join(_result_lines(results)), results
+
+
 # --- Main turn handler ------------------------------------------------------
-def handle_turn(
-    prefs: UserPreferences, user_text: str, df: pd.DataFrame
+def handle_session_turn(
+    session_id: str,
+    user_text: str,
+    df: pd.DataFrame,
+    store: SessionStore = SESSIONS,
 ) -> Tuple[str, Optional[pd.DataFrame]]:
-    # --- Backward-compat: ensure new attrs exist on older prefs instances ---
-    for k, v in {
-        "pending_access_slot": None,
-        "pending_misses": 0,
-        "pending_required_slot": None,
-        "pending_required_misses": 0,
-    }.items():
-        if not hasattr(prefs, k):
-            setattr(prefs, k, v)
+    """`handle_turn` for the session `session_id`, created on first use."""
+    session = store.get(session_id)
+    with session.lock:
+        return handle_turn(session, user_text, df)
 
-    t = (user_text or "").strip()
-    low = t.lower()
 
-    # ------------------ GDPR user controls ---------------------------------
-    if "what do you store" in low or "welche daten speicherst du" in low:
-        return (
-            "I only store preferences if you ask me to. Everything runs locally. "
-            "You can say 'remember my preferences' to save, or 'delete my data' to remove them.",
-            None,
-        )
+def handle_turn(
+    session: Session, user_text: str, df: pd.DataFrame
+) -> Tuple[str, Optional[pd.DataFrame]]:
+    prefs, group = session.prefs, session.group
+    t = (user_text or "").strip()
 
-    if "remember my preferences" in low or "speichere meine daten" in low:
-        save_prefs_encrypted(prefs)
-        return (
-            "Saved your preferences locally with encryption. Say 'delete my data' anytime.",
-            None,
-        )
+    # ------------- COMMANDS: GDPR controls, group mode, results -------------
+    cmd_reply = COMMANDS.dispatch(session, t, df)
+    if cmd_reply is not None:
+        return cmd_reply
 
-    if "load my preferences" in low or "lade meine daten" in low:
-        loaded = load_prefs_encrypted(type(prefs))
-        if loaded:
-            prefs.__dict__.update(loaded.__dict__)
-            return "Loaded your preferences.", None
-        return "I don’t have any stored data yet.", None
-
-    if (
-        "delete my data" in low
-        or "lösche meine daten" in low
-        or "loesche meine daten" in low
-    ):
-        ok = delete_prefs()
-        return ("Deleted locally stored data." if ok else "No stored data found."), None
-
-    # ------------------ GROUP COMMANDS -------------------------------------
-    cmd_reply = maybe_handle_group_command(GROUP, t)
-    if cmd_reply:
-        return cmd_reply, None
-
-    if GROUP.active:
-        update_last_member(GROUP, t)
-        if GROUP.size and len(GROUP.members) >= GROUP.size:
+    # ------------------ GROUP MODE -----------------------------------------
+    if group.active:
+        update_last_member(group, t)
+        if group.size and len(group.members) >= group.size:
             return (
-                f"I've captured {GROUP.size} members. Say 'end group' to finalize or 'add' to add more.",
+                f"I've captured {group.size} members. Say 'end group' to finalize or 'add' to add more.",
                 None,
             )
         return (
@@ -216,33 +383,24 @@ def handle_turn(
             None,
         )
 
-    if (
-        t.lower() in {"show results", "zeige ergebnisse", "results", "recommend"}
-        and GROUP.members
-    ):
-        merged = merge_group_preferences(GROUP)
-        results = filter_and_rank(df, merged, top_k=5)
-        if results.empty:
-            GROUP.members.clear()
-            return (
-                "I couldn't find any matches for your group. Should I relax the constraints?",
-                None,
-            )
-        lines: List[str] = []
-        for _, r in results.head(3).iterrows():
-            badges: List[str] = []
-            if r.get("access_wheelchair"):
-                badges.append("♿ wheelchair")
-            if r.get("access_step_free"):
-                badges.append("⬆ step-free")
-            if r.get("access_restroom"):
-                badges.append("🚻 accessible restroom")
-            lines.append(
-                f"{r['name']} ({r['cuisine']}, {r['price']}, ★{r['rating']})  "
-                f"[{' | '.join(badges) if badges else '—'}]"
-            )
-        GROUP.members.clear()
-        return "Group matches:\n• " + "\n• ".join(lines), results
+    if group.pending_relaxation and group.members:
+        need, group.pending_relaxation = group.pending_relaxation, None
+        if not classify_yes_no(t):
+            group.members.clear()
+            return "OK, I kept everyone's needs. Say 'start group' to try again.", None
+        for member in group.members:
+            _relax(member, need)
+        return _group_results(group, df)
+
+    # ------------- HANDLE PENDING RELAXATION ANSWER ------------------------
+    relax = getattr(prefs, "pending_relaxation", None)
+    if relax:
+        prefs.pending_relaxation = None
+        yn = classify_yes_no(t)
+        if yn is not None:
+            if yn:
+                _relax(prefs, relax)
+            return _recommend(prefs, df)  # declined: closest matches as before
 
     # --------------- HANDLE PENDING REQUIRED-SLOT ANSWER -------------------
     asked_req = getattr(prefs, "pending_required_slot", None)
@@ -314,6 +472,7 @@ def handle_turn(
     if missing_access:
         prefs.pending_access_slot = missing_access
         prefs.pending_misses = 0
+        _prefetch(df, prefs, missing_access)
         return ACCESS_QUESTIONS[missing_access], None
 
     # ----------------- ASK NEXT MISSING REQUIRED SLOT ----------------------
@@ -330,25 +489,19 @@ def handle_turn(
         else:
             prefs.pending_required_slot = missing_req
             prefs.pending_required_misses = 0
+            _prefetch(df, prefs, missing_req)
             return REQUIRED_PROMPTS[missing_req], None
 
     # -------------------------- RECOMMEND ----------------------------------
-    results = filter_and_rank(df, prefs, top_k=5)
-    if results.empty:
-        return "I couldn't find any matches. Want me to broaden the search?", None
-
-    for _, r in results.head(3).iterrows():
-
-        if r.get("access_wheelchair"):
-            badges.append("♿ wheelchair")
-        if r.get("access_step_free"):
-            badges.append("⬆ step-free")
-        if r.get("access_restroom"):
-            badges.append("🚻 accessible restroom")
-        lines.append(
-            f"{r['name']} ({r['cuisine']}, {r['price']}, ★{r['rating']})  "
-            f"[{' | '.join(badges) if badges else '—'}]"
+    # a hard accessibility need leaves nothing that matches every stated
+    # constraint: propose the cheapest relaxation instead of silently
+    # showing near misses. Without hard needs, city and cuisine only boost
+    # the ranking, so there are always results to show.
+    suggestion = suggest_relaxation(df, prefs) if any(hard_flags(prefs)) else None
+    if suggestion:
+        prefs.pending_relaxation = suggestion[0]
+        return (
+            "I couldn't find an exact match. " + _relaxation_prompt(*suggestion),
+            None,
         )
-
-    reply = "Here are good matches:\n• " + "\n• ".join(lines)
-    return reply, results
+    return _recommend(prefs, df)
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..monitor import profiler, tracing
+from ..monitor.metrics import log_event
+from ..monitor.tracing import span
+
+# EVALUATION.md, System: end-to-end latency voice-in -> recommendation <= 2 s
+TARGET_TURN_LATENCY_S = 2.0
+EXIT_WORDS = {"quit", "exit", "stop", "beenden"}
+FRUSTRATION_REPLY = "I sense some frustration. Let's try again calmly."
+
+Capture = Callable[[], Any]  # blocking: audio (or typed text); None stops the loop
+Transcribe = Callable[[Any], str]
+Respond = Callable[[str], Tuple[str, Optional[pd.DataFrame]]]
+Sentiment = Callable[[str], Optional[Dict[str, Any]]]  # None: model unavailable
+FormatLines = Callable[[pd.DataFrame], Iterable[str]]
+
+
+@dataclass
+class TurnTiming:
+    """Per-turn latencies in ms, measured from the end of the user's audio."""
+
+    turn: int
+    trace_id: str = ""
+    asr_ms: float = 0.0  # audio end -> transcript
+    respond_ms: float = 0.0  # transcript -> reply (ranking and sentiment overlap)
+    first_audio_ms: float = 0.0  # audio end -> first reply line handed to TTS
+
+    @property
+    def within_target(self) -> bool:
+        return self.first_audio_ms <= TARGET_TURN_LATENCY_S * 1000.0
+
+
+@dataclass
+class _Line:
+    text: str
+    timing: Optional[TurnTiming]  # set on the first line of a reply
+    last: bool
+    trace_id: Optional[str] = None
+
+
+class TurnPipeline:
+    """
+    The voice loop as asyncio stages joined by bounded queues:
+
+        capture -> ASR -> respond (+ sentiment) -> format -> TTS
+
+    Blocking stage functions run in worker threads, so stages overlap:
+    sentiment runs alongside `respond` (the dialog turn and its ranking),
+    TTS speaks line 1 while the result lines after it are being formatted,
+    and the next capture is armed as soon as the last line of a reply
+    starts playing instead of after it ends. Bounded queues keep a slow
+    stage from piling up work upstream.
+
+    Each turn gets a trace id; with tracing enabled every stage records a
+    span under it (see src/monitor/tracing.py), one timeline row per stage.
+    """
+
+    def __init__(
+        self,
+        capture: Capture,
+        respond: Respond,
+        speak: Callable[[str], None],
+        transcribe: Optional[Transcribe] = None,
+        sentiment: Optional[Sentiment] = None,
+        format_lines: Optional[FormatLines] = None,
+        lines_to_speak: int = 3,
+        queue_size: int = 2,
+        show: Callable[[str], None] = print,
+    ):
+        self.capture = capture
+        self.respond = respond
+        self.speak = speak
+        self.transcribe = transcribe
+        self.sentiment = sentiment
+        self.format_lines = format_lines
+        self.lines_to_speak = lines_to_speak
+        self.queue_size = queue_size
+        self.show = show
+        self.timings: List[TurnTiming] = []
+
+    async def run(self, greeting: Optional[str] = None) -> List[TurnTiming]:
+        """Run until capture returns None or an exit word; returns per-turn timings."""
+        size = self.queue_size
+        audio_q: asyncio.Queue = asyncio.Queue(size)
+        text_q: asyncio.Queue = asyncio.Queue(size)
+        reply_q: asyncio.Queue = asyncio.Queue(size)
+        speech_q: asyncio.Queue = asyncio.Queue(size)
+        armed = asyncio.Event()  # set: the next capture may start
+        stop = asyncio.Event()  # set: an exit word was heard
+        if greeting:
+            await speech_q.put(_Line(greeting, None, last=True))
+        else:
+            armed.set()
+        # audio end and trace id per turn, filled by capture, read by the later stages
+        self._audio_end: Dict[int, float] = {}
+        self._trace: Dict[int, str] = {}
+        await asyncio.gather(
+            self._capture(armed, stop, audio_q),
+            self._asr(audio_q, text_q, stop),
+            self._respond(text_q, reply_q),
+            self._format(reply_q, speech_q, armed),
+            self._tts(speech_q, armed),
+        )
+        return self.timings
+
+    # --- stages -------------------------------------------------------------
+    async def _capture(
+        self, armed: asyncio.Event, stop: asyncio.Event, out: asyncio.Queue
+    ) -> None:
+        turn = 0
+        while True:
+            await armed.wait()
+            armed.clear()
+            if stop.is_set():
+                break
+            trace_id = tracing.new_trace_id()
+            with span("capture", trace_id, lane="capture"):
+                audio = await asyncio.to_thread(self.capture)
+            if audio is None:
+                break
+            turn += 1
+            self._audio_end[turn] = time.perf_counter()
+            self._trace[turn] = trace_id
+            await out.put((turn, audio))
+        await out.put(None)
+
+    async def _asr(
+        self, inp: asyncio.Queue, out: asyncio.Queue, stop: asyncio.Event
+    ) -> None:
+        while (item := await inp.get()) is not None:
+            turn, audio = item
+            trace_id = self._trace[turn]
+            if self.transcribe is None:
+                text = str(audio)
+            else:
+                with span("asr", trace_id, lane="asr"):
+                    text = await asyncio.to_thread(self.transcribe, audio)
+            text = (text or "").strip()
+            if text.lower() in EXIT_WORDS:
+                stop.set()
+                break
+            timing = TurnTiming(turn, trace_id, asr_ms=self._since_audio(turn))
+            await out.put((timing, text))
+        await out.put(None)
+
+    async def _respond(self, inp: asyncio.Queue, out: asyncio.Queue) -> None:
+        while (item := await inp.get()) is not None:
+            timing, text = item
+            t0 = time.perf_counter()
+            if not text:
+                reply: Tuple[str, Optional[pd.DataFrame]] = (
+                    "I didn't catch that. Please say it again.",
+                    None,
+                )
+                mood = None
+            else:
+                # sentiment overlaps the dialog turn (and its ranking)
+                with span("respond", timing.trace_id, lane="respond"):
+                    reply, mood = await asyncio.gather(
+                        asyncio.to_thread(self.respond, text),
+                        asyncio.to_thread(self._mood, text, timing.trace_id),
+                    )
+            timing.respond_ms = (time.perf_counter() - t0) * 1000.0
+            await out.put((timing, mood, reply))
+        await out.put(None)
+
+    async def _format(
+        self, inp: asyncio.Queue, out: asyncio.Queue, armed: asyncio.Event
+    ) -> None:
+        while (item := await inp.get()) is not None:
+            timing, mood, (reply, results) = item
+            head = [FRUSTRATION_REPLY] if mood == "NEGATIVE" else []
+            head.append(reply)
+            rows: Iterable[str] = ()
+            n_rows = 0
+            if results is not None and self.format_lines is not None:
+                n_rows = min(len(results), self.lines_to_speak)
+                rows = self.format_lines(results.head(n_rows))
+            total = len(head) + n_rows
+            # lines are formatted lazily, each once the previous one is
+            # queued: TTS is already speaking while the rest are prepared
+            lines = itertools.islice(itertools.chain(head, rows), total)
+            for i in range(total):
+                with span("format", timing.trace_id, lane="format", line=i):
+                    text = next(lines)
+                first = timing if i == 0 else None
+                await out.put(
+                    _Line(text, first, last=i == total - 1, trace_id=timing.trace_id)
+                )
+        await out.put(None)
+        armed.set()  # let capture see the end of the conversation
+
+    async def _tts(self, inp: asyncio.Queue, armed: asyncio.Event) -> None:
+        while (line := await inp.get()) is not None:
+            if line.timing is not None:
+                self._record(line.timing)
+            self.show(line.text)
+            if line.last:
+                armed.set()  # listen again while the last line plays
+            with span("tts", line.trace_id, lane="tts"):
+                await asyncio.to_thread(self.speak, line.text)
+
+    # --- helpers ------------------------------------------------------------
+    def _mood(self, text: str, trace_id: Optional[str] = None) -> Optional[str]:
+        if self.sentiment is None:
+            return None
+        try:
+            with span("sentiment", trace_id, lane="sentiment"):
+                sent = self.sentiment(text)
+        except Exception:
+            return None
+        if not sent:
+            return None
+        return (
+            "NEGATIVE" if sent["label"] == "NEGATIVE" and sent["score"] > 0.8 else None
+        )
+
+    def _since_audio(self, turn: int) -> float:
+        return (time.perf_counter() - self._audio_end[turn]) * 1000.0
+
+    def _record(self, timing: TurnTiming) -> None:
+        timing.first_audio_ms = self._since_audio(timing.turn)
+        self.timings.append(timing)
+        profiler.turn_done()
+        log_event(
+            "turn_latency",
+            turn=timing.turn,
+            trace_id=timing.trace_id,
+            asr_ms=round(timing.asr_ms, 1),
+            respond_ms=round(timing.respond_ms, 1),
+            first_audio_ms=round(timing.first_audio_ms, 1),
+            within_target=timing.within_target,
+        )
+
+
+def latency_report(timings: List[TurnTiming]) -> Dict[str, float]:
+    """p50/p90/max end-to-end latency (ms) and the share of turns within target."""
+    if not timings:
+        return {"turns": 0}
+    lat = np.array([t.first_audio_ms for t in timings])
+    return {
+        "turns": len(timings),
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p90_ms": float(np.percentile(lat, 90)),
+        "max_ms": float(lat.max()),
+        "target_ms": TARGET_TURN_LATENCY_S * 1000.0,
+        "within_target": float(np.mean([t.within_target for t in timings])),
+    }
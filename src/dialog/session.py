@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+from ..models.group import GroupState
+from ..models.preferences import UserPreferences
+
+SESSION_STORE_SIZE = 10_000
+SESSION_IDLE_TTL_S = 30 * 60.0
+
+
+@dataclass(slots=True, weakref_slot=True)
+class Session:
+    """One user's dialog state: slot-filling preferences and group mode."""
+
+    session_id: str
+    prefs: UserPreferences = field(default_factory=UserPreferences)
+    group: GroupState = field(default_factory=GroupState)
+    last_seen: float = 0.0
+    # serializes concurrent turns of the same session
+    lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+
+class SessionStore:
+    """
+    Dialog sessions keyed by session id, bounded in memory.
+
+    An OrderedDict in last-access order: a session idle for more than
+    `idle_ttl_s` is expired, and past `maxsize` the least recently used
+    session is evicted. Both happen at the old end of the dict on access,
+    so bookkeeping is O(1) amortized per turn and needs no sweeper thread.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = SESSION_STORE_SIZE,
+        idle_ttl_s: float = SESSION_IDLE_TTL_S,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.idle_ttl_s = idle_ttl_s
+        self._clock = clock
+        self._data: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = self.evictions = self.expired = 0
+
+    def get(self, session_id: str) -> Session:
+        """The session for `session_id`, created on first use (or after expiry)."""
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            session = self._data.get(session_id)
+            if session is None:
+                session = self._data[session_id] = Session(session_id)
+                self.created += 1
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._data.move_to_end(session_id)
+            session.last_seen = now
+            return session
+
+    def peek(self, session_id: str) -> Optional[Session]:
+        """The live session for `session_id`, if any, without touching it."""
+        with self._lock:
+            session = self._data.get(session_id)
+            if session is None or self._clock() - session.last_seen > self.idle_ttl_s:
+                return None
+            return session
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            return self._data.pop(session_id, None) is not None
+
+    def _expire(self, now: float) -> None:
+        # oldest first: stop at the first session that is still live
+        while self._data:
+            oldest = next(iter(self._data.values()))
+            if now - oldest.last_seen <= self.idle_ttl_s:
+                break
+            self._data.popitem(last=False)
+            self.expired += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "created": self.created,
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
+
+
+# process-wide sessions behind `handle_session_turn`
+SESSIONS = SessionStore()
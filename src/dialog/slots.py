@@ -2,6 +2,7 @@ from __future__ import annotations
 import re
 from typing import Optional
 from ..models.preferences import UserPreferences
+from ..monitor.tracing import traced
 
 # Friendly questions (ask one at a time)
 ACCESS_QUESTIONS = {
@@ -48,6 +49,7 @@ _PAT_RESTROOM = re.compile(
 _NEG = re.compile(r"\b(kein|keine|nicht|no|without)\b", re.IGNORECASE)
 
 
+@traced("slots")
 def update_accessibility_from_text(prefs: UserPreferences, user_text: str) -> None:
     """
     Update accessibility flags from a free-text utterance.
@@ -1,25 +1,142 @@
-from typing import List, Dict, Any
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import yaml
+
+CONFIG_PATH = "configs/app.yaml"
+
+# (weight name, candidate column, higher is better?) in scoring order
+FEATURES: Tuple[Tuple[str, str, bool], ...] = (
+    ("distance", "distance_norm", False),
+    ("rating", "rating_norm", True),
+    ("price", "price_norm", False),
+    ("accessibility", "accessibility_norm", True),
+    ("preference_fit", "preference_fit_norm", True),
+)
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "distance": 0.2,
+    "rating": 0.2,
+    "price": 0.1,
+    "accessibility": 0.3,
+    "preference_fit": 0.2,
+}
+MISSING_NORM = 0.5  # neutral value for a missing/NaN normalized feature
+
+Candidates = Union[Sequence[Mapping[str, Any]], np.ndarray, pd.DataFrame]
+
+# config path -> ranking.weights, read once per process
+_WEIGHTS_CACHE: Dict[str, Dict[str, float]] = {}
+
+
+def load_weights(path: str = CONFIG_PATH) -> Dict[str, float]:
+    """`ranking.weights` from app.yaml over DEFAULT_WEIGHTS, cached per path."""
+    if path not in _WEIGHTS_CACHE:
+        weights = dict(DEFAULT_WEIGHTS)
+        try:
+            with open(path, encoding="utf-8") as f:
+                cfg = yaml.safe_load(f) or {}
+        except OSError:
+            cfg = {}
+        for name, value in (cfg.get("ranking") or {}).get("weights", {}).items():
+            weights[name] = float(value)
+        _WEIGHTS_CACHE[path] = weights
+    return _WEIGHTS_CACHE[path]
+
+
+def _weight_vector(weights: Optional[Mapping[str, float]]) -> np.ndarray:
+    w = load_weights() if weights is None else weights
+    return np.array([w.get(name, DEFAULT_WEIGHTS[name]) for name, _, _ in FEATURES])
+
+
+def _column(candidates: Candidates, col: str) -> np.ndarray:
+    if isinstance(candidates, pd.DataFrame):
+        if col not in candidates.columns:
+            return np.full(len(candidates), MISSING_NORM)
+        values = pd.to_numeric(candidates[col], errors="coerce").to_numpy(dtype=float)
+    elif isinstance(candidates, np.ndarray):
+        if candidates.dtype.names is None or col not in candidates.dtype.names:
+            return np.full(len(candidates), MISSING_NORM)
+        values = candidates[col].astype(float)
+    else:
+        values = np.array([c.get(col, MISSING_NORM) for c in candidates], dtype=float)
+    return np.where(np.isnan(values), MISSING_NORM, values)
+
+
+def feature_matrix(candidates: Candidates) -> np.ndarray:
+    """(n, len(FEATURES)) matrix of benefit features (1 - x for costs)."""
+    cols = []
+    for _, col, higher_is_better in FEATURES:
+        x = _column(candidates, col)
+        cols.append(x if higher_is_better else 1.0 - x)
+    return np.column_stack(cols)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best scores, best first; ties keep input order."""
+    n = len(scores)
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+        kth = scores[part].min()
+        # argpartition breaks boundary ties arbitrarily: take them in input order
+        better = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[: k - len(better)]
+        idx = np.concatenate([better, ties])
+    else:
+        idx = np.arange(n)
+    return idx[np.lexsort((idx, -scores[idx]))]
+
+
+def _record(candidates: Candidates, i: int) -> Dict[str, Any]:
+    if isinstance(candidates, pd.DataFrame):
+        return candidates.iloc[i].to_dict()
+    if isinstance(candidates, np.ndarray):
+        row = candidates[i]
+        return {name: row[name].item() for name in candidates.dtype.names or ()}
+    return dict(candidates[i])
+
+
+def _rationale(c: Mapping[str, Any]) -> Dict[str, Any]:
+    return {
+        "distance": c.get("distance_km", "?"),
+        "rating": c.get("rating", "?"),
+        "accessibility": c.get("accessibility", {}),
+        "preference_fit": c.get("preference_fit_norm", 0.0),
+    }
+
+
+def score(
+    candidates: Candidates, weights: Optional[Mapping[str, float]] = None
+) -> np.ndarray:
+    """Weighted score per candidate: one (n, 5) @ (5,) dot product."""
+    if len(candidates) == 0:
+        return np.empty(0)
+    return feature_matrix(candidates) @ _weight_vector(weights)
 
 
 def rank(
-    candidates: List[Dict[str, Any]], weights: Dict[str, float]
+    candidates: Candidates,
+    weights: Optional[Mapping[str, float]] = None,
+    top_k: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
-    # Toy scoring for demo
-    scored = []
-    for c in candidates:
-        score = (
-            weights.get("distance", 0.2) * (1.0 - c.get("distance_norm", 0.5))
-            + weights.get("rating", 0.2) * c.get("rating_norm", 0.5)
-            + weights.get("price", 0.1) * (1.0 - c.get("price_norm", 0.5))
-            + weights.get("accessibility", 0.3) * c.get("accessibility_norm", 0.5)
-            + weights.get("preference_fit", 0.2) * c.get("preference_fit_norm", 0.5)
-        )
-        c["score"] = score
-        c["rationale"] = {
-            "distance": c.get("distance_km", "?"),
-            "rating": c.get("rating", "?"),
-            "accessibility": c.get("accessibility", {}),
-            "preference_fit": c.get("preference_fit_norm", 0.0),
-        }
-        scored.append(c)
-    return sorted(scored, key=lambda x: x["score"], reverse=True)
+    """
+    Best `top_k` candidates (all if None), best first, as new dicts with
+    `score` and `rationale` added; the input is not modified.
+
+    `candidates` may be a list of dicts, a NumPy structured array or a
+    DataFrame. Weights default to `ranking.weights` in configs/app.yaml.
+    Only the returned rows are converted to dicts and explained.
+    """
+    scores = score(candidates, weights)
+    k = len(scores) if top_k is None else max(0, min(top_k, len(scores)))
+    out: List[Dict[str, Any]] = []
+    if k == 0:
+        return out
+    for i in _top_k(scores, k):
+        c = _record(candidates, int(i))
+        c["score"] = float(scores[i])
+        c["rationale"] = _rationale(c)
+        out.append(c)
+    return out
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import anyio
+
+from src.monitor.metrics import REGISTRY, log_event
+
+T = TypeVar("T")
+
+# priorities (lower runs first)
+SHORT = 0  # slot answers: "yes", "two", "19:00", a short utterance
+LONG = 1  # free-text requests and long utterances
+BACKGROUND = 2  # nice to have: partial transcripts
+SHORT_WORDS = 3
+SHORT_AUDIO_S = 1.5
+
+
+def text_priority(text: str) -> int:
+    return SHORT if len(text.split()) <= SHORT_WORDS else LONG
+
+
+def audio_priority(samples: int, rate: int = 16_000) -> int:
+    return SHORT if samples <= SHORT_AUDIO_S * rate else LONG
+
+
+class Overloaded(Exception):
+    """A request was turned away; the client should retry after `retry_after` s."""
+
+    def __init__(self, queue: str, reason: str, retry_after: float):
+        super().__init__(f"{queue} queue {reason}")
+        self.queue = queue
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class WorkQueue:
+    """
+    Admission control for one model (Whisper, sentiment, dialog/ranking).
+
+    At most `concurrency` calls run at once, in worker threads. Callers
+    beyond that wait in a priority queue (short slot answers ahead of long
+    free text, FIFO within a priority) that holds at most `max_depth`
+    waiters; when it is full, a request either displaces the newest waiter
+    of a lower priority or is rejected. A request is also rejected up front
+    when its expected wait (queue position x mean service time) already
+    exceeds its deadline, and later if the deadline passes while it waits,
+    rather than starting work whose answer would come too late.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_depth: int, deadline_s: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_depth = max_depth
+        self.deadline_s = deadline_s
+        self.active = 0
+        self._waiting: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self.service_s: Optional[float] = None  # moving average of run time
+        self.admitted = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.rejected: Dict[str, int] = {"full": 0, "deadline": 0, "expired": 0}
+
+    @property
+    def depth(self) -> int:
+        return sum(1 for *_, fut in self._waiting if not fut.done())
+
+    def expected_wait(self, position: int) -> float:
+        """Seconds until the `position`-th waiter (1-based) gets a slot."""
+        if self.service_s is None:
+            return 0.0
+        return math.ceil(position / self.concurrency) * self.service_s
+
+    async def run(
+        self,
+        fn: Callable[..., T],
+        *args: Any,
+        priority: int = LONG,
+        deadline_s: Optional[float] = None,
+    ) -> T:
+        deadline_s = self.deadline_s if deadline_s is None else deadline_s
+        t0 = time.perf_counter()
+        await self._admit(priority, deadline_s)
+        waited_ms = (time.perf_counter() - t0) * 1000.0
+        self.admitted += 1
+        self.wait_ms_total += waited_ms
+        self.wait_ms_max = max(self.wait_ms_max, waited_ms)
+        REGISTRY.observe("queue_wait_ms", waited_ms, queue=self.name)
+        try:
+            t1 = time.perf_counter()
+            out = await anyio.to_thread.run_sync(fn, *args)
+            took = time.perf_counter() - t1
+            REGISTRY.observe("queue_service_ms", took * 1000.0, queue=self.name)
+            self.service_s = (
+                took if self.service_s is None else 0.8 * self.service_s + 0.2 * took
+            )
+            return out
+        finally:
+            self._release()
+
+    async def _admit(self, priority: int, deadline_s: float) -> None:
+        if self.active < self.concurrency and not self.depth:
+            self.active += 1
+            return
+        waiting = [w for w in self._waiting if not w[2].done()]
+        ahead = sum(1 for p, *_ in waiting if p <= priority)
+        if len(waiting) >= self.max_depth:
+            newest = max(waiting)
+            if newest[0] <= priority:
+                raise self._rejection("full", self.expected_wait(ahead + 1))
+            newest[2].set_exception(
+                self._rejection("full", self.expected_wait(len(waiting) + 1))
+            )
+        expected = self.expected_wait(ahead + 1)
+        if expected > deadline_s:
+            raise self._rejection("deadline", expected)
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._seq), fut))
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), deadline_s)
+        except asyncio.TimeoutError:
+            if not fut.done():  # not granted in time
+                fut.cancel()
+                raise self._rejection("expired", self.expected_wait(self.depth + 1))
+        except Overloaded:  # displaced by a higher-priority request
+            raise
+        except BaseException:  # cancelled (client went away)
+            if fut.done() and not fut.cancelled():
+                self._release()  # the slot was handed to us: pass it on
+            else:
+                fut.cancel()
+            raise
+
+    def _release(self) -> None:
+        while self._waiting:
+            _, _, fut = heapq.heappop(self._waiting)
+            if not fut.done():
+                fut.set_result(None)  # the slot moves to the waiter
+                return
+        self.active -= 1
+
+    def _rejection(self, reason: str, expected_s: float) -> Overloaded:
+        self.rejected[reason] += 1
+        retry_after = max(1, math.ceil(expected_s))
+        log_event(
+            "admission_reject", queue=self.name, reason=reason, retry_after=retry_after
+        )
+        return Overloaded(self.name, reason, retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "depth": self.depth,
+            "admitted": self.admitted,
+            "wait_ms_avg": self.wait_ms_total / self.admitted if self.admitted else 0.0,
+            "wait_ms_max": self.wait_ms_max,
+            "service_ms": (self.service_s or 0.0) * 1000.0,
+            "rejected": dict(self.rejected),
+        }
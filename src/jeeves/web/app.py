@@ -1,8 +1,65 @@
-from fastapi import FastAPI
+from __future__ import annotations
+
+import functools
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, TypeVar
+
+import anyio
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Request, WebSocket
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.data.loader import load_restaurants
+from src.dialog.manager import (
+    COMMANDS,
+    TOP_K,
+    _maybe_update_basic_prefs,
+    handle_session_turn,
+)
+from src.dialog.session import SessionStore
+from src.dialog.slots import update_accessibility_from_text
+from src.models.preferences import UserPreferences
+from src.monitor import profiler, tracing
+from src.monitor.metrics import REGISTRY
+from src.reco.facets import facet_index
+from src.reco.recommender import filter_and_rank, ranking_views
+from src.voice.asr import Transcribe, load_transcriber
+
+from .admission import Overloaded, WorkQueue, text_priority
+from .converse import Conversation
 
-app = FastAPI(title="Jeeves (Mock Pipeline)")
+CATALOG_PATH = os.environ.get("JEEVES_CATALOG", "data/restaurants_test.csv")
+# concurrent calls per model (dialog turns and ranking, Whisper, sentiment);
+# more requests than this wait in that model's queue (see admission.py)
+INFERENCE_WORKERS = int(os.environ.get("JEEVES_WORKERS", "4"))
+ASR_WORKERS = int(os.environ.get("JEEVES_ASR_WORKERS", "1"))
+SENTIMENT_WORKERS = int(os.environ.get("JEEVES_SENTIMENT_WORKERS", "1"))
+QUEUE_DEPTH = int(os.environ.get("JEEVES_QUEUE_DEPTH", "32"))
+# EVALUATION.md: voice-in -> recommendation within 2 s
+DEADLINE_S = float(os.environ.get("JEEVES_DEADLINE_S", "2.0"))
+LOAD_SENTIMENT = os.environ.get("JEEVES_SENTIMENT", "0") == "1"
+# Whisper model for /ws/converse, e.g. JEEVES_ASR=base; off by default, so
+# a text-only deployment does not load Whisper and torch at startup
+ASR_MODEL = os.environ.get("JEEVES_ASR", "")
+# /admin/* routes (profiling, traces); keep off on anything reachable from outside
+ADMIN = os.environ.get("JEEVES_ADMIN", "0") == "1"
+
+# the GDPR commands save to, load from and delete one process-wide file
+# (data/user_prefs.enc): one web session could read or wipe another's data
+LOCAL_ONLY_COMMANDS = frozenset({"gdpr_info", "gdpr_save", "gdpr_load", "gdpr_delete"})
+LOCAL_ONLY_REPLY = (
+    "Here I keep your preferences only for this conversation and never store "
+    "them. Saving, loading and deleting stored preferences works in the local "
+    "assistant."
+)
+
+T = TypeVar("T")
 
 
 class Utterance(BaseModel):
@@ -15,27 +72,315 @@ class Recommendation(BaseModel):
     rationale: Dict[str, Any]
 
 
-@app.post("/nlu/parse")
-def parse(u: Utterance) -> Dict[str, Any]:
-    intent = "book_restaurant" if "book" in u.text.lower() else "inform"
-    slots: Dict[str, Any] = {}  # Typ deklariert
-    sentiment = "neutral"
-    return {"intent": intent, "slots": slots, "sentiment": sentiment}
-
-
-@app.post("/recs")
-def recs(u: Utterance) -> List[Recommendation]:
-    return [
-        Recommendation(
-            name="Trattoria Ada",
-            rationale={"distance": "0.8km", "wheelchair": True, "why": "fits prefs"},
-        ),
-        Recommendation(
-            name="Green Bowl",
-            rationale={
-                "distance": "1.2km",
-                "wheelchair": True,
-                "why": "vegan friendly",
-            },
-        ),
-    ]
+class TurnReply(BaseModel):
+    session_id: str
+    reply: str
+    results: List[Recommendation] = []
+
+
+class ProfileRequest(BaseModel):
+    seconds: Optional[float] = None
+    turns: Optional[int] = None
+    hz: Optional[float] = None  # default: JEEVES_PROFILE_HZ or profiler.DEFAULT_HZ
+
+
+def default_queues(workers: int = INFERENCE_WORKERS) -> Dict[str, WorkQueue]:
+    return {
+        "dialog": WorkQueue("dialog", workers, QUEUE_DEPTH, DEADLINE_S),
+        "asr": WorkQueue("asr", ASR_WORKERS, QUEUE_DEPTH, DEADLINE_S),
+        "sentiment": WorkQueue("sentiment", SENTIMENT_WORKERS, QUEUE_DEPTH, DEADLINE_S),
+    }
+
+
+@dataclass
+class Shared:
+    """Loaded once at startup and only read by requests (sessions aside)."""
+
+    df: pd.DataFrame
+    sessions: SessionStore
+    queues: Dict[str, WorkQueue]
+    sentiment: Optional[Callable[[str], Dict[str, Any]]] = None
+    asr: Optional[Transcribe] = None
+
+    async def run(
+        self, queue: str, fn: Callable[..., T], *args: Any, priority: int = 1
+    ) -> T:
+        """Run blocking `fn` through `queue`'s admission control, off the event loop."""
+        return await self.queues[queue].run(fn, *args, priority=priority)
+
+
+def _warm(df: pd.DataFrame) -> None:
+    # build the catalog-derived structures now, not on the first request
+    if len(df):
+        filter_and_rank(df, UserPreferences(), top_k=TOP_K)
+        ranking_views(df)
+        facet_index(df)
+
+
+def _load_sentiment() -> Optional[Callable[[str], Dict[str, Any]]]:
+    try:
+        from src.nlp.sentiment_en import _get_pipeline, analyze_sentiment
+    except Exception:
+        return None
+    _get_pipeline()  # load the model weights once
+    return analyze_sentiment
+
+
+def create_app(
+    catalog_path: str = CATALOG_PATH,
+    df: Optional[pd.DataFrame] = None,
+    workers: int = INFERENCE_WORKERS,
+    load_sentiment: bool = LOAD_SENTIMENT,
+    asr: Optional[Transcribe] = None,
+    asr_model: str = ASR_MODEL,
+    queues: Optional[Dict[str, WorkQueue]] = None,
+    admin: bool = ADMIN,
+) -> FastAPI:
+    """
+    The service; pass `df` to serve an in-memory catalog and `asr` to use
+    a given transcriber instead of loading `asr_model` (tests, benchmarks).
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        catalog = df
+        if catalog is None:
+            catalog = await anyio.to_thread.run_sync(load_restaurants, catalog_path)
+        await anyio.to_thread.run_sync(_warm, catalog)
+        sentiment = (
+            await anyio.to_thread.run_sync(_load_sentiment) if load_sentiment else None
+        )
+        transcribe = asr
+        if transcribe is None and asr_model:
+            transcribe = await anyio.to_thread.run_sync(load_transcriber, asr_model)
+        app.state.shared = Shared(
+            catalog,
+            SessionStore(),
+            queues or default_queues(workers),
+            sentiment,
+            transcribe,
+        )
+        profiler.start_from_env()  # JEEVES_PROFILE=10s / =20turns
+        yield
+
+    app = FastAPI(title="Jeeves", lifespan=lifespan)
+    app.add_exception_handler(Overloaded, _overloaded)
+    app.add_middleware(RequestTimer)
+    _add_routes(app)
+    if admin:
+        _add_admin_routes(app)
+    return app
+
+
+async def _overloaded(request: Request, exc: Exception) -> JSONResponse:
+    assert isinstance(exc, Overloaded)
+    return JSONResponse(
+        {"detail": str(exc), "queue": exc.queue, "reason": exc.reason},
+        status_code=503,
+        headers={"Retry-After": str(int(exc.retry_after))},
+    )
+
+
+class RequestTimer:
+    """Observes `http_request_ms` per route template (plain ASGI, no body buffering)."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        async def send_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        t0 = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = scope.get("route")
+            REGISTRY.observe(
+                "http_request_ms",
+                (time.perf_counter_ns() - t0) / 1e6,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status[0],
+            )
+
+
+def _shared(request: Request) -> Shared:
+    return request.app.state.shared
+
+
+RATIONALE = {
+    "city": "city",
+    "cuisine": "cuisine",
+    "price": "price",
+    "rating": "rating",
+    "score": "score",
+    "wheelchair": "access_wheelchair",
+    "step_free": "access_step_free",
+    "restroom": "access_restroom",
+}
+
+
+def _recommendations(
+    results: Optional[pd.DataFrame], n: int = TOP_K
+) -> List[Recommendation]:
+    if results is None or len(results) == 0:
+        return []
+    head = results.head(n)
+    # column-wise to Python values: far cheaper than a per-row to_dict()
+    cols = {k: head[c].tolist() for k, c in RATIONALE.items() if c in head.columns}
+    recs = []
+    for i, name in enumerate(head["name"].tolist()):
+        rationale = {k: v[i] for k, v in cols.items() if not pd.isna(v[i])}
+        recs.append(Recommendation(name=str(name), rationale=rationale))
+    return recs
+
+
+def _recs(df: pd.DataFrame, text: str) -> List[Recommendation]:
+    return _recommendations(filter_and_rank(df, parse_prefs(text), TOP_K))
+
+
+def _turn(
+    df: pd.DataFrame, sessions: SessionStore, session_id: str, text: str
+) -> TurnReply:
+    if any(name in LOCAL_ONLY_COMMANDS for name, _ in COMMANDS.find(text)):
+        reply, results = LOCAL_ONLY_REPLY, None
+    else:
+        reply, results = handle_session_turn(session_id, text, df, sessions)
+    profiler.turn_done()
+    return TurnReply(
+        session_id=session_id, reply=reply, results=_recommendations(results)
+    )
+
+
+def parse_prefs(text: str) -> UserPreferences:
+    """Slots from a single utterance, with the dialog manager's extractors."""
+    prefs = UserPreferences()
+    _maybe_update_basic_prefs(prefs, text)
+    update_accessibility_from_text(prefs, text)
+    return prefs
+
+
+def _add_routes(app: FastAPI) -> None:
+    @app.post("/nlu/parse")
+    async def parse(u: Utterance, request: Request) -> Dict[str, Any]:
+        shared = _shared(request)
+        prefs = parse_prefs(u.text)
+        intent = "book_restaurant" if "book" in u.text.lower() else "inform"
+        slots: Dict[str, Any] = {
+            k: v
+            for k, v in (
+                ("city", prefs.city),
+                ("cuisine", prefs.cuisine),
+                ("guests", prefs.guests),
+                ("time", prefs.time),
+            )
+            if v is not None
+        }
+        access = {
+            k: v
+            for k, v in (
+                ("wheelchair", prefs.accessibility.wheelchair),
+                ("step_free", prefs.accessibility.step_free),
+                ("restroom", prefs.accessibility.restroom),
+            )
+            if v is not None
+        }
+        if access:
+            slots["accessibility"] = access
+        sentiment = "neutral"
+        if shared.sentiment is not None:
+            mood = await shared.run(
+                "sentiment", shared.sentiment, u.text, priority=text_priority(u.text)
+            )
+            sentiment = mood["label"].lower()
+        return {"intent": intent, "slots": slots, "sentiment": sentiment}
+
+    @app.post("/recs")
+    async def recs(u: Utterance, request: Request) -> List[Recommendation]:
+        shared = _shared(request)
+        return await shared.run(
+            "dialog", _recs, shared.df, u.text, priority=text_priority(u.text)
+        )
+
+    @app.post("/sessions/{session_id}/turn")
+    async def turn(session_id: str, u: Utterance, request: Request) -> TurnReply:
+        shared = _shared(request)
+        return await shared.run(
+            "dialog",
+            _turn,
+            shared.df,
+            shared.sessions,
+            session_id,
+            u.text,
+            priority=text_priority(u.text),
+        )
+
+    @app.delete("/sessions/{session_id}")
+    async def end_session(session_id: str, request: Request) -> Dict[str, bool]:
+        return {"ended": _shared(request).sessions.drop(session_id)}
+
+    @app.websocket("/ws/converse")
+    async def converse(ws: WebSocket, session_id: Optional[str] = None) -> None:
+        shared: Shared = ws.app.state.shared
+        if shared.asr is None:
+            await ws.close(code=1011, reason="speech recognition is not available")
+            return
+        sid = session_id or uuid.uuid4().hex
+        respond = functools.partial(_turn, shared.df, shared.sessions, sid)
+        await Conversation(ws, shared, sid, respond).run()
+
+    @app.get("/health")
+    async def health(request: Request) -> Dict[str, Any]:
+        shared = _shared(request)
+        return {
+            "restaurants": len(shared.df),
+            "sessions": shared.sessions.stats(),
+            "queues": {name: q.stats() for name, q in shared.queues.items()},
+        }
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics(request: Request) -> str:
+        shared = _shared(request)
+        # gauges are read at scrape time rather than kept up to date per request
+        for name, q in shared.queues.items():
+            REGISTRY.set("queue_active", q.active, queue=name)
+            REGISTRY.set("queue_depth", q.depth, queue=name)
+        REGISTRY.set("sessions_active", shared.sessions.stats()["size"])
+        return REGISTRY.exposition()
+
+
+def _add_admin_routes(app: FastAPI) -> None:
+    @app.post("/admin/profile", status_code=202)
+    async def start_profile(req: ProfileRequest) -> Dict[str, Any]:
+        """Sample all threads for `seconds` or the next `turns` turns into data/profiles/."""
+        try:
+            return profiler.start_profile(
+                req.seconds, req.turns, req.hz, reason="admin"
+            )
+        except RuntimeError as e:
+            raise HTTPException(409, str(e)) from None
+
+    @app.get("/admin/profile")
+    async def profile_status() -> Dict[str, Any]:
+        return profiler.status()
+
+    @app.delete("/admin/profile")
+    async def stop_profile() -> Dict[str, Any]:
+        await anyio.to_thread.run_sync(profiler.stop_profile, 5.0)
+        return profiler.status()
+
+    @app.get("/admin/traces")
+    async def traces(trace_id: Optional[str] = None) -> Dict[str, Any]:
+        """Recent spans as Chrome/Perfetto JSON (empty unless JEEVES_TRACE=1)."""
+        return tracing.chrome_trace(tracing.spans(trace_id))
+
+
+app = create_app()
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+import numpy as np
+from fastapi import WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
+
+from src.monitor import tracing
+from src.monitor.metrics import REGISTRY, log_event
+from src.monitor.tracing import span
+from src.voice.asr import Transcribe
+from src.voice.vad import EnergyVAD, pcm16_to_float
+
+from .admission import BACKGROUND, Overloaded, audio_priority, text_priority
+
+if TYPE_CHECKING:
+    from .app import Shared, TurnReply
+
+# frames buffered per connection before we stop reading the socket (the
+# client then blocks on TCP flow control instead of us buffering audio)
+INBOX_FRAMES = 50
+# outgoing messages buffered per connection; partial transcripts beyond
+# this are dropped (a newer one follows), finals and replies never are
+OUTBOX_MESSAGES = 16
+PARTIAL_EVERY_S = 0.5
+_FLUSH = "flush"  # inbox marker: the client asked to end the current utterance
+CLOSE_INTERNAL_ERROR = 1011
+
+
+def _control_type(text: str) -> Optional[str]:
+    """The "type" of a JSON control message; None when the text is not one."""
+    try:
+        msg = json.loads(text)
+    except ValueError:
+        return None
+    kind = msg.get("type") if isinstance(msg, dict) else None
+    return kind if isinstance(kind, str) else None
+
+
+class Conversation:
+    """
+    One `/ws/converse` connection.
+
+    The client streams 16 kHz mono int16 PCM as binary frames (a frame may
+    end mid-sample: the odd byte is kept for the next one); a text frame
+    {"type": "flush"} ends the current utterance. Three tasks run per
+    connection: the reader feeds a bounded inbox, the processor runs the
+    VAD and ASR and the dialog turn, and the writer drains a bounded
+    outbox. Messages sent to the client:
+
+        {"type": "ready", "session_id"}
+        {"type": "speech_start"}
+        {"type": "partial", "text"}                 while speaking
+        {"type": "final", "text", "asr_ms"}         after the utterance
+        {"type": "reply", "reply", "results", "latency_ms"}
+        {"type": "flushed"}                         after a flush
+        {"type": "error", "error": "overloaded", "retry_after"}
+                                                    the turn was not admitted
+        {"type": "error", "error": "asr_failed" | "turn_failed"}
+                                                    the turn failed; go on
+        {"type": "error", "error": "bad_message", "detail"}
+                                                    an unknown text frame
+
+    An unexpected failure closes the socket with code 1011 (internal error)
+    instead of leaving the client waiting.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        shared: "Shared",
+        session_id: str,
+        respond: Callable[[str], "TurnReply"],
+    ):
+        if shared.asr is None:
+            raise ValueError("a conversation needs a transcriber (Shared.asr)")
+        self.ws = ws
+        self.shared = shared
+        self.asr: Transcribe = shared.asr
+        self.session_id = session_id
+        self.respond = respond  # blocking: one dialog turn for this session
+        self.vad = EnergyVAD()
+        self.inbox: asyncio.Queue = asyncio.Queue(INBOX_FRAMES)
+        self.outbox: asyncio.Queue = asyncio.Queue(OUTBOX_MESSAGES)
+        self._partial: Optional[asyncio.Task] = None
+        self._last_partial = 0.0
+        self._utterance = 0  # partials of an ended utterance are not sent
+        self.dropped_partials = 0
+        self._odd_byte = b""  # half a sample from the previous frame
+
+    async def run(self) -> None:
+        await self.ws.accept()
+        await self.ws.send_json({"type": "ready", "session_id": self.session_id})
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self._reader())
+                tg.create_task(self._processor())
+                tg.create_task(self._writer())
+        except* WebSocketDisconnect:
+            pass
+        except* Exception as failed:
+            log_event(
+                "ws_error",
+                stage="connection",
+                session_id=self.session_id,
+                error=repr(failed.exceptions[0]),
+            )
+            await self._close(CLOSE_INTERNAL_ERROR)
+
+    async def _close(self, code: int) -> None:
+        connected = WebSocketState.CONNECTED
+        if self.ws.client_state == connected and self.ws.application_state == connected:
+            await self.ws.close(code)
+
+    # --- tasks ------------------------------------------------------------------
+    async def _reader(self) -> None:
+        while True:
+            msg = await self.ws.receive()
+            if msg["type"] == "websocket.disconnect":
+                break
+            if msg.get("bytes"):
+                data = self._odd_byte + msg["bytes"]
+                whole = len(data) & ~1  # int16 samples
+                self._odd_byte = data[whole:]
+                if whole:
+                    await self.inbox.put(data[:whole])  # blocks when the inbox is full
+            elif msg.get("text") is not None:
+                if _control_type(msg["text"]) == "flush":
+                    await self.inbox.put(_FLUSH)
+                else:
+                    await self.outbox.put(
+                        {
+                            "type": "error",
+                            "error": "bad_message",
+                            "detail": 'expected audio or {"type": "flush"}',
+                        }
+                    )
+        await self.inbox.put(None)
+
+    async def _processor(self) -> None:
+        while (buf := await self.inbox.get()) is not None:
+            if buf is _FLUSH:
+                segment = self.vad.flush()
+                if segment is not None:
+                    await self._turn(segment, time.perf_counter())
+                await self.outbox.put({"type": "flushed"})
+                continue
+            for event, segment in self.vad.feed(pcm16_to_float(buf)):
+                if event == "start":
+                    await self.outbox.put({"type": "speech_start"})
+                    self._last_partial = time.perf_counter()
+                elif segment is not None:
+                    await self._turn(segment, time.perf_counter())
+            self._maybe_partial()
+        await self.outbox.put(None)
+
+    async def _writer(self) -> None:
+        while (msg := await self.outbox.get()) is not None:
+            await self.ws.send_json(msg)
+        if self._partial is not None:
+            self._partial.cancel()
+        await self._close(1000)
+
+    # --- ASR and dialog ---------------------------------------------------------
+    def _maybe_partial(self) -> None:
+        now = time.perf_counter()
+        if not self.vad.in_speech or now - self._last_partial < PARTIAL_EVERY_S:
+            return
+        if self._partial is not None and not self._partial.done():
+            return  # one partial transcription at a time: skip, do not queue
+        self._last_partial = now
+        self._partial = asyncio.create_task(
+            self._send_partial(self.vad.speech, self._utterance)
+        )
+
+    async def _send_partial(self, audio: np.ndarray, utterance: int) -> None:
+        try:
+            text = await self.shared.run("asr", self.asr, audio, priority=BACKGROUND)
+        except Exception:
+            return  # partials are best effort (overloaded, ASR failure)
+        if utterance != self._utterance or not text:
+            return
+        try:
+            self.outbox.put_nowait({"type": "partial", "text": text})
+        except asyncio.QueueFull:
+            self.dropped_partials += 1
+
+    async def _turn(self, segment: np.ndarray, speech_end: float) -> None:
+        self._utterance += 1
+        trace_id = tracing.new_trace_id()
+        stage = "asr"
+        try:
+            t0 = time.perf_counter()
+            with span("asr", trace_id, lane="asr", samples=len(segment)):
+                text = await self.shared.run(
+                    "asr",
+                    self.asr,
+                    segment,
+                    priority=audio_priority(len(segment)),
+                )
+            asr_ms = (time.perf_counter() - t0) * 1000.0
+            await self.outbox.put(
+                {"type": "final", "text": text, "asr_ms": round(asr_ms, 1)}
+            )
+            if not text:
+                return
+            stage = "turn"
+            t1 = time.perf_counter()
+            with span("respond", trace_id, lane="respond"):
+                turn = await self.shared.run(
+                    "dialog", self.respond, text, priority=text_priority(text)
+                )
+        except Overloaded as e:
+            await self.outbox.put(
+                {"type": "error", "error": "overloaded", "retry_after": e.retry_after}
+            )
+            return
+        except Exception as e:
+            # one failed turn does not end the conversation
+            log_event("ws_error", trace_id=trace_id, stage=stage, error=repr(e))
+            await self.outbox.put({"type": "error", "error": f"{stage}_failed"})
+            return
+        latency: Dict[str, Any] = {
+            "asr": round(asr_ms, 1),
+            "turn": round((time.perf_counter() - t1) * 1000.0, 1),
+            "total": round((time.perf_counter() - speech_end) * 1000.0, 1),
+        }
+        await self.outbox.put(
+            {"type": "reply", **turn.model_dump(), "latency_ms": latency}
+        )
+        REGISTRY.observe("ws_turn_ms", latency["total"])
+        log_event(
+            "ws_turn",
+            trace_id=trace_id,
+            **latency,
+            dropped_partials=self.dropped_partials,
+        )
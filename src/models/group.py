@@ -4,11 +4,15 @@ from typing import List, Optional, Dict
 from .preferences import UserPreferences, AccessibilityNeeds
 
 
-@dataclass
+@dataclass(slots=True)
 class GroupState:
     active: bool = False
     size: Optional[int] = None
     members: List[UserPreferences] = field(default_factory=list)
+    # how member preferences are aggregated; see src.reco.group_rank
+    strategy: str = "union"
+    # accessibility need proposed for dropping when nothing matched
+    pending_relaxation: Optional[str] = None
 
     def add_member(self, prefs: UserPreferences) -> None:
         self.members.append(prefs)
@@ -3,14 +3,16 @@ from dataclasses import dataclass, field
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class AccessibilityNeeds:
     wheelchair: Optional[bool] = None
     step_free: Optional[bool] = None
     restroom: Optional[bool] = None
 
 
-@dataclass
+# slots keep per-session state compact; the weakref slot lets ranking state and
+# prefetch jobs be keyed to a session's prefs object
+@dataclass(slots=True, weakref_slot=True)
 class UserPreferences:
     city: Optional[str] = None
     cuisine: Optional[str] = None
@@ -23,3 +25,4 @@ class UserPreferences:
     pending_misses: int = 0
     pending_required_slot: Optional[str] = None
     pending_required_misses: int = 0
+    pending_relaxation: Optional[str] = None
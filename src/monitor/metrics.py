@@ -1,23 +1,251 @@
 from __future__ import annotations
-import time
+
+import atexit
+import bisect
+import gzip
 import json
 import os
+import shutil
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 LOG_PATH = "data/metrics.log"
+FLUSH_INTERVAL_S = 1.0
+# past this size the log is gzipped to metrics.log.1.gz (older ones shift
+# up to .BACKUPS.gz, then drop off) and a fresh file is started
+MAX_BYTES = int(os.environ.get("JEEVES_METRICS_MAX_BYTES", str(10 * 1024 * 1024)))
+BACKUPS = 5
+# events buffered for the flusher; past this the oldest are dropped (and
+# counted) rather than growing without bound when the log cannot be written
+MAX_QUEUED_EVENTS = 100_000
+# histogram bucket upper bounds (ms); one more bucket catches the rest
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+    10000,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+Key = Tuple[str, Labels]
+
+
+def _key(name: str, labels: Dict[str, Any]) -> Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Registry:
+    """
+    Counters, gauges and fixed-bucket latency histograms, in memory.
+
+    Counters and histograms are written to a per-thread shard (a plain
+    dict only its own thread mutates), so the hot path takes no lock and
+    does no I/O; `snapshot()` sums the shards. A shard outlives its thread,
+    so counts from finished worker threads are kept.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards: List[Dict[Key, Any]] = []
+        self._lock = threading.Lock()  # shard registration only
+        self._gauges: Dict[Key, float] = {}
+
+    def _shard(self) -> Dict[Key, Any]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard: Dict[Key, Any] = {}
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        shard = self._shard()
+        k = _key(name, labels)
+        shard[k] = shard.get(k, 0.0) + value
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        self._gauges[_key(name, labels)] = float(value)
+
+    def observe(self, name: str, ms: float, **labels: Any) -> None:
+        shard = self._shard()
+        k = _key(name, labels)
+        h = shard.get(k)
+        if h is None:
+            h = shard[k] = [[0] * (len(self.buckets) + 1), 0.0]
+        h[0][bisect.bisect_left(self.buckets, ms)] += 1
+        h[1] += ms
+
+    def snapshot(self) -> Dict[str, Dict[Key, Any]]:
+        counters: Dict[Key, float] = {}
+        hists: Dict[Key, Tuple[List[int], float]] = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for k, v in list(shard.items()):
+                if isinstance(v, list):
+                    counts, total = hists.get(k, ([0] * len(v[0]), 0.0))
+                    hists[k] = ([a + b for a, b in zip(counts, v[0])], total + v[1])
+                else:
+                    counters[k] = counters.get(k, 0.0) + v
+        return {"counters": counters, "gauges": dict(self._gauges), "histograms": hists}
+
+    def exposition(self) -> str:
+        """Prometheus text format."""
+        snap = self.snapshot()
+        bounds = [f"{b:g}" for b in self.buckets] + ["+Inf"]
+        lines: List[str] = []
+        seen = set()
+
+        def typed(name: str, kind: str) -> None:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), v in sorted(snap["counters"].items()):
+            typed(name, "counter")
+            lines.append(f"{name}{_fmt(labels)} {v:g}")
+        for (name, labels), v in sorted(snap["gauges"].items()):
+            typed(name, "gauge")
+            lines.append(f"{name}{_fmt(labels)} {v:g}")
+        for (name, labels), (counts, total) in sorted(snap["histograms"].items()):
+            typed(name, "histogram")
+            cum = 0
+            for le, n in zip(bounds, counts):
+                cum += n
+                lines.append(f"{name}_bucket{_fmt(labels + (('le', le),))} {cum}")
+            lines.append(f"{name}_sum{_fmt(labels)} {total:g}")
+            lines.append(f"{name}_count{_fmt(labels)} {cum}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
+        self._gauges.clear()
+
+
+def _fmt(labels: Labels) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in labels)
+    return "{" + inner + "}"
+
+
+REGISTRY = Registry()
+
+
+# --- Event log --------------------------------------------------------------
+# (path, record) pairs; deque appends and pops are atomic, so logging threads
+# never wait on the flusher. The path and timestamp are taken when the event
+# is logged.
+_EVENTS: Deque[Tuple[str, Dict[str, Any]]] = deque(maxlen=MAX_QUEUED_EVENTS)
+_wake = threading.Event()
+_flusher: Optional[threading.Thread] = None
+_flusher_lock = threading.Lock()
+_write_lock = threading.Lock()
+
+
+def _enqueue(rec: Dict[str, Any]) -> None:
+    if len(_EVENTS) == _EVENTS.maxlen:
+        REGISTRY.inc("events_dropped_total")  # the append drops the oldest
+    _EVENTS.append((LOG_PATH, {"ts": round(time.time(), 3), **rec}))
+    if _flusher is None:
+        _start_flusher()
+
+
+def _start_flusher() -> None:
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(
+                target=_flush_loop, name="metrics-flush", daemon=True
+            )
+            _flusher.start()
+
+
+def _flush_loop() -> None:
+    while True:
+        _wake.wait(FLUSH_INTERVAL_S)
+        _wake.clear()
+        try:
+            flush()
+        except Exception as e:  # keep flushing later batches
+            print(f"[WARN] metrics flush failed: {e!r}", file=sys.stderr)
+
+
+def flush() -> None:
+    """
+    Write buffered events to their log files, one append per file. A file
+    that cannot be written loses its batch (counted, with a warning); the
+    other files are still written.
+    """
+    with _write_lock:
+        batches: Dict[str, List[str]] = {}
+        while _EVENTS:
+            path, rec = _EVENTS.popleft()
+            batches.setdefault(path, []).append(json.dumps(rec, default=str))
+        for path, lines in batches.items():
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                with open(path, "a") as f:
+                    f.write("\n".join(lines) + "\n")
+                    size = f.tell()
+                if MAX_BYTES and size >= MAX_BYTES:
+                    _rotate(path)
+            except OSError as e:
+                REGISTRY.inc("events_dropped_total", len(lines))
+                print(f"[WARN] cannot write {path}: {e}", file=sys.stderr)
+
+
+def _rotate(path: str) -> None:
+    """Shift path.N.gz to path.N+1.gz and gzip the live file to path.1.gz."""
+    for n in range(BACKUPS, 1, -1):
+        older = f"{path}.{n - 1}.gz"
+        if os.path.exists(older):
+            os.replace(older, f"{path}.{n}.gz")
+    tmp = f"{path}.1.gz.tmp"
+    with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(tmp, f"{path}.1.gz")
+    os.truncate(path, 0)
+
+
+def log_files(path: str = "") -> List[str]:
+    """The log and its rotated predecessors that exist, oldest first."""
+    path = path or LOG_PATH
+    files = [f"{path}.{n}.gz" for n in range(BACKUPS, 0, -1)] + [path]
+    return [f for f in files if os.path.exists(f)]
+
+
+atexit.register(flush)
 
 
+# --- Call-site API ----------------------------------------------------------
 def timed(fn, *a, **kw):
-    t0 = time.time()
+    t0 = time.perf_counter_ns()
     out = fn(*a, **kw)
-    dt_ms = (time.time() - t0) * 1000.0
-    os.makedirs("data", exist_ok=True)
-    with open(LOG_PATH, "a") as f:
-        f.write(json.dumps({"fn": fn.__name__, "latency_ms": round(dt_ms, 2)}) + "\n")
+    dt_ms = (time.perf_counter_ns() - t0) / 1e6
+    REGISTRY.observe("fn_latency_ms", dt_ms, fn=fn.__name__)
+    _enqueue({"fn": fn.__name__, "latency_ms": round(dt_ms, 2)})
     return out, dt_ms
 
 
 def log_event(name: str, **fields):
-    os.makedirs("data", exist_ok=True)
-    rec = {"event": name, **fields}
-    with open(LOG_PATH, "a") as f:
-        f.write(json.dumps(rec) + "\n")
+    REGISTRY.inc("events_total", event=name)
+    _enqueue({"event": name, **fields})
@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from types import CodeType, FrameType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .metrics import log_event
+
+PROFILE_DIR = "data/profiles"
+DEFAULT_HZ = 100.0  # unless JEEVES_PROFILE_HZ is set when a session starts
+DEFAULT_SECONDS = 30.0
+# leaf frames of threads parked waiting for work; dropped unless include_idle
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),  # concurrent.futures worker blocked on its queue
+}
+
+Stack = Tuple[str, ...]  # root first
+
+
+@dataclass
+class Profile:
+    """Stack sample counts per thread from one profiling run."""
+
+    interval_s: float
+    duration_s: float = 0.0
+    samples: int = 0  # sampling passes
+    stacks: Counter = field(default_factory=Counter)  # (thread, stack) -> count
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format (flamegraph.pl, speedscope, inferno)."""
+        lines = [
+            ";".join((thread, *stack)) + f" {n}"
+            for (thread, stack), n in sorted(self.stacks.items())
+        ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def speedscope(self, name: str = "jeeves") -> Dict[str, Any]:
+        """speedscope.app file: one sampled profile per thread, weighted in seconds."""
+        frames: List[Dict[str, Any]] = []
+        index: Dict[str, int] = {}
+        by_thread: Dict[str, Tuple[List[List[int]], List[float]]] = {}
+        for (thread, stack), n in sorted(self.stacks.items()):
+            ids = []
+            for label in stack:
+                if label not in index:
+                    index[label] = len(frames)
+                    frames.append(_frame_entry(label))
+                ids.append(index[label])
+            samples, weights = by_thread.setdefault(thread, ([], []))
+            samples.append(ids)
+            weights.append(n * self.interval_s)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "jeeves",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+                for thread, (samples, weights) in by_thread.items()
+            ],
+        }
+
+    def write(self, name: str, root: str = PROFILE_DIR) -> List[str]:
+        """Write `<name>.collapsed` and `<name>.speedscope.json` under `root`."""
+        os.makedirs(root, exist_ok=True)
+        collapsed = os.path.join(root, f"{name}.collapsed")
+        speedscope = os.path.join(root, f"{name}.speedscope.json")
+        with open(collapsed, "w") as f:
+            f.write(self.collapsed())
+        with open(speedscope, "w") as f:
+            json.dump(self.speedscope(name), f)
+        return [collapsed, speedscope]
+
+
+_LABEL = re.compile(r"^(?P<fn>.*) \((?P<file>[^:]*):(?P<line>\d+)\)$")
+
+
+def _frame_entry(label: str) -> Dict[str, Any]:
+    m = _LABEL.match(label)
+    if not m:
+        return {"name": label}
+    return {"name": m["fn"], "file": m["file"], "line": int(m["line"])}
+
+
+class SamplingProfiler:
+    """
+    Samples every thread's Python stack `hz` times a second from a daemon
+    thread (sys._current_frames), for `duration_s` or until stop(). Nothing
+    runs, and nothing is hooked into the interpreter, while it is not
+    started; while running, the sampled threads are only paused for the
+    GIL hand-off of each sampling pass.
+    """
+
+    def __init__(
+        self,
+        hz: float = DEFAULT_HZ,
+        duration_s: Optional[float] = None,
+        include_idle: bool = False,
+        on_done: Optional[Callable[[Profile], None]] = None,
+    ):
+        self.interval_s = 1.0 / hz
+        self.duration_s = duration_s
+        self.include_idle = include_idle
+        self.on_done = on_done
+        self.profile = Profile(self.interval_s)
+        self._labels: Dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> SamplingProfiler:
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def request_stop(self) -> None:
+        """Stop after the current pass without waiting (safe from any thread)."""
+        self._stop.set()
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        return self.profile
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        t0 = next_at = time.perf_counter()
+        deadline = t0 + self.duration_s if self.duration_s else None
+        while not self._stop.is_set():
+            self._sample(own)
+            next_at += self.interval_s
+            now = time.perf_counter()
+            if deadline is not None and now >= deadline:
+                break
+            self._stop.wait(max(0.0, next_at - now))
+        self.profile.duration_s = time.perf_counter() - t0
+        if self.on_done is not None:
+            self.on_done(self.profile)
+
+    def _sample(self, own: int) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks = self.profile.stacks
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if not self.include_idle and self._idle(frame):
+                continue
+            stacks[(names.get(ident, f"thread-{ident}"), self._stack(frame))] += 1
+        self.profile.samples += 1
+
+    def _stack(self, frame: Optional[FrameType]) -> Stack:
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                name = code.co_name.replace(";", ":")
+                label = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                self._labels[code] = label
+            labels.append(label)
+            frame = frame.f_back
+        return tuple(reversed(labels))
+
+    @staticmethod
+    def _idle(frame: FrameType) -> bool:
+        code = frame.f_code
+        return (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES
+
+
+# --- On-demand sessions -----------------------------------------------------
+# One profiling session at a time, started by JEEVES_PROFILE, a CLI flag or
+# the web app's /admin/profile; it ends after its seconds or its turns.
+@dataclass
+class _Session:
+    profiler: SamplingProfiler
+    name: str
+    root: str
+    seconds: Optional[float]
+    turns: Optional[int]
+    turns_seen: int = 0
+    files: List[str] = field(default_factory=list)
+    done: threading.Event = field(default_factory=threading.Event)
+
+
+_SPEC = re.compile(r"^(?:(?P<turns>\d+)\s*turns?|(?P<seconds>\d+(?:\.\d+)?)\s*s)$")
+_session: Optional[_Session] = None
+_last: Optional[_Session] = None
+_lock = threading.Lock()
+
+
+def parse_spec(spec: str) -> Tuple[Optional[float], Optional[int]]:
+    """'10s' -> 10 seconds, '5turns' -> 5 turns, '1' / 'on' -> DEFAULT_SECONDS."""
+    spec = spec.strip().lower()
+    if spec in ("1", "on", "true", "yes"):
+        return DEFAULT_SECONDS, None
+    m = _SPEC.match(spec)
+    if m and m["turns"]:
+        return None, int(m["turns"])
+    if m and m["seconds"]:
+        return float(m["seconds"]), None
+    raise ValueError(f"profile spec {spec!r}: use e.g. 10s or 5turns")
+
+
+def start_profile(
+    seconds: Optional[float] = None,
+    turns: Optional[int] = None,
+    hz: Optional[float] = None,
+    root: Optional[str] = None,
+    reason: str = "manual",
+) -> Dict[str, Any]:
+    """
+    Profile all threads for `seconds`, or until `turns` more turns finish
+    (capped at 10 minutes), then write the files under `root` (default
+    PROFILE_DIR). Raises RuntimeError while another session is running.
+    """
+    global _session
+    if seconds is None and turns is None:
+        seconds = DEFAULT_SECONDS
+    if hz is None:
+        hz = float(os.environ.get("JEEVES_PROFILE_HZ", DEFAULT_HZ))
+    root = root or PROFILE_DIR
+    with _lock:
+        if _session is not None:
+            raise RuntimeError("a profiling session is already running")
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{reason}"
+        profiler = SamplingProfiler(hz, duration_s=seconds or 600.0)
+        _session = _Session(profiler, name, root, seconds, turns)
+        profiler.on_done = _finish
+        profiler.start()
+    log_event("profile_start", profile=name, seconds=seconds, turns=turns, hz=hz)
+    return status()
+
+
+def _finish(profile: Profile) -> None:
+    global _session, _last
+    session = _session
+    if session is None:
+        return
+    try:
+        session.files = profile.write(session.name, session.root)
+    except Exception as e:
+        log_event("profile_failed", profile=session.name, error=repr(e))
+        return
+    finally:
+        # even when writing fails: the next session can start, waiters return
+        with _lock:
+            _session, _last = None, session
+        session.done.set()
+    log_event(
+        "profile_written",
+        profile=session.name,
+        samples=profile.samples,
+        seconds=round(profile.duration_s, 2),
+        turns=session.turns_seen,
+    )
+
+
+def turn_done() -> None:
+    """Called when a dialog turn finishes; ends a turn-bounded session."""
+    session = _session
+    if session is None:
+        return
+    session.turns_seen += 1
+    if session.turns is not None and session.turns_seen >= session.turns:
+        session.profiler.request_stop()
+
+
+def stop_profile(timeout: Optional[float] = None) -> Optional[List[str]]:
+    """End the running session now; returns the files written (last session's if none runs)."""
+    session = _session
+    if session is None:
+        return _last.files if _last is not None else None
+    session.profiler.request_stop()
+    session.done.wait(timeout)
+    return session.files
+
+
+def status() -> Dict[str, Any]:
+    session = _session
+    out: Dict[str, Any] = {"running": session is not None}
+    if session is not None:
+        out.update(
+            name=session.name,
+            seconds=session.seconds,
+            turns=session.turns,
+            turns_seen=session.turns_seen,
+            hz=1.0 / session.profiler.interval_s,
+        )
+    if _last is not None:
+        out["last"] = {"name": _last.name, "files": _last.files}
+    return out
+
+
+def start_from_spec(spec: str, reason: str = "manual") -> Optional[Dict[str, Any]]:
+    """Start a session from a spec such as 10s or 5turns ("" or "0": none)."""
+    spec = spec.strip()
+    if spec in ("", "0"):
+        return None
+    seconds, turns = parse_spec(spec)
+    return start_profile(seconds, turns, reason=reason)
+
+
+def start_from_env(var: str = "JEEVES_PROFILE") -> Optional[Dict[str, Any]]:
+    """Start a session if `var` is set (e.g. JEEVES_PROFILE=10s or =5turns)."""
+    return start_from_spec(os.environ.get(var, ""), reason="env")
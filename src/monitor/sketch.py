@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, Optional
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch-style) for latencies.
+
+    Values are counted in buckets whose bounds grow by a factor of
+    (1 + a) / (1 - a), so any quantile is reported within relative error
+    `a` of an actual value, in memory bounded by `max_buckets` however many
+    values are added. Sketches with the same accuracy merge by adding
+    bucket counts (rotated files, windows, processes).
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._per_log = 1.0 / math.log(self.gamma)  # bucket index = ceil(log(v) * this)
+        self.max_buckets = max_buckets
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0  # values <= 0, reported as 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value <= 0:
+            self.zeros += 1
+            return
+        buckets = self.buckets
+        i = math.ceil(math.log(value) * self._per_log)
+        buckets[i] = buckets.get(i, 0) + 1
+        if len(buckets) > self.max_buckets:
+            self._collapse()
+
+    def merge(self, other: QuantileSketch) -> None:
+        if other.gamma != self.gamma:
+            raise ValueError("sketches with different accuracy cannot be merged")
+        for i, n in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        # fold the two lowest buckets: only the smallest values lose accuracy
+        lo, nxt = sorted(self.buckets)[:2]
+        self.buckets[nxt] += self.buckets.pop(lo)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if seen > rank:
+                value = 2 * self.gamma**i / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": self.max if self.count else None,
+        }
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import builtins
+import contextlib
+import importlib.util
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# JEEVES_STARTUP_PROFILE=1: time every module import and startup phase,
+# and print the costliest when the first prompt is shown
+ENABLED = os.environ.get("JEEVES_STARTUP_PROFILE", "0") == "1"
+T0 = time.perf_counter()  # as early as the entry point imports this module
+
+_phases: List[Tuple[str, float]] = []
+_ready_ms: Optional[float] = None
+
+
+class ImportTimer:
+    """
+    Wraps builtins.__import__ and records, for each module loaded for the
+    first time, its own import time and the cumulative time including the
+    modules it imported (the numbers `python -X importtime` prints).
+    """
+
+    def __init__(self) -> None:
+        # module -> (self ms, cumulative ms)
+        self.rows: Dict[str, Tuple[float, float]] = {}
+        self._stack: List[float] = []  # child time per import in progress
+        self._orig = builtins.__import__
+
+    def install(self) -> ImportTimer:
+        builtins.__import__ = self
+        return self
+
+    def uninstall(self) -> None:
+        if builtins.__import__ is self:
+            builtins.__import__ = self._orig
+
+    def __call__(
+        self,
+        name: str,
+        globals: Any = None,
+        locals: Any = None,
+        fromlist: Any = (),
+        level: int = 0,
+    ) -> Any:
+        module = name
+        if level:
+            package = (globals or {}).get("__package__") or ""
+            try:
+                module = importlib.util.resolve_name("." * level + name, package)
+            except (ImportError, ValueError):
+                pass
+        if module in sys.modules:
+            return self._orig(name, globals, locals, fromlist, level)
+        t0 = time.perf_counter()
+        self._stack.append(0.0)
+        try:
+            return self._orig(name, globals, locals, fromlist, level)
+        finally:
+            cum = (time.perf_counter() - t0) * 1000.0
+            child = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += cum
+            self.rows[module] = (cum - child, cum)
+
+    def top(self, n: int = 15) -> List[Tuple[str, float, float]]:
+        """The `n` costliest imports by cumulative time: (module, self ms, cum ms)."""
+        rows = sorted(self.rows.items(), key=lambda kv: kv[1][1], reverse=True)
+        return [(m, s, c) for m, (s, c) in rows[:n]]
+
+
+IMPORTS: Optional[ImportTimer] = ImportTimer().install() if ENABLED else None
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time one startup initializer (catalog load, model warm-up, ...)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, (time.perf_counter() - t0) * 1000.0))
+
+
+def phases() -> List[Tuple[str, float]]:
+    return list(_phases)
+
+
+def ready(what: str = "first prompt") -> float:
+    """
+    Mark the app as ready for input; returns ms since T0. The first call
+    prints the startup report to stderr when profiling is on.
+    """
+    global _ready_ms
+    ms = (time.perf_counter() - T0) * 1000.0
+    if _ready_ms is None:
+        _ready_ms = ms
+        if ENABLED:
+            print(report(what), file=sys.stderr)
+            if IMPORTS is not None:
+                IMPORTS.uninstall()
+    return ms
+
+
+def report(what: str = "first prompt") -> str:
+    lines = [f"[startup] {what} after {(time.perf_counter() - T0) * 1000.0:.0f} ms"]
+    if IMPORTS is not None:
+        lines.append(f"[startup] {'import':<40} {'self ms':>9} {'cum ms':>9}")
+        for module, self_ms, cum_ms in IMPORTS.top():
+            lines.append(f"[startup] {module:<40} {self_ms:>9.1f} {cum_ms:>9.1f}")
+    for name, ms in _phases:
+        lines.append(f"[startup] {'init: ' + name:<40} {ms:>19.1f}")
+    return "\n".join(lines)
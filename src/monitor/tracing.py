@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, TypeVar
+
+# JEEVES_TRACE=1 turns tracing on at import; enable() at runtime
+ENABLED = os.environ.get("JEEVES_TRACE", "0") not in ("", "0")
+RING_SIZE = 4096  # finished spans kept; older ones drop off
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    trace_id: str
+    span_id: int
+    parent_id: Optional[int]
+    lane: str  # timeline row in the Chrome export
+    start_ns: int
+    end_ns: int = 0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+_RING: Deque[Span] = deque(maxlen=RING_SIZE)
+_CURRENT: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "jeeves_span", default=None
+)
+_ids = itertools.count(1)
+_NOOP = contextlib.nullcontext()
+
+
+def enable(on: bool = True) -> None:
+    global ENABLED
+    ENABLED = on
+
+
+def new_trace_id() -> str:
+    return f"{os.getpid():x}-{next(_ids):x}"
+
+
+def span(
+    name: str, trace_id: Optional[str] = None, lane: Optional[str] = None, **attrs: Any
+) -> contextlib.AbstractContextManager:
+    """
+    Time the enclosed block as a span. Nested spans (in this task, or in
+    threads started with asyncio.to_thread / anyio, which copy the context)
+    become its children and share its trace id; pass `trace_id` to attach
+    to a turn explicitly, `lane` to give it its own timeline row. A no-op
+    while tracing is disabled.
+    """
+    if not ENABLED:
+        return _NOOP
+    return _span(name, trace_id, lane, attrs)
+
+
+@contextlib.contextmanager
+def _span(
+    name: str, trace_id: Optional[str], lane: Optional[str], attrs: Dict[str, Any]
+) -> Iterator[Span]:
+    parent = _CURRENT.get()
+    if parent is not None and trace_id not in (None, parent.trace_id):
+        parent = None  # a different turn: start a new tree
+    s = Span(
+        name,
+        trace_id or (parent.trace_id if parent else new_trace_id()),
+        next(_ids),
+        parent.span_id if parent else None,
+        lane or (parent.lane if parent else threading.current_thread().name),
+        time.perf_counter_ns(),
+        attrs=attrs,
+    )
+    token = _CURRENT.set(s)
+    try:
+        yield s
+    finally:
+        s.end_ns = time.perf_counter_ns()
+        _CURRENT.reset(token)
+        _RING.append(s)
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator form of `span` (named after the function by default)."""
+
+    def wrap(fn: F) -> F:
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def inner(*args: Any, **kwargs: Any) -> Any:
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _span(label, None, None, {}):
+                return fn(*args, **kwargs)
+
+        return inner  # type: ignore[return-value]
+
+    return wrap
+
+
+def current_trace_id() -> Optional[str]:
+    s = _CURRENT.get()
+    return s.trace_id if s else None
+
+
+# --- Reading and exporting --------------------------------------------------
+def spans(trace_id: Optional[str] = None) -> List[Span]:
+    """Finished spans in the ring buffer, oldest first (one trace if given)."""
+    out = list(_RING)
+    if trace_id is not None:
+        out = [s for s in out if s.trace_id == trace_id]
+    return sorted(out, key=lambda s: s.start_ns)
+
+
+def breakdown(trace_id: str) -> Dict[str, float]:
+    """Total ms per span name within one trace."""
+    totals: Dict[str, float] = {}
+    for s in spans(trace_id):
+        totals[s.name] = totals.get(s.name, 0.0) + s.ms
+    return totals
+
+
+def clear() -> None:
+    _RING.clear()
+
+
+def chrome_trace(selected: Optional[List[Span]] = None) -> Dict[str, Any]:
+    """Trace Event Format, loadable in chrome://tracing and ui.perfetto.dev."""
+    selected = spans() if selected is None else selected
+    pid = os.getpid()
+    lanes: Dict[str, int] = {}
+    events: List[Dict[str, Any]] = []
+    for s in selected:
+        tid = lanes.setdefault(s.lane, len(lanes) + 1)
+        events.append(
+            {
+                "name": s.name,
+                "cat": "turn",
+                "ph": "X",
+                "ts": s.start_ns / 1000.0,
+                "dur": (s.end_ns - s.start_ns) / 1000.0,
+                "pid": pid,
+                "tid": tid,
+                "args": {"trace_id": s.trace_id, **s.attrs},
+            }
+        )
+    for lane, tid in lanes.items():
+        events.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": lane},
+            }
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome(path: str, selected: Optional[List[Span]] = None) -> int:
+    """Write `chrome_trace()` to `path`; returns the number of spans written."""
+    trace = chrome_trace(selected)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(trace, f)
+    return sum(1 for e in trace["traceEvents"] if e["ph"] == "X")
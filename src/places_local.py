@@ -1,5 +1,31 @@
-import pandas as pd
+from __future__ import annotations
+
+import functools
 import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data.catalog import derived
+from src.data.loader import compact_dtypes
+from src.reco.views import TopKViews, record
+
+
+# scikit-learn is optional; without it we fall back to brute-force haversine.
+# It is imported when the first geo index is built, not with this module:
+# importing sklearn.neighbors takes most of a second.
+@functools.lru_cache(maxsize=None)
+def _ball_tree_class() -> Any:
+    try:
+        from sklearn.neighbors import BallTree
+    except Exception:
+        return None
+    return BallTree
+
+
+EARTH_RADIUS_KM = 6371.0088
 
 
 def _ascii_lower(s: str) -> str:
@@ -16,7 +42,7 @@ def _ascii_lower(s: str) -> str:
 
 
 def _select_columns(df: pd.DataFrame) -> pd.DataFrame:
-    return df[
+    out = df[
         [
             "Restaurant Name",
             "City",
@@ -35,29 +61,326 @@ def _select_columns(df: pd.DataFrame) -> pd.DataFrame:
             "Address": "address",
         }
     )
+    if out["rating"].dtype == np.float32:
+        # compact catalogs store ratings as float32; report them as written
+        out["rating"] = out["rating"].astype(float).round(1)
+    return out
+
+
+# Columns the search/index code actually reads (compact mode loads only these)
+ZOMATO_COLUMNS = [
+    "Restaurant ID",
+    "Restaurant Name",
+    "City",
+    "Address",
+    "Longitude",
+    "Latitude",
+    "Cuisines",
+    "Average Cost for two",
+    "Currency",
+    "Aggregate rating",
+    "Votes",
+]
+
+# Load once globally, per (path, compact)
+_DF_CACHE: Dict[Tuple[str, bool], pd.DataFrame] = {}
+
+
+def _normalized(values: pd.Series) -> pd.Series:
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # maps the categories only, not every row
+        return values.map(_ascii_lower).astype("category")
+    return values.apply(_ascii_lower)
+
+
+def load_df(path: str = "data/zomato.csv", compact: bool = False) -> pd.DataFrame:
+    """
+    Load the zomato catalog once. `compact=True` reads only ZOMATO_COLUMNS
+    with narrow dtypes (category text, float32/int32 numbers); see
+    `src.data.loader.memory_report` for the per-column footprint.
+    """
+    key = (path, compact)
+    if key not in _DF_CACHE:
+        if compact:
+            df = pd.read_csv(
+                path,
+                encoding="ISO-8859-1",
+                usecols=ZOMATO_COLUMNS,
+                dtype={
+                    "City": "category",
+                    "Cuisines": "category",
+                    "Currency": "category",
+                },
+            )
+            compact_dtypes(
+                df,
+                float32=["Aggregate rating", "Latitude", "Longitude"],
+                int32=["Restaurant ID", "Average Cost for two", "Votes"],
+            )
+        else:
+            df = pd.read_csv(path, encoding="ISO-8859-1")
+        df["cuis_norm"] = _normalized(df["Cuisines"])
+        df["city_norm"] = _normalized(df["City"])
+        # build the spatial index and top-k views once, at load
+        geo_index(df)
+        places_views(df)
+        _DF_CACHE[key] = df
+    return _DF_CACHE[key]
+
+
+# --- Spatial index ------------------------------------------------------------
+def _coord_columns(df: pd.DataFrame) -> Optional[Tuple[str, str]]:
+    for lat, lng in (("Latitude", "Longitude"), ("lat", "lng")):
+        if lat in df.columns and lng in df.columns:
+            return lat, lng
+    return None
+
+
+class _BruteForceTree:
+    """Minimal BallTree stand-in (haversine metric) when scikit-learn is missing."""
+
+    def __init__(self, points: np.ndarray):
+        self._pts = points
+
+    def _dist(self, q: np.ndarray) -> np.ndarray:
+        lat1, lng1 = q[:, :1], q[:, 1:2]
+        lat2, lng2 = self._pts[:, 0], self._pts[:, 1]
+        a = (
+            np.sin((lat2 - lat1) / 2) ** 2
+            + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        )
+        return 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    def query(self, q: np.ndarray, k: int):
+        d = self._dist(q)
+        order = np.argsort(d, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(d, order, axis=1), order
+
+    def query_radius(
+        self, q: np.ndarray, r: float, return_distance=False, sort_results=False
+    ):
+        d = self._dist(q)
+        ind, dist = [], []
+        for row in d:
+            hits = np.flatnonzero(row <= r)
+            if sort_results:
+                hits = hits[np.argsort(row[hits], kind="stable")]
+            ind.append(hits)
+            dist.append(row[hits])
+        return (ind, dist) if return_distance else ind
+
+
+def _make_tree(points_deg: np.ndarray):
+    pts = np.radians(points_deg)
+    BallTree = _ball_tree_class()
+    if BallTree is not None:
+        return BallTree(pts, metric="haversine")
+    return _BruteForceTree(pts)
+
+
+@dataclass
+class GeoIndex:
+    """
+    Haversine BallTree over restaurant coordinates plus one over per-city
+    centroids. Rows with missing or (0, 0) coordinates are left out.
+    """
+
+    cities: List[str] = field(default_factory=list)  # display names
+    city_cuisines: List[str] = field(default_factory=list)  # joined cuis_norm
+    city_pos: Dict[str, int] = field(default_factory=dict)
+    centroids: np.ndarray = field(default_factory=lambda: np.empty((0, 2)))
+    city_tree: Any = None
+    row_positions: np.ndarray = field(default_factory=lambda: np.empty(0, int))
+    row_tree: Any = None
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "GeoIndex":
+        idx = cls()
+        cols = _coord_columns(df)
+        if cols is None or df.empty:
+            return idx
+        lat = pd.to_numeric(df[cols[0]], errors="coerce").to_numpy(float)
+        lng = pd.to_numeric(df[cols[1]], errors="coerce").to_numpy(float)
+        valid = ~(np.isnan(lat) | np.isnan(lng)) & ~((lat == 0) & (lng == 0))
+
+        idx.row_positions = np.flatnonzero(valid)
+        if idx.row_positions.size:
+            idx.row_tree = _make_tree(np.column_stack([lat[valid], lng[valid]]))
+
+        if "city_norm" not in df.columns:
+            return idx
+        name_col = "City" if "City" in df.columns else "city"
+        geo = pd.DataFrame(
+            {
+                "norm": df["city_norm"].astype(str).to_numpy(),
+                "name": df[name_col].astype(str).to_numpy(),
+                "lat": lat,
+                "lng": lng,
+                "cuis": (
+                    df["cuis_norm"].astype(str).to_numpy()
+                    if "cuis_norm" in df.columns
+                    else ""
+                ),
+            }
+        )[valid]
+        if geo.empty:
+            return idx
+
+        # median is robust against the odd mis-geocoded row in a city
+        grouped = geo.groupby("norm", sort=True)
+        centroids = grouped[["lat", "lng"]].median()
+        names = grouped["name"].first()
+        cuisines = grouped["cuis"].unique()
+        idx.cities = [str(names[c]) for c in centroids.index]
+        idx.city_cuisines = [" | ".join(cuisines[c]) for c in centroids.index]
+        idx.city_pos = {str(c): i for i, c in enumerate(centroids.index)}
+        idx.centroids = centroids.to_numpy(float)
+        idx.city_tree = _make_tree(idx.centroids)
+        return idx
+
+    def nearest_city_with(self, city_norm: str, cuisine_norm: str) -> Optional[str]:
+        """
+        Nearest other city (by centroid) whose restaurants serve `cuisine_norm`.
+        Probes k = 2, 4, 8, ... neighbours, so the common case stays logarithmic.
+        """
+        pos = self.city_pos.get(city_norm)
+        if pos is None or self.city_tree is None:
+            return None
+        n = len(self.cities)
+        q = np.radians(self.centroids[pos : pos + 1])
+        k, seen = 2, 0
+        while seen < n:
+            k = min(k, n)
+            _, ind = self.city_tree.query(q, k=k)
+            for j in ind[0][seen:]:
+                if j != pos and cuisine_norm in self.city_cuisines[j]:
+                    return self.cities[j]
+            seen = k
+            k *= 2
+        return None
+
+    def within_radius(self, lat: float, lng: float, radius_km: float) -> np.ndarray:
+        """Row positions (iloc) within `radius_km` of (lat, lng), nearest first."""
+        if self.row_tree is None:
+            return np.empty(0, int)
+        ind, _ = self.row_tree.query_radius(
+            np.radians([[lat, lng]]),
+            r=radius_km / EARTH_RADIUS_KM,
+            return_distance=True,
+            sort_results=True,
+        )
+        return self.row_positions[np.asarray(ind[0], dtype=int)]
+
+
+def geo_index(df: pd.DataFrame) -> GeoIndex:
+    """Spatial index for `df`, built once per catalog version."""
+    return derived(df, "geo_index", GeoIndex.build)
+
+
+# --- Materialized top-k views ------------------------------------------------
+PLACES_VIEW_DEPTH = 50
+
+
+def _cuisine_tokens(cuis_norm: object) -> List[str]:
+    return [t.strip() for t in str(cuis_norm or "").split(",") if t.strip()]
 
 
-# Load once globally
-_DF_CACHE = None
+class PlacesViews:
+    """
+    Top-k rows per cuisine token and per (city, cuisine token), ordered by
+    rating, then votes. Serves the substring matching of
+    `search_restaurants_local` by merging the views of every matching key.
+    """
+
+    def __init__(self, df: pd.DataFrame, depth: int = PLACES_VIEW_DEPTH):
+        pos: List[int] = []
+        keys: List[Tuple[str, ...]] = []
+        for i, (city, cuis) in enumerate(zip(df["city_norm"], df["cuis_norm"])):
+            for tok in _cuisine_tokens(cuis):
+                pos.append(i)
+                keys.append(("c", tok))
+                pos.append(i)
+                keys.append(("cc", str(city), tok))
+        self.views = TopKViews(
+            (np.asarray(pos), keys), *self._sort_arrays(df), depth=depth
+        )
+        self._refresh_vocab()
+
+    @staticmethod
+    def _sort_arrays(df: pd.DataFrame) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        rating = pd.to_numeric(df["Aggregate rating"], errors="coerce").to_numpy(float)
+        votes = (
+            pd.to_numeric(df["Votes"], errors="coerce").to_numpy(float)
+            if "Votes" in df.columns
+            else None
+        )
+        return rating, votes
+
+    def _refresh_vocab(self) -> None:
+        keys = [k for k in self.views.postings if isinstance(k, tuple)]
+        self.tokens = sorted({k[1] for k in keys if k[0] == "c"})
+        self.cities = sorted({k[1] for k in keys if k[0] == "cc"})
+
+    def top(
+        self, cuisine: str, city: Optional[str], limit: int
+    ) -> Optional[np.ndarray]:
+        """Row positions (iloc) for the query, or None if views can't answer it."""
+        if not cuisine or "," in cuisine or (city is not None and not city):
+            return None
+        toks = [t for t in self.tokens if cuisine in t]
+        if city is None:
+            keys: List[Tuple[str, ...]] = [("c", t) for t in toks]
+        else:
+            cities = [c for c in self.cities if city in c]
+            keys = [("cc", c, t) for c in cities for t in toks]
+        return self.views.merged_top(keys, limit)
+
+    def refresh_rows(self, df: pd.DataFrame, positions: List[int]) -> bool:
+        sub = df.iloc[list(positions)]
+        row_keys = [
+            [("c", t) for t in _cuisine_tokens(cu)]
+            + [("cc", str(ci), t) for t in _cuisine_tokens(cu)]
+            for ci, cu in zip(sub["city_norm"], sub["cuis_norm"])
+        ]
+        self.views.refresh(positions, row_keys, *self._sort_arrays(df))
+        self._refresh_vocab()
+        return True
 
 
-def load_df(path: str = "data/zomato.csv") -> pd.DataFrame:
-    global _DF_CACHE
-    if _DF_CACHE is None:
-        _DF_CACHE = pd.read_csv(path, encoding="ISO-8859-1")
-        _DF_CACHE["cuis_norm"] = _DF_CACHE["Cuisines"].apply(_ascii_lower)
-        _DF_CACHE["city_norm"] = _DF_CACHE["City"].apply(_ascii_lower)
-    return _DF_CACHE
+def places_views(df: pd.DataFrame) -> PlacesViews:
+    """Top-k views for `df`, built once per catalog version."""
+    return derived(df, "places_views", PlacesViews)
+
+
+def _rank_rows(df: pd.DataFrame, mask: pd.Series, limit: int) -> pd.DataFrame:
+    """Matching rows ordered like the views (rating, votes, position)."""
+    pos = np.flatnonzero(mask.to_numpy(dtype=bool))
+    rating, votes = PlacesViews._sort_arrays(df)
+    keys = [pos, -np.nan_to_num(rating[pos], nan=-np.inf)]
+    if votes is not None:
+        keys.insert(1, -np.nan_to_num(votes[pos], nan=-np.inf))
+    return df.iloc[pos[np.lexsort(keys)][:limit]]
+
+
+def _top_rows(
+    df: pd.DataFrame, cuisine: str, city: Optional[str], limit: int
+) -> pd.DataFrame:
+    """Best `limit` rows whose cuisine (and city) contain the normalized query."""
+    pos = places_views(df).top(cuisine, city, limit)
+    record("places", pos is not None)
+    if pos is not None:
+        return df.iloc[pos]
+    mask = df["cuis_norm"].str.contains(cuisine, na=False)
+    if city is not None:
+        mask &= df["city_norm"].str.contains(city, na=False)
+    return _rank_rows(df, mask, limit)
 
 
 def search_restaurants_local(df: pd.DataFrame, cuisine: str, city: str, limit: int = 5):
-    """Return restaurants matching cuisine and city."""
-    c = _ascii_lower(cuisine)
-    ci = _ascii_lower(city)
-    mask = df["cuis_norm"].str.contains(c, na=False) & df["city_norm"].str.contains(
-        ci, na=False
+    """Return the top-rated restaurants matching cuisine and city."""
+    res = _select_columns(
+        _top_rows(df, _ascii_lower(cuisine), _ascii_lower(city), limit)
     )
-    res = _select_columns(df.loc[mask]).head(limit)
     return res.to_dict(orient="records")
 
 
@@ -80,15 +403,39 @@ def search_with_fallback(df: pd.DataFrame, cuisine: str, city: str, limit: int =
     if primary:
         return {"results": primary, "fallback": None}
 
-    # 2) try cuisine anywhere
-    any_cuisine = _select_columns(
-        df[df["cuis_norm"].str.contains(cuisine, na=False)]
-    ).head(limit)
+    # 2) nearest city (by centroid) that actually serves the cuisine
+    near = geo_index(df).nearest_city_with(city, cuisine)
+    if near:
+        nearby = search_restaurants_local(df, cuisine, near, limit)
+        if nearby:
+            return {
+                "results": nearby,
+                "fallback": {"type": "nearest_city", "city": near},
+            }
+
+    # 3) try cuisine anywhere
+    any_cuisine = _select_columns(_top_rows(df, cuisine, None, limit))
     if any_cuisine.shape[0] > 0:
         return {
             "results": any_cuisine.to_dict(orient="records"),
             "fallback": {"type": "global_cuisine"},
         }
 
-    # 3) no matches at all
+    # 4) no matches at all
     return {"results": [], "fallback": None}
+
+
+def search_near(
+    df: pd.DataFrame,
+    lat: float,
+    lng: float,
+    radius_km: float = 2.0,
+    cuisine: Optional[str] = None,
+    limit: int = 5,
+):
+    """Restaurants within `radius_km` of a point ("near me"), nearest first."""
+    pos = geo_index(df).within_radius(lat, lng, radius_km)
+    hits = df.iloc[pos]
+    if cuisine:
+        hits = hits[hits["cuis_norm"].str.contains(_ascii_lower(cuisine), na=False)]
+    return _select_columns(hits).head(limit).to_dict(orient="records")
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from ..models.preferences import UserPreferences
+from .engine import hard_flags, pref_key
+
+# (row positions, scores) as returned by the views / engine
+Ranked = Tuple[np.ndarray, np.ndarray]
+
+RESULT_CACHE_SIZE = 512
+RESULT_CACHE_TTL_S = 600.0
+
+
+def ranking_key(prefs: UserPreferences, top_k: int) -> Tuple[Hashable, ...]:
+    """
+    Canonical key of everything `filter_and_rank` depends on: normalized
+    cuisine/city, which accessibility needs are hard filters, and top_k.
+    "Italian " and "italian" share an entry; unset and False needs do too.
+    """
+    return (pref_key(prefs.cuisine), pref_key(prefs.city), hard_flags(prefs), top_k)
+
+
+class ResultCache:
+    """
+    Bounded LRU cache with a time-to-live for ranking results.
+
+    Entries hold only row positions and scores, keyed by the catalog version
+    plus `ranking_key`, so a reloaded or edited catalog never serves stale
+    rows: its version changes and the old entries age out.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = RESULT_CACHE_SIZE,
+        ttl_s: float = RESULT_CACHE_TTL_S,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Ranked]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expired = 0
+
+    def get(self, key: Hashable) -> Optional[Ranked]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self._clock() - entry[0] > self.ttl_s:
+                del self._data[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Ranked) -> None:
+        with self._lock:
+            self._data[key] = (self._clock(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "size": len(self._data),
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
+
+
+# process-wide cache in front of `filter_and_rank`
+RESULT_CACHE = ResultCache()
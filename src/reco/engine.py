@@ -0,0 +1,418 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..data.catalog import derived
+from ..models.preferences import UserPreferences
+
+ACCESS_COLS: Tuple[str, ...] = (
+    "access_wheelchair",
+    "access_step_free",
+    "access_restroom",
+)
+# soft boost per accessibility flag when the user did not make it a hard filter
+ACCESS_BOOSTS: Tuple[float, ...] = (0.03, 0.02, 0.02)
+CUISINE_BOOST = 0.08
+CITY_BOOST = 0.05
+# weights used when hard filters leave nothing and we re-score the whole catalog
+FALLBACK_CUISINE_BOOST = 0.06
+FALLBACK_CITY_BOOST = 0.04
+
+# scores built in different association orders agree to well within this
+TIE_EPS = 1e-9
+
+NO_VALUE = -1  # code of rows whose city/cuisine is missing
+UNKNOWN = -2  # code of a preference value no row has
+
+HardFlags = Tuple[bool, bool, bool]
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def hard_flags(prefs: UserPreferences) -> HardFlags:
+    """Accessibility needs that are hard filters (explicit True)."""
+    acc = getattr(prefs, "accessibility", None)
+    return (
+        bool(acc and getattr(acc, "wheelchair", None) is True),
+        bool(acc and getattr(acc, "step_free", None) is True),
+        bool(acc and getattr(acc, "restroom", None) is True),
+    )
+
+
+def pref_key(value: Optional[str]) -> Optional[str]:
+    """Lower-cased preference value, or None when unset (no boost applies)."""
+    return str(value).strip().lower() if value else None
+
+
+def _flag(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    # works for object columns (True/False/None) and nullable "boolean" alike
+    return df[col].eq(True).to_numpy(dtype=bool, na_value=False)
+
+
+def _lower(df: pd.DataFrame, col: str) -> pd.Series:
+    """Lower-cased column values; None where the value is not a string."""
+    low = df[col].str.lower()
+    return low.where(low.notna(), None)
+
+
+def _norm(values: pd.Series, lo: float, hi: float) -> pd.Series:
+    return (values - lo) / (hi - lo + 1e-9)
+
+
+class RankingEngine:
+    """
+    Column arrays behind `filter_and_rank`, computed once per catalog version:
+    normalized rating/popularity scores, accessibility flags and integer codes
+    for lower-cased city/cuisine. Ranking is boolean masks plus vectorized
+    arithmetic on these arrays and an `argpartition` top-k; the DataFrame is
+    only touched to materialize the k result rows.
+
+    Scores are built with the same operations, in the same order, as the
+    original pandas implementation, so they agree bit for bit.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.n = len(df)
+        self.stale = False
+        self.generation = 0  # bumped by every in-place refresh
+        self._range = self._minmax(df)
+
+        base, fallback = self._scores(df)
+        self.base = base
+        self.fallback = fallback
+        self.flags = np.vstack([_flag(df, c) for c in ACCESS_COLS])  # (3, n)
+        self.city, self.city_vocab = self._factorize(_lower(df, "city"))
+        self.cuisine, self.cuisine_vocab = self._factorize(_lower(df, "cuisine"))
+        self._soft_terms()
+        # built lazily; dropped whenever rows change
+        self._shared: Dict[HardFlags, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._groups: Dict[Tuple[HardFlags, str, int], np.ndarray] = {}
+        self._code_rows: Dict[str, Dict[int, np.ndarray]] = {}
+
+    # --- build helpers ----------------------------------------------------------
+    @staticmethod
+    def _minmax(df: pd.DataFrame) -> Tuple[float, ...]:
+        out = [float(df["rating"].min()), float(df["rating"].max())]
+        if "rating_count" in df.columns:
+            out += [float(df["rating_count"].min()), float(df["rating_count"].max())]
+        return tuple(out)
+
+    def _scores(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """(base, fallback base) for the rows of `df`, using the catalog range."""
+        rating_norm = _norm(df["rating"], self._range[0], self._range[1])
+        if "rating_count" in df.columns:
+            pop = _norm(df["rating_count"], self._range[2], self._range[3])
+            fallback = 0.80 * rating_norm
+            fallback += 0.10 * pop
+        else:
+            pop = 0.0
+            fallback = 0.80 * rating_norm
+        return (0.70 * rating_norm + 0.10 * pop).to_numpy(), fallback.to_numpy()
+
+    @staticmethod
+    def _factorize(values: pd.Series) -> Tuple[np.ndarray, Dict[str, int]]:
+        codes, uniques = pd.factorize(values)  # missing -> -1 == NO_VALUE
+        return codes.astype(np.int32), {str(u): i for i, u in enumerate(uniques)}
+
+    @staticmethod
+    def _encode(values: pd.Series, vocab: Dict[str, int]) -> np.ndarray:
+        codes = np.full(len(values), NO_VALUE, dtype=np.int32)
+        for i, v in enumerate(values.to_numpy(dtype=object)):
+            if v is not None:
+                codes[i] = vocab.setdefault(v, len(vocab))
+        return codes
+
+    def _soft_terms(self) -> None:
+        # per-flag soft boost columns, and their sum for the no-hard-filter case
+        self.soft = [
+            self.flags[j].astype(float) * w for j, w in enumerate(ACCESS_BOOSTS)
+        ]
+        total = np.zeros(self.n)
+        for term in self.soft:
+            total = total + term
+        self.soft_all = total
+
+    # --- lookups ------------------------------------------------------------------
+    def city_code(self, city: Optional[str]) -> int:
+        return self.city_vocab.get(city, UNKNOWN) if city is not None else NO_VALUE
+
+    def cuisine_code(self, cuisine: Optional[str]) -> int:
+        if cuisine is None:
+            return NO_VALUE
+        return self.cuisine_vocab.get(cuisine, UNKNOWN)
+
+    def city_names(self) -> np.ndarray:
+        """Lower-cased city per row (None where missing)."""
+        return _decode(self.city, self.city_vocab)
+
+    def cuisine_names(self) -> np.ndarray:
+        return _decode(self.cuisine, self.cuisine_vocab)
+
+    def mask(self, hard: HardFlags) -> Optional[np.ndarray]:
+        """Rows passing the hard accessibility filters (None = all rows)."""
+        mask: Optional[np.ndarray] = None
+        for j, on in enumerate(hard):
+            if on:
+                mask = self.flags[j] if mask is None else mask & self.flags[j]
+        return mask
+
+    def boosts(
+        self,
+        pos: Optional[np.ndarray],
+        hard: HardFlags,
+        cuisine: Optional[str],
+        city: Optional[str],
+    ) -> np.ndarray:
+        """Soft boosts for rows `pos` (None = all rows), in the reference order."""
+        if not any(hard):
+            boosts = self.soft_all if pos is None else self.soft_all[pos]
+        else:
+            boosts = np.zeros(self.n if pos is None else len(pos))
+            for j, term in enumerate(self.soft):
+                if not hard[j]:
+                    boosts = boosts + (term if pos is None else term[pos])
+        if cuisine is not None:
+            codes = self.cuisine if pos is None else self.cuisine[pos]
+            boosts = boosts + (codes == self.cuisine_code(cuisine)) * CUISINE_BOOST
+        if city is not None:
+            codes = self.city if pos is None else self.city[pos]
+            boosts = boosts + (codes == self.city_code(city)) * CITY_BOOST
+        return boosts
+
+    # --- ranking ------------------------------------------------------------------
+    def rank(self, prefs: UserPreferences, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(row positions, scores) of the best `top_k` rows for `prefs`."""
+        hard = hard_flags(prefs)
+        cuisine, city = pref_key(prefs.cuisine), pref_key(prefs.city)
+        mask = self.mask(hard)
+        pos = None if mask is None else np.flatnonzero(mask)
+        if pos is not None and pos.size == 0:
+            return self.rank_fallback(cuisine, city, top_k)
+        base = self.base if pos is None else self.base[pos]
+        scores = base + self.boosts(pos, hard, cuisine, city)
+        sel = top_k_order(scores, top_k)
+        return (sel if pos is None else pos[sel]), scores[sel]
+
+    def rank_fallback(
+        self, cuisine: Optional[str], city: Optional[str], top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Whole-catalog re-score used when hard filters leave no rows."""
+        scores = self.fallback
+        dt = scores.dtype.type
+        if cuisine is not None:
+            hit = self.cuisine == self.cuisine_code(cuisine)
+            scores = scores + hit.astype(scores.dtype) * dt(FALLBACK_CUISINE_BOOST)
+        if city is not None:
+            hit = self.city == self.city_code(city)
+            scores = scores + hit.astype(scores.dtype) * dt(FALLBACK_CITY_BOOST)
+        sel = top_k_order(scores, top_k)
+        return sel, scores[sel]
+
+    def rank_many(
+        self, prefs_list: Sequence[UserPreferences], top_k: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        `rank` for several profiles at once (same results, bit for bit).
+        Profiles are encoded as (hard flags, cuisine, city) and share work
+        through `rank_shared`: one sorted pass per hard-filter signature.
+        """
+        return [
+            self.rank_shared(
+                hard_flags(p), pref_key(p.cuisine), pref_key(p.city), top_k
+            )
+            for p in prefs_list
+        ]
+
+    def rank_shared(
+        self,
+        hard: HardFlags,
+        cuisine: Optional[str],
+        city: Optional[str],
+        top_k: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        `rank` for an encoded profile, using per-signature work shared with
+        other profiles and turns. The unboosted score of every row is sorted
+        once per hard-filter signature. Within each boost class (no match,
+        cuisine, city, both) the final ranking follows that order up to
+        rounding, so only the first `top_k` rows of each class, plus
+        near-ties, are re-scored exactly.
+        """
+        order, shared, _ = self._shared_order(hard)
+        if order.size == 0:
+            return self.rank_fallback(cuisine, city, top_k)
+        # UNKNOWN (no preference) matches no row, unlike NO_VALUE
+        cu = self.cuisine_code(cuisine) if cuisine is not None else UNKNOWN
+        ci = self.city_code(city) if city is not None else UNKNOWN
+        by_cuisine = self._group_order(hard, "cuisine", cu)
+        by_city = self._group_order(hard, "city", ci)
+        in_city = self.city[by_cuisine] == ci
+        other = order[: top_k + len(by_cuisine) + len(by_city)]
+        other = other[(self.cuisine[other] != cu) & (self.city[other] != ci)]
+        classes = [
+            other,
+            by_cuisine[~in_city],
+            by_cuisine[in_city],
+            by_city[self.cuisine[by_city] != cu],
+        ]
+        pos = np.sort(np.concatenate([_head(c, shared, top_k) for c in classes]))
+        scores = self.base[pos] + self.boosts(pos, hard, cuisine, city)
+        sel = top_k_order(scores, top_k)
+        return pos[sel], scores[sel]
+
+    def _shared_order(
+        self, hard: HardFlags
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (rows passing `hard` best first, unboosted score per row, rank per
+        row with -1 for rows failing `hard`), built once per signature.
+        """
+        if hard not in self._shared:
+            scores = self.base + self.boosts(None, hard, None, None)
+            mask = self.mask(hard)
+            parents = [
+                order
+                for sig, (order, _, _) in self._shared.items()
+                if all(h or not p for p, h in zip(sig, hard))
+            ]
+            if parents and mask is not None:
+                # narrowing a cached signature: its order, filtered by the
+                # new mask, is nearly sorted already (cheap for timsort)
+                parent = min(parents, key=len)
+                pos = parent[mask[parent]]
+            else:
+                pos = np.arange(self.n) if mask is None else np.flatnonzero(mask)
+            key = -scores[pos]
+            key = np.where(np.isnan(key), np.inf, key)
+            by_key = np.argsort(key, kind="stable")
+            pos, key = pos[by_key], key[by_key]
+            if np.any((key[1:] == key[:-1]) & (pos[1:] < pos[:-1])):
+                pos = pos[np.lexsort((pos, key))]  # ties must keep index order
+            rank = np.full(self.n, -1, dtype=np.int64)
+            rank[pos] = np.arange(len(pos))
+            self._shared[hard] = (pos, scores, rank)
+        return self._shared[hard]
+
+    def _group_order(self, hard: HardFlags, column: str, code: int) -> np.ndarray:
+        """Rows with `column` == `code` passing `hard`, in shared order."""
+        key = (hard, column, code)
+        if key not in self._groups:
+            rank = self._shared_order(hard)[2]
+            rows = self._postings(column).get(code, _EMPTY)
+            rows = rows[rank[rows] >= 0]
+            self._groups[key] = rows[np.argsort(rank[rows])]
+        return self._groups[key]
+
+    def _postings(self, column: str) -> Dict[int, np.ndarray]:
+        if column not in self._code_rows:
+            codes = getattr(self, column)
+            order = np.argsort(codes, kind="stable")
+            starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+            self._code_rows[column] = {
+                int(c): rows
+                for c, rows in zip(codes[order][starts], np.split(order, starts[1:]))
+            }
+        return self._code_rows[column]
+
+    # --- incremental refresh --------------------------------------------------------
+    def refresh_rows(self, df: pd.DataFrame, positions: Sequence[int]) -> bool:
+        # a new rating/popularity range rescales every score: rebuild instead
+        if len(df) < self.n or self._minmax(df) != self._range:
+            self.stale = True
+            return False
+        pos = np.asarray(list(positions), dtype=np.int64)
+        if len(df) > self.n:
+            grow = len(df) - self.n
+            self.base = np.concatenate([self.base, np.zeros(grow, self.base.dtype)])
+            self.fallback = np.concatenate(
+                [self.fallback, np.zeros(grow, self.fallback.dtype)]
+            )
+            self.flags = np.hstack([self.flags, np.zeros((3, grow), dtype=bool)])
+            self.city = np.concatenate([self.city, np.full(grow, NO_VALUE, np.int32)])
+            self.cuisine = np.concatenate(
+                [self.cuisine, np.full(grow, NO_VALUE, np.int32)]
+            )
+            self.n = len(df)
+        sub = df.iloc[pos]
+        self.base[pos], self.fallback[pos] = self._scores(sub)
+        for j, col in enumerate(ACCESS_COLS):
+            self.flags[j, pos] = _flag(sub, col)
+        self.city[pos] = self._encode(_lower(sub, "city"), self.city_vocab)
+        self.cuisine[pos] = self._encode(_lower(sub, "cuisine"), self.cuisine_vocab)
+        self._soft_terms()
+        self._shared.clear()
+        self._groups.clear()
+        self._code_rows.clear()
+        self.generation += 1
+        return True
+
+
+def _head(rows: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    First `k` of `rows` (sorted by `scores`, desc, NaN last) plus the rows
+    within TIE_EPS of the k-th: a constant boost can reorder those by rounding.
+    """
+    if len(rows) <= k:
+        return rows
+    ranked = scores[rows]
+    kth = ranked[k - 1]
+    if np.isnan(kth):
+        return rows[:k]  # NaN rows tie and keep index order
+    return rows[: k + np.count_nonzero(ranked[k:] >= kth - TIE_EPS)]
+
+
+def _decode(codes: np.ndarray, vocab: Dict[str, int]) -> np.ndarray:
+    names = np.empty(len(vocab) + 1, dtype=object)  # last slot: NO_VALUE
+    names[: len(vocab)] = list(vocab)  # dicts keep code (insertion) order
+    return names[codes]
+
+
+def top_k_order(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the `k` highest scores, best first; ties keep index order and
+    NaN sorts last, like a stable descending sort_values. Uses argpartition,
+    so the cost is O(n + k log k) rather than a full sort.
+    """
+    key = -scores
+    if np.issubdtype(key.dtype, np.floating):
+        key = np.where(np.isnan(key), np.inf, key)
+    return _top_k_keys(key, k)
+
+
+def _top_k_keys(key: np.ndarray, k: int) -> np.ndarray:
+    """`top_k_order` on ascending sort keys; rows whose key is NaN are excluded."""
+    if k <= 0 or len(key) == 0:
+        return np.empty(0, dtype=np.int64)
+    valid = ~np.isnan(key) if np.issubdtype(key.dtype, np.floating) else None
+    n_valid = len(key) if valid is None else int(valid.sum())
+    if k < n_valid:
+        part = np.argpartition(key, k - 1)[:k]
+        kth = key[part].max()
+        # argpartition breaks boundary ties arbitrarily: take them in index order
+        better = np.flatnonzero(key < kth)
+        ties = np.flatnonzero(key == kth)[: k - len(better)]
+        sel = np.concatenate([better, ties])
+    elif valid is None or n_valid == len(key):
+        sel = np.arange(len(key))
+    else:
+        sel = np.flatnonzero(valid)
+    return sel[np.lexsort((sel, key[sel]))]
+
+
+def ranking_engine(df: pd.DataFrame) -> RankingEngine:
+    """Scoring arrays for `df`, built once per catalog version."""
+    return derived(df, "ranking_engine", RankingEngine)
+
+
+def positions_to_frame(
+    df: pd.DataFrame, pos: np.ndarray, scores: np.ndarray, cols: List[str]
+) -> pd.DataFrame:
+    """Materialize result rows (only these are copied) with a score column."""
+    out = df.iloc[pos][[c for c in cols if c in df.columns and c != "score"]].copy()
+    out["score"] = np.array(scores)  # own copy: `scores` may be cached
+    return out
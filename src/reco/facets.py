@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from functools import reduce
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..data.catalog import derived
+from .engine import HardFlags, RankingEngine, ranking_engine
+
+# accessibility constraints, in ACCESS_COLS order (AccessibilityNeeds fields)
+ACCESS_FACETS: Tuple[str, ...] = ("wheelchair", "step_free", "restroom")
+# single-constraint relaxations, cheapest first: another cuisine is the
+# smallest compromise, giving up wheelchair access the largest
+RELAXATIONS: Tuple[str, ...] = (
+    "cuisine",
+    "restroom",
+    "step_free",
+    "city",
+    "wheelchair",
+)
+
+
+def popcount(bits: np.ndarray) -> int:
+    """Number of set bits in a packed uint8 bitset."""
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return int(np.bitwise_count(bits).sum())
+    # unpacking to one byte per bit beats a lookup table on NumPy 1.x
+    return int(np.count_nonzero(np.unpackbits(bits)))
+
+
+class FacetIndex:
+    """
+    Packed bitsets (np.packbits, one bit per row) for every accessibility
+    flag and, built on first use, every city and cuisine code of a
+    `RankingEngine`. Counting the rows that satisfy a set of constraints is
+    a few ANDs over n/8 bytes and a popcount, so every single-constraint
+    relaxation can be counted on each turn (~0.2 ms for 100k rows).
+    """
+
+    def __init__(self, engine: RankingEngine):
+        self.engine = engine
+        self._pack()
+
+    def _pack(self) -> None:
+        self.n = self.engine.n
+        self.flags = np.packbits(self.engine.flags, axis=1)  # (3, ceil(n/8))
+        self.all = np.packbits(np.ones(self.n, dtype=bool))  # padding bits stay 0
+        self._bits: Dict[Tuple[str, int], np.ndarray] = {}
+
+    def bits(self, column: str, code: int) -> np.ndarray:
+        """Bitset of the rows whose `column` ("city"/"cuisine") code is `code`."""
+        key = (column, code)
+        if key not in self._bits:
+            self._bits[key] = np.packbits(getattr(self.engine, column) == code)
+        return self._bits[key]
+
+    def constraints(
+        self, hard: HardFlags, cuisine: Optional[str], city: Optional[str]
+    ) -> Dict[str, np.ndarray]:
+        """Bitset per stated constraint (lower-cased cuisine/city, None = unset)."""
+        out = {name: self.flags[j] for j, name in enumerate(ACCESS_FACETS) if hard[j]}
+        if cuisine is not None:
+            out["cuisine"] = self.bits("cuisine", self.engine.cuisine_code(cuisine))
+        if city is not None:
+            out["city"] = self.bits("city", self.engine.city_code(city))
+        return out
+
+    def count(self, bitsets: Sequence[np.ndarray]) -> int:
+        """Rows set in every one of `bitsets` (all rows for none)."""
+        return popcount(reduce(np.bitwise_and, bitsets, self.all))
+
+    def facet_counts(
+        self, hard: HardFlags, cuisine: Optional[str], city: Optional[str]
+    ) -> Dict[str, int]:
+        """
+        {"matches": rows meeting every stated constraint} plus, per stated
+        constraint, the rows that would match with only that one dropped.
+        """
+        cons = self.constraints(hard, cuisine, city)
+        counts = {"matches": self.count(list(cons.values()))}
+        for name in cons:
+            rest: List[np.ndarray] = [b for other, b in cons.items() if other != name]
+            counts[name] = self.count(rest)
+        return counts
+
+    # --- incremental refresh --------------------------------------------------------
+    def refresh_rows(self, df: pd.DataFrame, positions: Sequence[int]) -> bool:
+        # the engine refreshes first (built first); repacking is O(n / 8)
+        if self.engine.stale:
+            return False
+        self._pack()
+        return True
+
+
+def facet_index(df: pd.DataFrame) -> FacetIndex:
+    """The FacetIndex for this catalog version (built once, then reused)."""
+    return derived(df, "facet_index", lambda d: FacetIndex(ranking_engine(d)))
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..models.preferences import UserPreferences
+from .engine import (
+    CITY_BOOST,
+    CUISINE_BOOST,
+    NO_VALUE,
+    UNKNOWN,
+    HardFlags,
+    RankingEngine,
+    hard_flags,
+    positions_to_frame,
+    pref_key,
+    ranking_engine,
+    top_k_order,
+)
+from .recommender import RESULT_COLS
+
+# "union": every member's accessibility needs are group-wide hard filters,
+#          rows are ranked by the average member score (default)
+# "average": mean member score; a row failing a member's needs scores 0 for them
+# "least_misery": the unhappiest member's score, same per-member rule
+GROUP_STRATEGIES: Tuple[str, ...] = ("union", "average", "least_misery")
+
+
+def _profiles(
+    engine: RankingEngine, members: Sequence[UserPreferences]
+) -> Dict[HardFlags, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Distinct member profiles grouped by hard-filter signature:
+    signature -> (cuisine codes, city codes, member counts), UNKNOWN = no
+    preference (matches no row).
+    """
+    counts: Counter = Counter()
+    for m in members:
+        cu = engine.cuisine_code(pref_key(m.cuisine))
+        ci = engine.city_code(pref_key(m.city))
+        counts[
+            (
+                hard_flags(m),
+                UNKNOWN if cu == NO_VALUE else cu,
+                UNKNOWN if ci == NO_VALUE else ci,
+            )
+        ] += 1
+    by_sig: Dict[HardFlags, List[Tuple[int, int, int]]] = defaultdict(list)
+    for (hard, cu, ci), n in counts.items():
+        by_sig[hard].append((cu, ci, n))
+    out: Dict[HardFlags, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+    for hard, rows in by_sig.items():
+        cu_codes, ci_codes, weights = zip(*rows)
+        out[hard] = (
+            np.array(cu_codes),
+            np.array(ci_codes),
+            np.array(weights, dtype=float),
+        )
+    return out
+
+
+def _match_weight(
+    row_codes: np.ndarray, codes: np.ndarray, weights: np.ndarray
+) -> np.ndarray:
+    """Per row: total weight of the profiles whose code equals the row's code."""
+    known = codes >= 0
+    size = int(max(row_codes.max(initial=-1), codes.max(initial=-1))) + 2
+    # the last slot stays 0: rows with a missing value (NO_VALUE = -1) land there
+    table = np.bincount(codes[known], weights=weights[known], minlength=size)
+    return table[row_codes]
+
+
+def _pair_count(
+    engine: RankingEngine, cuisine: np.ndarray, city: np.ndarray
+) -> np.ndarray:
+    """Per row: number of profiles matching both its cuisine and its city."""
+    known = (cuisine >= 0) & (city >= 0)
+    stride = len(engine.city_vocab) + 1
+    keys, counts = np.unique(cuisine[known] * stride + city[known], return_counts=True)
+    if len(keys) == 0:
+        return np.zeros(engine.n)
+    # rows with a missing value get negative keys and match nothing
+    row_keys = engine.cuisine.astype(np.int64) * stride + engine.city
+    idx = np.minimum(np.searchsorted(keys, row_keys), len(keys) - 1)
+    return np.where(keys[idx] == row_keys, counts[idx], 0)
+
+
+def _min_boost(
+    engine: RankingEngine, cuisine: np.ndarray, city: np.ndarray
+) -> np.ndarray:
+    """Per row: the smallest cuisine+city boost over the given profiles."""
+    ones = np.ones(len(cuisine))
+    both = _pair_count(engine, cuisine, city)
+    cu_only = _match_weight(engine.cuisine, cuisine, ones) - both
+    ci_only = _match_weight(engine.city, city, ones) - both
+    neither = len(cuisine) - both - cu_only - ci_only
+    return np.select(
+        [neither > 0, ci_only > 0, cu_only > 0],
+        [0.0, CITY_BOOST, CUISINE_BOOST],
+        default=CUISINE_BOOST + CITY_BOOST,
+    )
+
+
+def group_scores(
+    engine: RankingEngine,
+    members: Sequence[UserPreferences],
+    strategy: str = "union",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (group score per row, row passes the group's hard filters) for `members`.
+
+    Conceptually a members x rows matrix of `filter_and_rank` scores,
+    aggregated per row. The matrix is never built: a member's score is the
+    row's unboosted score under their hard-filter signature (8 possible)
+    plus a cuisine and a city boost, so each aggregate reduces to per-code
+    member-weight tables. Cost is O(rows x signatures), flat in group size.
+    """
+    if strategy not in GROUP_STRATEGIES:
+        raise ValueError(
+            f"unknown group strategy {strategy!r}; use one of {GROUP_STRATEGIES}"
+        )
+    misery = strategy == "least_misery"
+    out = np.full(engine.n, np.inf) if misery else np.zeros(engine.n)
+    ok = np.ones(engine.n, dtype=bool)
+    for hard, (cuisine, city, counts) in _profiles(engine, members).items():
+        boosts = engine.boosts(None, hard, None, None)
+        if misery:
+            boosts = boosts + _min_boost(engine, cuisine, city)
+        else:
+            # average boost over this signature's members
+            w = counts.sum()
+            cu_share = _match_weight(engine.cuisine, cuisine, counts) / w
+            ci_share = _match_weight(engine.city, city, counts) / w
+            boosts = boosts + cu_share * CUISINE_BOOST
+            boosts = boosts + ci_share * CITY_BOOST
+        scores = engine.base + boosts
+        mask = engine.mask(hard)
+        if mask is not None:
+            if strategy == "union":
+                ok &= mask
+            else:
+                scores = np.where(mask, scores, 0.0)  # member is unhappy here
+        out = np.minimum(out, scores) if misery else out + counts.sum() * scores
+    return (out if misery else out / len(members)), ok
+
+
+def group_rank(
+    df: pd.DataFrame,
+    members: Sequence[UserPreferences],
+    top_k: int = 10,
+    strategy: str = "union",
+) -> pd.DataFrame:
+    """
+    Top `top_k` restaurants for a group, aggregating every member's own
+    preferences with `strategy` (see GROUP_STRATEGIES). Empty when the
+    "union" filters leave nothing; callers may retry with a softer strategy.
+    """
+    if not members or len(df) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return positions_to_frame(df, empty, np.empty(0), RESULT_COLS)
+    scores, ok = group_scores(ranking_engine(df), members, strategy)
+    pos = np.flatnonzero(ok)
+    sel = top_k_order(scores[pos], top_k)
+    return positions_to_frame(df, pos[sel], scores[pos[sel]], RESULT_COLS)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
+from typing import Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+from ..data.catalog import catalog_version
+from ..models.preferences import UserPreferences
+from ..monitor.metrics import log_event
+from .cache import ranking_key
+from .engine import hard_flags
+from .facets import ACCESS_FACETS, facet_index
+from .recommender import filter_and_rank
+from .state import RankingState, session_state
+
+# an accessibility question is worth prefetching for when a "yes" would
+# still keep at least this share of the current candidates
+PREFETCH_MIN_SHARE = 0.2
+
+
+def _snapshot(prefs: UserPreferences) -> UserPreferences:
+    """The ranking-relevant part of `prefs`, safe to hand to another thread."""
+    return UserPreferences(
+        city=prefs.city,
+        cuisine=prefs.cuisine,
+        accessibility=replace(prefs.accessibility),
+    )
+
+
+class Prefetcher:
+    """
+    Speculative rankings for a session's partial preferences, computed on a
+    background thread while the assistant waits for the next answer.
+
+    A prefetch runs the regular `filter_and_rank` with the session's
+    `RankingState`, which also warms the engine's sorted order for the
+    current hard-filter signature. If the answer leaves the query unchanged
+    (guests, time, a "no" to an accessibility question), the prefetched
+    result frame is the answer. Otherwise only the prefetched candidates
+    are re-scored: a cuisine/city answer re-scores the head of each boost
+    class, and a new hard filter narrows the cached order.
+    """
+
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # id(prefs) -> (catalog version + ranking key, job returning
+        # (results, ms); None once collected). Dropped when the prefs object is collected.
+        self._jobs: Dict[int, Tuple[Tuple[Hashable, ...], Optional[Future]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:  # no thread until the first prefetch
+                self._pool = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="prefetch"
+                )
+            return self._pool
+
+    def worth_it(self, df: pd.DataFrame, prefs: UserPreferences, slot: str) -> bool:
+        """
+        Whether the answer to `slot` leaves the prefetched candidates useful.
+        Only an accessibility "yes" changes the hard filters; the facet
+        bitsets tell how many candidates that would keep.
+        """
+        if slot not in ACCESS_FACETS or len(df) == 0:
+            return len(df) > 0
+        facets = facet_index(df)
+        # cuisine/city are soft boosts: they never drop candidates
+        cons = list(facets.constraints(hard_flags(prefs), None, None).values())
+        now = facets.count(cons)
+        narrowed = facets.count(cons + [facets.flags[ACCESS_FACETS.index(slot)]])
+        return now > 0 and narrowed >= PREFETCH_MIN_SHARE * now
+
+    def submit(self, df: pd.DataFrame, prefs: UserPreferences, top_k: int) -> None:
+        """Start ranking the current partial `prefs` in the background."""
+        snap = _snapshot(prefs)
+        query = (catalog_version(df), *ranking_key(snap, top_k))
+        key = id(prefs)
+        job = self._jobs.get(key)
+        if job is None:
+            weakref.finalize(prefs, self._jobs.pop, key, None)
+        elif job[1] is not None:
+            if job[0] == query:
+                return  # already prefetching this query
+            job[1].result()  # one job per session: its state is not shared
+        state = session_state(prefs)
+        future = self._executor().submit(self._run, df, snap, top_k, state)
+        self._jobs[key] = (query, future)
+
+    @staticmethod
+    def _run(
+        df: pd.DataFrame, prefs: UserPreferences, top_k: int, state: RankingState
+    ) -> Tuple[pd.DataFrame, float]:
+        t0 = time.perf_counter()
+        results = filter_and_rank(df, prefs, top_k=top_k, state=state)
+        return results, (time.perf_counter() - t0) * 1000.0
+
+    def collect(
+        self, df: pd.DataFrame, prefs: UserPreferences, top_k: int
+    ) -> Optional[pd.DataFrame]:
+        """
+        Wait for the session's prefetch (if any) before its final ranking.
+        Returns the prefetched results when they answer `prefs` (a hit),
+        else None; logs the hit and how many milliseconds it saved.
+        """
+        key = id(prefs)
+        job = self._jobs.get(key)
+        if job is None:
+            return None
+        query, future = job
+        if future is None:  # already collected
+            return None
+        self._jobs[key] = (query, None)
+        t0 = time.perf_counter()
+        results, job_ms = future.result()
+        wait_ms = (time.perf_counter() - t0) * 1000.0
+        hit = query == (catalog_version(df), *ranking_key(prefs, top_k))
+        saved_ms = max(job_ms - wait_ms, 0.0) if hit else 0.0
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.saved_ms += saved_ms
+        log_event(
+            "prefetch",
+            hit=hit,
+            saved_ms=round(saved_ms, 3),
+            hit_rate=round(self.stats()["hit_rate"], 3),
+        )
+        return results if hit else None
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "saved_ms": self.saved_ms,
+        }
+
+
+PREFETCHER = Prefetcher()
@@ -1,13 +1,225 @@
-from typing import List
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 import pandas as pd
+
+from ..data.catalog import catalog_version, derived
 from ..models.preferences import UserPreferences
+from ..monitor.tracing import traced
+from .cache import RESULT_CACHE, ranking_key
+from .engine import (
+    NO_VALUE,
+    TIE_EPS,
+    RankingEngine,
+    hard_flags,
+    positions_to_frame,
+    pref_key,
+    ranking_engine,
+    top_k_order,
+)
+from .facets import RELAXATIONS, facet_index
+from .state import RankingState
+from .views import TopKViews, record
+
+RANKING_VIEW_DEPTH = 50
+
+RESULT_COLS: List[str] = [
+    "id",
+    "name",
+    "city",
+    "cuisine",
+    "price",
+    "rating",
+    "access_wheelchair",
+    "access_step_free",
+    "access_restroom",
+    "score",
+]
+
+
+def _view_keys(city: Optional[str], cuisine: Optional[str]) -> List[Tuple[str, ...]]:
+    keys: List[Tuple[str, ...]] = [("g",)]
+    if cuisine is not None:
+        keys.append(("u", cuisine))
+    if city is not None:
+        keys.append(("c", city))
+    if city is not None and cuisine is not None:
+        keys.append(("cu", city, cuisine))
+    return keys
+
+
+# --- Materialized top-k views -------------------------------------------------
+class RankingViews:
+    """
+    Top-k rows per (city, cuisine), cuisine, city and overall, ordered by the
+    preference-independent part of the `filter_and_rank` score (rating,
+    popularity and all accessibility soft boosts).
+
+    Any top-k answer is contained in the union of those four views: within
+    each group the cuisine/city boosts are constant, and a hard accessibility
+    filter removes the same soft boost from every surviving row.
+    """
+
+    def __init__(self, engine: RankingEngine, depth: int = RANKING_VIEW_DEPTH):
+        self.engine = engine
+        self.depth = depth
+        e = engine
+        rows = np.arange(e.n)
+        city, cuis = e.city_names(), e.cuisine_names()
+        has_u, has_c = e.cuisine != NO_VALUE, e.city != NO_VALUE
+        both = has_u & has_c
+        keys: List[Tuple[str, ...]] = [("g",)] * e.n
+        keys += [("u", u) for u in cuis[has_u]]
+        keys += [("c", c) for c in city[has_c]]
+        keys += [("cu", c, u) for c, u in zip(city[both], cuis[both])]
+        pos = np.concatenate([rows, rows[has_u], rows[has_c], rows[both]])
+        self.views = TopKViews((pos, keys), self._sort_key(), depth=depth)
+
+    def _sort_key(self) -> np.ndarray:
+        return self.engine.base + self.engine.soft_all
+
+    def refresh_rows(self, df: pd.DataFrame, positions: Sequence[int]) -> bool:
+        e = self.engine  # refreshed first: it was derived before the views
+        if e.stale:
+            return False
+        city, cuis = e.city_names(), e.cuisine_names()
+        row_keys = [_view_keys(city[p], cuis[p]) for p in positions]
+        self.views.refresh(positions, row_keys, self._sort_key())
+        return True
+
+    def top(
+        self, prefs: UserPreferences, top_k: int
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(row positions, scores) of the top `top_k`, or None on a view miss."""
+        if not 0 < top_k <= self.depth:
+            return None
+        e = self.engine
+        hard = hard_flags(prefs)
+        cuisine, city = pref_key(prefs.cuisine), pref_key(prefs.city)
+        sort_key = self.views.primary
+        need = np.array(hard)[:, None]
+
+        cand: List[np.ndarray] = []
+        for key in _view_keys(city, cuisine):
+            view = self.views.top(key)
+            ok = view[(e.flags[:, view] | ~need).all(axis=0)]
+            complete = self.views.is_complete(key)
+            if len(ok) >= top_k:
+                kth = sort_key[ok[top_k - 1]]
+                # rows past a truncated window must rank strictly below the k-th
+                if not complete and not sort_key[view[-1]] < kth - TIE_EPS:
+                    return None
+                # keep near-ties of the k-th row; exact scores decide below
+                ok = ok[~(sort_key[ok] < kth - TIE_EPS)]
+            elif not complete:
+                return None
+            if key == ("g",) and len(ok) == 0:
+                return None  # hard filters wiped everything: engine fallback
+            cand.append(ok)
+
+        pos = np.unique(np.concatenate(cand))
+        scores = e.base[pos] + e.boosts(pos, hard, cuisine, city)
+        sel = top_k_order(scores, top_k)
+        return pos[sel], scores[sel]
+
 
+def ranking_views(df: pd.DataFrame) -> RankingViews:
+    """Top-k views for `df`, built once per catalog version."""
+    return derived(df, "ranking_views", lambda d: RankingViews(ranking_engine(d)))
 
+
+@traced("ranking")
 def filter_and_rank(
     df: pd.DataFrame,
     prefs: UserPreferences,
     top_k: int = 10,
+    state: Optional[RankingState] = None,
+) -> pd.DataFrame:
+    """
+    Top `top_k` restaurants for `prefs`: explicit accessibility needs are
+    hard filters, everything else is a soft boost on the rating score.
+    Served from the result cache, else the top-k views, else the NumPy
+    scoring engine; the catalog frame itself is never copied. Pass the
+    session's `state` to re-rank incrementally between dialog turns.
+    """
+    if len(df) == 0:
+        return _filter_and_rank_pandas(df, prefs, top_k)
+    key = (catalog_version(df), *ranking_key(prefs, top_k))
+    ranked = RESULT_CACHE.get(key)
+    if ranked is None:
+        ranked = ranking_views(df).top(prefs, top_k)
+        record("ranking", ranked is not None)
+        if ranked is None:
+            engine = ranking_engine(df)
+            ranked = (
+                state.rank(engine, prefs, top_k)
+                if state is not None
+                else engine.rank(prefs, top_k)
+            )
+        RESULT_CACHE.put(key, ranked)
+    return positions_to_frame(df, *ranked, RESULT_COLS)
+
+
+def rank_many(
+    df: pd.DataFrame,
+    prefs_list: Sequence[UserPreferences],
+    top_k: int = 10,
+) -> List[pd.DataFrame]:
+    """
+    `filter_and_rank` for several preference profiles (group members,
+    concurrent sessions). Each profile is still ranked on its own, but
+    profiles with the same hard filters share one sorted order of the
+    catalog (see RankingEngine.rank_shared) instead of each sorting it.
+    """
+    if len(df) == 0:
+        return [_filter_and_rank_pandas(df, p, top_k) for p in prefs_list]
+    ranked = ranking_engine(df).rank_many(prefs_list, top_k)
+    return [positions_to_frame(df, pos, scores, RESULT_COLS) for pos, scores in ranked]
+
+
+# --- Facet counts -----------------------------------------------------------------
+def facet_counts(df: pd.DataFrame, prefs: UserPreferences) -> Dict[str, int]:
+    """
+    Exact-match counts for `prefs` from the catalog's bitset index:
+    "matches" is the number of rows meeting every stated constraint (hard
+    accessibility needs, city, cuisine); each stated constraint maps to the
+    number of rows left with only that one dropped.
+    """
+    if len(df) == 0:
+        return {"matches": 0}
+    return facet_index(df).facet_counts(
+        hard_flags(prefs), pref_key(prefs.cuisine), pref_key(prefs.city)
+    )
+
+
+def suggest_relaxation(
+    df: pd.DataFrame, prefs: UserPreferences
+) -> Optional[Tuple[str, int]]:
+    """
+    (constraint, matches) for the cheapest single relaxation (RELAXATIONS
+    order) that yields matches, when nothing matches `prefs` exactly.
+    None if there are exact matches or no single relaxation helps.
+    """
+    counts = facet_counts(df, prefs)
+    if counts["matches"]:
+        return None
+    for name in RELAXATIONS:
+        if counts.get(name):
+            return name, counts[name]
+    return None
+
+
+def _filter_and_rank_pandas(
+    df: pd.DataFrame,
+    prefs: UserPreferences,
+    top_k: int = 10,
 ) -> pd.DataFrame:
+    """
+    Original pandas implementation; the reference the engine must match
+    (tests/test_ranking_engine.py, tools/bench_ranking.py).
+    """
     q = df.copy()
 
     # --- Base score: rating normalized 0..1 ---
@@ -89,19 +301,8 @@ def filter_and_rank(
                 "score",
             ] += 0.04
 
-    q = q.sort_values("score", ascending=False)
-
-    cols: List[str] = [
-        "id",
-        "name",
-        "city",
-        "cuisine",
-        "price",
-        "rating",
-        "access_wheelchair",
-        "access_step_free",
-        "access_restroom",
-        "score",
-    ]
-    cols = [c for c in cols if c in q.columns]
+    # stable sort: ties keep catalog order
+    q = q.sort_values("score", ascending=False, kind="stable")
+
+    cols = [c for c in RESULT_COLS if c in q.columns]
     return q[cols].head(top_k)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import weakref
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from ..models.preferences import UserPreferences
+from .engine import HardFlags, RankingEngine, hard_flags, pref_key
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+class RankingState:
+    """
+    One session's ranking between dialog turns: the last query (hard
+    filters, cuisine, city) and its candidate rows with exact scores.
+
+    Dialog turns usually change a single slot, and a re-rank only pays for
+    that delta. The engine keeps every row sorted once per hard-filter
+    signature, and one list per cuisine/city value. A cuisine/city change
+    swaps in the rows of the new value and re-scores the top of each boost
+    class. A new hard filter narrows the cached order instead of re-sorting
+    the catalog, and relaxing a filter returns to an order that is already
+    cached. Repeating the last query (or a smaller `top_k`) costs nothing.
+    Per-session memory is O(top_k), not O(catalog).
+    """
+
+    def __init__(self) -> None:
+        self._engine: Optional[RankingEngine] = None
+        self._generation = -1
+        self.query: Optional[Tuple[HardFlags, Optional[str], Optional[str]]] = None
+        self.top_k = 0
+        self.pos = _EMPTY
+        self.scores = np.empty(0)
+        self.reranks = 0  # turns that needed any ranking work
+
+    def rank(
+        self, engine: RankingEngine, prefs: UserPreferences, top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(row positions, scores) of the best `top_k` rows, like `engine.rank`."""
+        query = (hard_flags(prefs), pref_key(prefs.cuisine), pref_key(prefs.city))
+        if (
+            query != self.query
+            or top_k > self.top_k
+            or engine is not self._engine
+            or engine.generation != self._generation
+        ):
+            self.pos, self.scores = engine.rank_shared(*query, top_k)
+            self.query, self.top_k = query, top_k
+            self._engine, self._generation = engine, engine.generation
+            self.reranks += 1
+        # a top-k prefix is the top of any smaller k (the order is total)
+        return self.pos[:top_k], self.scores[:top_k]
+
+
+# --- Per-session registry -------------------------------------------------------
+# Keyed by id() of the session's preferences object; dropped when it is collected.
+_STATES: Dict[int, RankingState] = {}
+
+
+def session_state(owner: object) -> RankingState:
+    """Ranking state tied to `owner` (a session's `UserPreferences`)."""
+    key = id(owner)
+    state = _STATES.get(key)
+    if state is None:
+        state = _STATES[key] = RankingState()
+        weakref.finalize(owner, _STATES.pop, key, None)
+    return state
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# hit/miss counters per view family ("places", "ranking", ...)
+_STATS: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def record(name: str, hit: bool) -> None:
+    _STATS[name]["hits" if hit else "misses"] += 1
+
+
+def view_stats() -> Dict[str, Dict[str, float]]:
+    """Hit/miss counts and hit rate per view family."""
+    out: Dict[str, Dict[str, float]] = {}
+    for name, s in _STATS.items():
+        total = s["hits"] + s["misses"]
+        out[name] = {**s, "hit_rate": (s["hits"] / total) if total else 0.0}
+    return out
+
+
+class TopKViews:
+    """
+    Materialized top-`depth` row lists per key.
+
+    Rows are ordered by `primary` (desc, NaN last), then `secondary` (desc),
+    then row position. Row -> key membership is given as parallel
+    (positions, keys) arrays, so a row may sit under several keys. Full
+    postings are kept so that a single key can be refreshed on its own.
+    """
+
+    def __init__(
+        self,
+        pairs: Tuple[np.ndarray, Sequence[Hashable]],
+        primary: np.ndarray,
+        secondary: Optional[np.ndarray] = None,
+        depth: int = 50,
+    ):
+        self.depth = depth
+        self._set_sort_arrays(primary, secondary)
+
+        pos = np.asarray(pairs[0], dtype=np.int64)
+        codes, uniques = pd.factorize(pd.Series(pairs[1], dtype=object))
+        keys = np.asarray(uniques, dtype=object)
+        # sorted copy of the membership pairs, for old-key lookups on refresh
+        by_pos = np.argsort(pos, kind="stable")
+        self._pair_pos = pos[by_pos]
+        self._pair_key = keys[codes[by_pos]]
+        self._row_keys: Dict[int, List[Hashable]] = {}  # rows changed since build
+
+        # one global sort, then group the pairs by key in rank order
+        n = len(self.primary)
+        rank = np.empty(n, dtype=np.int64)
+        rank[self.order(np.arange(n))] = np.arange(n)
+        order = np.lexsort((rank[pos], codes))
+        sorted_codes, sorted_pos = codes[order], pos[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        ends = np.r_[starts[1:], len(sorted_codes)]
+        self.postings: Dict[Hashable, np.ndarray] = {}
+        self.views: Dict[Hashable, np.ndarray] = {}
+        for a, b in zip(starts, ends):
+            key = keys[sorted_codes[a]]
+            self.postings[key] = sorted_pos[a:b]
+            self.views[key] = sorted_pos[a : min(b, a + depth)]
+
+    def _set_sort_arrays(
+        self, primary: np.ndarray, secondary: Optional[np.ndarray]
+    ) -> None:
+        primary = np.asarray(primary, dtype=float)
+        self.primary = primary
+        self._neg_primary = np.where(np.isnan(primary), np.inf, -primary)
+        if secondary is None:
+            self._neg_secondary = np.zeros(len(primary))
+        else:
+            sec = np.asarray(secondary, dtype=float)
+            self._neg_secondary = np.where(np.isnan(sec), np.inf, -sec)
+
+    def order(self, positions: np.ndarray) -> np.ndarray:
+        """Sort row positions into view order."""
+        positions = np.asarray(positions, dtype=np.int64)
+        idx = np.lexsort(
+            (positions, self._neg_secondary[positions], self._neg_primary[positions])
+        )
+        return positions[idx]
+
+    # --- reads ----------------------------------------------------------------
+    def top(self, key: Hashable) -> np.ndarray:
+        return self.views.get(key, _EMPTY)
+
+    def is_complete(self, key: Hashable) -> bool:
+        """True if the view holds every row of `key` (nothing was truncated)."""
+        return len(self.postings.get(key, _EMPTY)) <= self.depth
+
+    def merged_top(self, keys: Iterable[Hashable], limit: int) -> Optional[np.ndarray]:
+        """
+        Top `limit` rows across the union of `keys`, or None if the views are
+        too shallow to answer exactly.
+        """
+        if limit > self.depth:
+            return None
+        parts = [self.top(k) for k in keys]
+        if not parts:
+            return _EMPTY
+        return self.order(np.unique(np.concatenate(parts)))[:limit]
+
+    # --- incremental refresh ----------------------------------------------------
+    def keys_of(self, pos: int) -> List[Hashable]:
+        if pos in self._row_keys:
+            return self._row_keys[pos]
+        lo, hi = np.searchsorted(self._pair_pos, [pos, pos + 1])
+        return list(self._pair_key[lo:hi])
+
+    def refresh(
+        self,
+        changed: Sequence[int],
+        row_keys: Sequence[Sequence[Hashable]],
+        primary: np.ndarray,
+        secondary: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Re-materialize only the keys touched by the `changed` rows.
+        `row_keys` holds the new keys of those rows (same order as `changed`);
+        `primary`/`secondary` are the full, updated sort arrays. Positions past
+        the previous end are treated as appended rows.
+        """
+        self._set_sort_arrays(primary, secondary)
+        touched: set = set()
+        for pos, keys in zip((int(p) for p in changed), row_keys):
+            old = self.keys_of(pos)
+            for k in old:
+                if k not in keys:
+                    p = self.postings[k]
+                    self.postings[k] = p[p != pos]
+            for k in keys:
+                cur = self.postings.get(k)
+                if cur is None:
+                    self.postings[k] = np.asarray([pos], dtype=np.int64)
+                elif k not in old:
+                    self.postings[k] = np.append(cur, pos)
+            self._row_keys[pos] = list(keys)
+            touched.update(old)
+            touched.update(keys)
+
+        changed_arr = np.asarray(list(changed), dtype=np.int64)
+        for k in touched:
+            post = self.postings.get(k)
+            if post is None or post.size == 0:
+                self.postings.pop(k, None)
+                self.views.pop(k, None)
+                continue
+            old_view = self.views.get(k, _EMPTY)
+            kept = old_view[~np.isin(old_view, changed_arr)]
+            fresh = changed_arr[np.isin(changed_arr, post)]
+            # Unchanged rows outside the old window rank below every kept row.
+            # If some exist and the window is no longer full of kept rows, they
+            # may belong in the new window: re-sort this key from its postings.
+            outside = len(post) - len(fresh) - len(kept)
+            if outside > 0 and len(kept) < self.depth:
+                self.views[k] = self.order(post)[: self.depth]
+            else:
+                self.views[k] = self.order(np.concatenate([kept, fresh]))[: self.depth]
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+import numpy as np
+
+# float32 mono 16 kHz audio -> transcript
+Transcribe = Callable[[np.ndarray], str]
+
+
+def load_transcriber(model: str = "base", device: str = "cpu") -> Optional[Transcribe]:
+    """
+    A Whisper transcriber for in-memory audio: faster-whisper if installed
+    (int8 on CPU), else openai-whisper; None when neither is available.
+    """
+    try:
+        from faster_whisper import WhisperModel
+    except Exception:
+        WhisperModel = None
+    if WhisperModel is not None:
+        fw = WhisperModel(
+            model, device=device, compute_type="int8" if device == "cpu" else "default"
+        )
+
+        def transcribe_fw(audio: np.ndarray) -> str:
+            segments, _ = fw.transcribe(
+                audio, beam_size=1, condition_on_previous_text=False
+            )
+            return "".join(s.text for s in segments).strip()
+
+        return transcribe_fw
+    try:
+        import whisper
+    except Exception:
+        return None
+    ow = whisper.load_model(model, device=device)
+
+    def transcribe_ow(audio: np.ndarray) -> str:
+        result = ow.transcribe(
+            audio, fp16=device != "cpu", condition_on_previous_text=False
+        )
+        return (result.get("text") or "").strip()
+
+    return transcribe_ow
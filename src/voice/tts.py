@@ -0,0 +1,425 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..monitor.metrics import log_event
+
+CACHE_DIR = Path("data/tts_cache")
+# past this size the least recently used files are deleted (0: no limit)
+CACHE_MAX_BYTES = int(
+    os.environ.get("JEEVES_TTS_CACHE_MAX_BYTES", str(50 * 1024 * 1024))
+)
+_TMP_PREFIX = "tmp-"  # renders in progress, never evicted
+
+# renderer(text, wav_path, voice): writes the spoken text as a WAV file
+Renderer = Callable[[str, Path, Optional[str]], None]
+Player = Callable[[Path], None]
+
+
+# --- Backends -----------------------------------------------------------------
+def render_say(text: str, path: Path, voice: Optional[str]) -> None:
+    """macOS `say`, written to a 16-bit WAV instead of the speakers."""
+    cmd = ["say", "--data-format=LEI16@22050", "-o", str(path)]
+    if voice:
+        cmd += ["-v", voice]
+    subprocess.run(cmd + [text], check=True, capture_output=True)
+
+
+def render_espeak(text: str, path: Path, voice: Optional[str]) -> None:
+    """eSpeak NG (Linux, Windows); falls back to classic `espeak`."""
+    exe = shutil.which("espeak-ng") or shutil.which("espeak") or "espeak-ng"
+    cmd = [exe, "-w", str(path)]
+    if voice:
+        cmd += ["-v", voice]
+    subprocess.run(cmd + [text], check=True, capture_output=True)
+
+
+def render_pyttsx3(text: str, path: Path, voice: Optional[str]) -> None:
+    import pyttsx3
+
+    engine = pyttsx3.init()
+    engine.setProperty("rate", 180)
+    if voice:
+        engine.setProperty("voice", voice)
+    engine.save_to_file(text, str(path))
+    engine.runAndWait()
+
+
+BACKENDS: Dict[str, Renderer] = {
+    "say": render_say,
+    "espeak": render_espeak,
+    "pyttsx3": render_pyttsx3,
+}
+
+
+def pick_backend(name: str = "auto") -> Optional[str]:
+    """`name` if given, else the first local backend found (None: no TTS)."""
+    if name != "auto":
+        return name
+    if sys.platform == "darwin" and shutil.which("say"):
+        return "say"
+    if shutil.which("espeak-ng") or shutil.which("espeak"):
+        return "espeak"
+    try:
+        import pyttsx3  # noqa: F401
+    except Exception:
+        return None
+    return "pyttsx3"
+
+
+# Playback through PortAudio when available (see requirements.txt). It is
+# imported on first playback, not with this module: sounddevice loads and
+# initializes PortAudio on import, which startup does not need.
+@functools.lru_cache(maxsize=None)
+def _audio_io() -> Tuple[Any, Any]:
+    """(sounddevice, soundfile), or (None, None) on headless installs."""
+    try:
+        import sounddevice
+        import soundfile
+    except Exception:
+        return None, None
+    return sounddevice, soundfile
+
+
+def play_wav(path: Path) -> None:
+    """Play a WAV file and block until it ends."""
+    sd, sf = _audio_io()
+    if sd is not None and sf is not None:
+        data, rate = sf.read(str(path), dtype="float32")
+        sd.play(data, rate)
+        sd.wait()
+        return
+    player = shutil.which("afplay") or shutil.which("aplay") or shutil.which("paplay")
+    if player:
+        subprocess.run([player, str(path)], check=False, capture_output=True)
+
+
+class StreamPlayer:
+    """
+    Gapless playback of consecutive chunks: all chunks are written to one
+    open output stream, so there is no device stop/start between them as
+    with a `sd.play()` per file. Reopens the stream only when the sample
+    rate or channel count changes; falls back to `play_wav` without PortAudio.
+    """
+
+    def __init__(self) -> None:
+        self._stream: Optional[Any] = None  # sd.OutputStream while open
+        self._format: Optional[Tuple[int, int]] = None
+
+    def __call__(self, path: Path) -> None:
+        sd, sf = _audio_io()
+        if sd is None or sf is None:
+            play_wav(path)
+            return
+        data, rate = sf.read(str(path), dtype="float32", always_2d=True)
+        fmt = (rate, data.shape[1])
+        stream = self._stream
+        if stream is None or self._format != fmt:
+            self.close()
+            stream = sd.OutputStream(samplerate=rate, channels=fmt[1], dtype="float32")
+            stream.start()
+            self._stream, self._format = stream, fmt
+        # returns once buffered, not played: the next chunk follows on, and
+        # audio still buffered from earlier chunks plays before this one
+        stream.write(data)
+
+    def drain(self) -> None:
+        """Block until the buffered audio has played."""
+        if self._stream is not None:
+            self._stream.stop()  # plays out pending buffers first
+            self._stream.start()
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+
+# --- Chunking -------------------------------------------------------------------
+# a sentence end followed by a capital or digit (keeps "7 p.m. or", "e.g., X")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9ÄÖÜ\"'])")
+_BULLET = re.compile(r"^(?:[•*\-–]|\d+[.)])\s+")
+
+
+def split_chunks(text: str) -> List[str]:
+    """
+    Split a reply into speakable chunks: lines (bullets, one result per
+    line, markers dropped so the TTS does not read them out), then sentences.
+    """
+    chunks: List[str] = []
+    for line in (text or "").splitlines():
+        line = _BULLET.sub("", line.strip())
+        chunks.extend(part for part in _SENTENCE_END.split(line) if part.strip())
+    return chunks
+
+
+# --- Cache ----------------------------------------------------------------------
+class TTSCache:
+    """
+    Rendered audio on disk, keyed by a hash of (backend, voice, text).
+
+    Rendering the same prompt twice is the slow part of speaking fixed
+    strings (greeting, slot questions); with the cache a repeated prompt
+    costs one file read. Files are written to a temporary name and then
+    renamed, so concurrent renders of one text never expose a partial WAV.
+    Dynamic lines (result names, ratings) are cached too, so the directory
+    is capped at `max_bytes`: a hit refreshes a file's mtime, and a miss
+    deletes the least recently used files once the cap is exceeded.
+    """
+
+    def __init__(
+        self,
+        backend: str,
+        voice: Optional[str] = None,
+        root: Path = CACHE_DIR,
+        renderer: Optional[Renderer] = None,
+        max_bytes: int = CACHE_MAX_BYTES,
+    ):
+        self.backend = backend
+        self.voice = voice
+        self.root = Path(root)
+        self.renderer = renderer or BACKENDS[backend]
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path_for(self, text: str) -> Path:
+        key = hashlib.sha256(
+            f"{self.backend}\0{self.voice or ''}\0{text}".encode()
+        ).hexdigest()
+        return self.root / f"{key[:32]}.wav"
+
+    def render(self, text: str) -> Path:
+        """Path to the audio for `text`, rendering it on a cache miss."""
+        path = self.path_for(text)
+        if path.exists():
+            self.hits += 1
+            try:
+                os.utime(path)  # recently used: evicted last
+            except OSError:
+                pass
+            return path
+        self.misses += 1
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(suffix=".wav", prefix=_TMP_PREFIX, dir=self.root)
+        os.close(fd)
+        try:
+            self.renderer(text, Path(tmp), self.voice)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        if self.max_bytes:
+            self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: Path) -> None:
+        """Delete the least recently used files until the cache fits max_bytes."""
+        files = []
+        for p in self.root.glob("*.wav"):
+            if p.name.startswith(_TMP_PREFIX) or p == keep:
+                continue
+            try:
+                st = p.stat()
+            except OSError:
+                continue  # evicted by a concurrent render
+            files.append((st.st_mtime_ns, st.st_size, p))
+        try:
+            total = keep.stat().st_size + sum(size for _, size, _ in files)
+        except OSError:
+            return
+        for _, size, p in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+# --- Worker -----------------------------------------------------------------------
+@dataclass(slots=True)
+class _Utterance:
+    """One `say()` call, spoken as `chunks` separately rendered pieces."""
+
+    chunks: int
+    queued_at: float
+    done: threading.Event = field(default_factory=threading.Event)
+    first_audio_ms: Optional[float] = None  # say() -> first chunk handed to play
+
+
+_Chunk = Tuple[str, int, _Utterance]  # text, index within the utterance
+
+
+class TTSWorker:
+    """
+    Speaks text off the caller's thread.
+
+    `say()` only enqueues. Each reply is split into sentences and bullet
+    lines; a render thread synthesizes chunk N+1 while the playback thread
+    plays chunk N, so speech starts once the first sentence is rendered
+    rather than the whole reply, and the dialog loop goes on (ranking,
+    formatting the next lines) while the assistant talks. The time from
+    `say()` to handing the first chunk to the player is logged as
+    `tts_first_audio`. With the default StreamPlayer that is when the chunk
+    is queued on the output stream, not when it is heard: audio still
+    buffered from earlier chunks and the device's output latency come on top.
+    `prerender()` fills the cache in the background at startup.
+    """
+
+    def __init__(
+        self, cache: TTSCache, play: Optional[Player] = None, maxsize: int = 32
+    ):
+        self.cache = cache
+        self.play = play if play is not None else StreamPlayer()
+        self._render_q: "queue.Queue[Optional[_Chunk]]" = queue.Queue(maxsize)
+        self._play_q: (
+            "queue.Queue[Optional[Tuple[Optional[Path], int, _Utterance]]]"
+        ) = queue.Queue(maxsize)
+        self.first_audio_ms: List[float] = []
+        # utterances fully handed to the player but maybe still buffered
+        self._unheard: List[_Utterance] = []
+        self._threads = [
+            threading.Thread(target=self._render_loop, name="tts-render", daemon=True),
+            threading.Thread(target=self._play_loop, name="tts-play", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def say(self, text: str, wait: bool = False) -> threading.Event:
+        """
+        Queue `text`; the returned event is set once all of it has been
+        heard: with a buffering player (StreamPlayer) only after its buffered
+        audio has drained, not when the last chunk was handed to it.
+        """
+        chunks = split_chunks(text)
+        utt = _Utterance(len(chunks), time.perf_counter())
+        if not chunks:
+            utt.done.set()
+        for i, chunk in enumerate(chunks):
+            self._render_q.put((chunk, i, utt))
+        if wait:
+            utt.done.wait()
+        return utt.done
+
+    def prerender(self, texts: Iterable[str]) -> threading.Thread:
+        """Render `texts` into the cache on a background thread."""
+        chunks = [chunk for text in texts for chunk in split_chunks(text)]
+
+        def run() -> None:
+            for chunk in chunks:
+                try:
+                    self.cache.render(chunk)
+                except Exception as e:
+                    print(f"[WARN] TTS prerender failed: {e}")
+
+        t = threading.Thread(target=run, name="tts-prerender", daemon=True)
+        t.start()
+        return t
+
+    def wait(self) -> None:
+        """Block until everything queued so far has been played."""
+        self._render_q.join()
+        self._play_q.join()
+        drain = getattr(self.play, "drain", None)
+        if drain is not None:
+            drain()
+
+    def close(self) -> None:
+        self._render_q.put(None)
+        for t in self._threads:
+            t.join()
+
+    def stats(self) -> Dict[str, float]:
+        """Time-to-first-audio percentiles (ms) over the utterances so far."""
+        ttfa = sorted(self.first_audio_ms)
+        if not ttfa:
+            return {"utterances": 0}
+        return {
+            "utterances": len(ttfa),
+            "first_audio_p50_ms": ttfa[len(ttfa) // 2],
+            "first_audio_max_ms": ttfa[-1],
+        }
+
+    def _render_loop(self) -> None:
+        while (item := self._render_q.get()) is not None:
+            text, i, utt = item
+            try:
+                path: Optional[Path] = self.cache.render(text)
+            except Exception as e:
+                print(f"[WARN] TTS failed: {e}")
+                path = None
+            self._play_q.put((path, i, utt))
+            self._render_q.task_done()
+        self._render_q.task_done()
+        self._play_q.put(None)
+
+    def _play_loop(self) -> None:
+        while (item := self._play_q.get()) is not None:
+            path, i, utt = item
+            try:
+                if i == 0:
+                    self._first_audio(utt)
+                if path is not None:
+                    self.play(path)
+            except Exception as e:
+                print(f"[WARN] TTS playback failed: {e}")
+            finally:
+                if i == utt.chunks - 1:
+                    self._unheard.append(utt)
+                # drain only once nothing else is ready to play, so chunks
+                # queued back to back still play without a gap between them
+                if self._unheard and self._play_q.empty():
+                    self._drain()
+                self._play_q.task_done()
+        self._play_q.task_done()
+        close = getattr(self.play, "close", None)
+        if close is not None:
+            close()
+
+    def _drain(self) -> None:
+        """Wait for the player's buffered audio, then mark its utterances done."""
+        drain = getattr(self.play, "drain", None)
+        try:
+            if drain is not None:
+                drain()
+        except Exception as e:
+            print(f"[WARN] TTS playback failed: {e}")
+        finally:
+            for utt in self._unheard:
+                utt.done.set()
+            self._unheard.clear()
+
+    def _first_audio(self, utt: _Utterance) -> None:
+        utt.first_audio_ms = (time.perf_counter() - utt.queued_at) * 1000.0
+        self.first_audio_ms.append(utt.first_audio_ms)
+        log_event(
+            "tts_first_audio",
+            ms=round(utt.first_audio_ms, 1),
+            chunks=utt.chunks,
+        )
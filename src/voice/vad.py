@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16_000
+
+
+def pcm16_to_float(buf: bytes) -> np.ndarray:
+    """Little-endian int16 PCM -> float32 in [-1, 1]."""
+    return np.frombuffer(buf, dtype="<i2").astype(np.float32) / 32768.0
+
+
+class EnergyVAD:
+    """
+    Energy-based speech segmentation of a 16 kHz mono stream.
+
+    Audio is cut into fixed frames; a frame is voiced when its level is
+    above both `threshold_db` and the running noise floor plus `margin_db`.
+    Speech starts after `start_ms` of consecutive voiced frames (with
+    `preroll_ms` of audio before the onset kept, so the first syllable is
+    not clipped) and ends after `hangover_ms` of unvoiced frames or at
+    `max_ms`. `feed()` returns ("start", None) and ("end", segment) events.
+    """
+
+    def __init__(
+        self,
+        rate: int = SAMPLE_RATE,
+        frame_ms: int = 30,
+        threshold_db: float = -45.0,
+        margin_db: float = 10.0,
+        start_ms: int = 90,
+        hangover_ms: int = 600,
+        preroll_ms: int = 300,
+        max_ms: int = 15_000,
+    ):
+        self.rate = rate
+        self.frame = rate * frame_ms // 1000
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.start_frames = max(start_ms // frame_ms, 1)
+        self.end_frames = max(hangover_ms // frame_ms, 1)
+        self.max_frames = max_ms // frame_ms
+        self.noise_db = threshold_db - margin_db
+        self._pending = np.empty(0, dtype=np.float32)  # < one frame
+        self._preroll: Deque[np.ndarray] = deque(maxlen=max(preroll_ms // frame_ms, 1))
+        self._speech: List[np.ndarray] = []
+        self._voiced_run = 0
+        self._silent_run = 0
+        self.in_speech = False
+
+    def _level_db(self, frame: np.ndarray) -> float:
+        rms = float(np.sqrt(np.mean(frame * frame)))
+        return 20.0 * np.log10(rms + 1e-9)
+
+    def feed(self, samples: np.ndarray) -> List[Tuple[str, Optional[np.ndarray]]]:
+        events: List[Tuple[str, Optional[np.ndarray]]] = []
+        buf = (
+            np.concatenate([self._pending, samples]) if len(self._pending) else samples
+        )
+        n = len(buf) // self.frame * self.frame
+        self._pending = buf[n:].copy()
+        for frame in buf[:n].reshape(-1, self.frame):
+            level = self._level_db(frame)
+            voiced = level > max(self.threshold_db, self.noise_db + self.margin_db)
+            if not self.in_speech:
+                self._preroll.append(frame)
+                if voiced:
+                    self._voiced_run += 1
+                    if self._voiced_run >= self.start_frames:
+                        self.in_speech = True
+                        self._speech = list(self._preroll)
+                        self._silent_run = 0
+                        events.append(("start", None))
+                else:
+                    self._voiced_run = 0
+                    # slow-moving floor: follows the room, not the speech
+                    self.noise_db = 0.95 * self.noise_db + 0.05 * level
+                continue
+            self._speech.append(frame)
+            self._silent_run = 0 if voiced else self._silent_run + 1
+            if (
+                self._silent_run >= self.end_frames
+                or len(self._speech) >= self.max_frames
+            ):
+                events.append(("end", self._close()))
+        return events
+
+    @property
+    def speech(self) -> np.ndarray:
+        """The current utterance so far (empty outside speech)."""
+        if not self.in_speech:
+            return np.empty(0, dtype=np.float32)
+        return np.concatenate(self._speech)
+
+    def flush(self) -> Optional[np.ndarray]:
+        """End the current utterance now (client stopped sending)."""
+        if not self.in_speech:
+            return None
+        if len(self._pending):
+            self._speech.append(self._pending)
+            self._pending = np.empty(0, dtype=np.float32)
+        return self._close()
+
+    def _close(self) -> np.ndarray:
+        # drop the trailing silence that ended the utterance
+        keep = len(self._speech) - max(self._silent_run - 2, 0)
+        segment = np.concatenate(self._speech[:keep])
+        self._speech = []
+        self._preroll.clear()
+        self._voiced_run = self._silent_run = 0
+        self.in_speech = False
+        return segment
@@ -0,0 +1,112 @@
+import asyncio
+import time
+from typing import List
+
+import httpx
+import pytest
+
+from src.jeeves.web import app as web
+from src.jeeves.web.admission import LONG, SHORT, Overloaded, WorkQueue, text_priority
+from src.monitor import metrics
+from tests.test_web_app import _catalog
+
+
+def _job(log, name, seconds=0.03):
+    def run():
+        time.sleep(seconds)
+        log.append(name)
+        return name
+
+    return run
+
+
+def test_short_requests_jump_the_queue_and_full_queues_reject(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    assert text_priority("two") == SHORT
+    assert text_priority("italian food in Berlin please") == LONG
+
+    async def scenario():
+        q = WorkQueue("t", concurrency=1, max_depth=3, deadline_s=5.0)
+        log: List[str] = []
+        running = asyncio.create_task(q.run(_job(log, "first", 0.1)))
+        await asyncio.sleep(0.01)
+        a = asyncio.create_task(q.run(_job(log, "a"), priority=LONG))
+        await asyncio.sleep(0)
+        b = asyncio.create_task(q.run(_job(log, "b"), priority=LONG))
+        await asyncio.sleep(0)
+        c = asyncio.create_task(q.run(_job(log, "c"), priority=SHORT))
+        await asyncio.sleep(0)
+        assert q.depth == 3
+        with pytest.raises(Overloaded) as full:  # no lower-priority waiter to displace
+            await q.run(_job(log, "d"), priority=LONG)
+        assert full.value.reason == "full" and full.value.retry_after >= 1
+        e = asyncio.create_task(q.run(_job(log, "e"), priority=SHORT))  # displaces b
+        results = await asyncio.gather(running, a, b, c, e, return_exceptions=True)
+        assert isinstance(results[2], Overloaded)
+        assert log == ["first", "c", "e", "a"]
+        stats = q.stats()
+        assert stats["rejected"] == {"full": 2, "deadline": 0, "expired": 0}
+        assert stats["admitted"] == 4 and stats["active"] == 0 and stats["depth"] == 0
+        assert stats["wait_ms_max"] >= 100
+
+    asyncio.run(scenario())
+
+
+def test_requests_that_would_miss_their_deadline_are_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+
+    async def scenario():
+        q = WorkQueue("t", concurrency=1, max_depth=10, deadline_s=0.1)
+        log: List[str] = []
+        await q.run(_job(log, "warm", 0.2), deadline_s=1.0)  # learns ~200 ms per call
+        busy = asyncio.create_task(q.run(_job(log, "busy", 0.2)))
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded) as late:  # ~200 ms expected wait > 100 ms
+            await q.run(_job(log, "late"))
+        assert late.value.reason == "deadline"
+        q.service_s = 0.01  # optimistic estimate: admitted, then times out waiting
+        with pytest.raises(Overloaded) as expired:
+            await q.run(_job(log, "expired"))
+        assert expired.value.reason == "expired"
+        await busy
+        assert log == ["warm", "busy"] and q.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_overloaded_service_answers_503_with_retry_after(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    real = web._recs
+
+    def slow(df, text):
+        time.sleep(0.1)
+        return real(df, text)
+
+    monkeypatch.setattr(web, "_recs", slow)
+    queues = {"dialog": WorkQueue("dialog", concurrency=1, max_depth=1, deadline_s=2.0)}
+    app = web.create_app(df=_catalog(), asr_model="", queues=queues)
+
+    async def burst():
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://t"
+            ) as http:
+                replies = await asyncio.gather(
+                    *(
+                        http.post("/recs", json={"text": "italian food in Berlin"})
+                        for _ in range(4)
+                    )
+                )
+                health = (await http.get("/health")).json()
+        return replies, health
+
+    replies, health = asyncio.run(burst())
+    codes = sorted(r.status_code for r in replies)
+    assert codes == [200, 200, 503, 503]  # one running, one waiting, two turned away
+    rejected = [r for r in replies if r.status_code == 503]
+    assert all(int(r.headers["Retry-After"]) >= 1 for r in rejected)
+    assert rejected[0].json()["queue"] == "dialog"
+    assert health["queues"]["dialog"]["rejected"]["full"] == 2
+    metrics.flush()
+    assert (tmp_path / "metrics.log").read_text().count("admission_reject") == 2
@@ -0,0 +1,68 @@
+import pandas as pd
+
+from src.dialog.commands import CommandTable
+from src.dialog.manager import COMMANDS, handle_turn
+from src.dialog.session import Session
+
+
+def test_one_scan_finds_commands_in_priority_order():
+    assert COMMANDS.find("italian in berlin for two") == []
+    assert [n for n, _ in COMMANDS.find("Lösche meine Daten")] == ["gdpr_delete"]
+    assert [n for n, _ in COMMANDS.find("loesche meine daten")] == ["gdpr_delete"]
+    # Whisper mishears of "end group", but not inside other words
+    for text in ("and group", "Finish the group", "ant group"):
+        assert [n for n, _ in COMMANDS.find(text)] == ["group_end"]
+    assert COMMANDS.find("restaurant group") == []
+    # "add" appears first in the text, but starting a group has priority
+    found = COMMANDS.find("add me and start group of 3")
+    assert [n for n, _ in found] == ["group_start", "group_add"]
+    assert found[0][1].group("group_size") == "3"
+    assert [n for n, _ in COMMANDS.find("  Show results ")] == ["show_results"]
+    assert COMMANDS.find("show results for vegan") == []
+
+
+def test_handlers_fall_through_and_new_commands_register():
+    table = CommandTable()
+    calls = []
+
+    @table.register("maybe", r"help\b")
+    def _maybe(session, m, df):
+        calls.append("maybe")
+        return None  # not applicable: try the next command
+
+    @table.register("hilfe", r"hilfe", r"please\b")
+    def _hilfe(session, m, df):
+        return "Sure.", None
+
+    assert table.dispatch(Session("s"), "Help me please", pd.DataFrame()) == (
+        "Sure.",
+        None,
+    )
+    assert calls == ["maybe"]
+    assert table.dispatch(Session("s"), "helpful", pd.DataFrame()) is None
+
+
+def test_group_commands_through_handle_turn():
+    df = pd.DataFrame()
+    session = Session("g")
+    assert handle_turn(session, "start group of 2", df)[0].startswith(
+        "Group mode started"
+    )
+    assert session.group.active and session.group.size == 2
+    handle_turn(session, "add", df)
+    handle_turn(session, "italian, wheelchair", df)
+    assert len(session.group.members) == 1
+    assert handle_turn(session, "and group", df)[0].startswith("Group mode ended")
+    assert not session.group.active
+
+
+def test_group_mode_sets_the_ranking_strategy():
+    df = pd.DataFrame()
+    session = Session("m")
+    assert [n for n, _ in COMMANDS.find("group mode least misery")] == ["group_mode"]
+    reply = handle_turn(session, "Group mode least misery, please", df)[0]
+    assert reply.startswith("Group mode set to least misery")
+    assert session.group.strategy == "least_misery"
+    handle_turn(session, "group mode average", df)
+    assert session.group.strategy == "average"
+    assert COMMANDS.find("group mode loudest") == []
@@ -0,0 +1,35 @@
+from src.data.loader import load_restaurants, memory_report
+from src.models.preferences import AccessibilityNeeds, UserPreferences
+from src.places_local import load_df, search_with_fallback
+from src.reco.recommender import filter_and_rank
+
+CSV = "data/restaurants_test.csv"
+
+
+def test_compact_restaurants_dtypes_and_ranking():
+    full = load_restaurants(CSV)
+    small = load_restaurants(CSV, compact=True)
+    assert str(small["city"].dtype) == "category"
+    assert str(small["rating"].dtype) == "float32"
+    assert str(small["access_wheelchair"].dtype) == "boolean"
+
+    prefs = UserPreferences(
+        city="Berlin", accessibility=AccessibilityNeeds(step_free=True)
+    )
+    a = filter_and_rank(full, prefs, top_k=5)["name"].tolist()
+    b = filter_and_rank(small, prefs, top_k=5)["name"].tolist()
+    assert a == b
+
+
+def test_compact_zomato_is_smaller_and_answers_the_same():
+    full = load_df()
+    small = load_df(compact=True)
+    assert "Rating color" not in small.columns
+
+    rep = memory_report(small, baseline=full)
+    assert rep.loc["TOTAL", "bytes"] < 0.5 * rep.loc["TOTAL", "baseline_bytes"]
+
+    for cuisine, city in [("italian", "new delhi"), ("sushi", "agra")]:
+        assert search_with_fallback(small, cuisine, city) == search_with_fallback(
+            full, cuisine, city
+        )
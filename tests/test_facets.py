@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+from src.data.catalog import rows_changed
+from src.dialog.manager import handle_turn
+from src.dialog.session import Session
+from src.models.preferences import AccessibilityNeeds, UserPreferences
+from src.reco.facets import popcount
+from src.reco.recommender import facet_counts, suggest_relaxation
+
+
+# yes / no / unknown accessibility flags
+TRISTATE = np.array([True, False, None], dtype=object)
+
+
+def _catalog(n=1000, seed=5):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "id": np.arange(n),
+            "name": [f"R{i}" for i in range(n)],
+            "city": rng.choice(
+                np.array(["Berlin", "Munich", "Hamburg", None], dtype=object), n
+            ),
+            "cuisine": rng.choice(["italian", "vegan", "thai"], n),
+            "price": "$$",
+            "rating": np.round(rng.uniform(2, 5, n), 1),
+            "access_wheelchair": rng.choice(TRISTATE, n),
+            "access_step_free": rng.choice(TRISTATE, n),
+            "access_restroom": rng.choice(TRISTATE, n),
+        }
+    )
+
+
+def _brute(df, prefs, drop=None):
+    ok = pd.Series(True, index=df.index)
+    for name in ("wheelchair", "step_free", "restroom"):
+        if getattr(prefs.accessibility, name) is True and name != drop:
+            ok &= df[f"access_{name}"].eq(True)
+    for name in ("city", "cuisine"):
+        if getattr(prefs, name) and name != drop:
+            ok &= df[name].str.lower() == getattr(prefs, name).lower()
+    return int(ok.sum())
+
+
+def test_facet_counts_match_brute_force():
+    df = _catalog()
+    assert popcount(np.packbits(np.ones(13, dtype=bool))) == 13
+    for city in (None, "Berlin", "munich", "Atlantis"):
+        for cuisine in (None, "Thai"):
+            for wheel, step in ((None, None), (True, None), (True, True)):
+                prefs = UserPreferences(
+                    city=city,
+                    cuisine=cuisine,
+                    accessibility=AccessibilityNeeds(wheel, step, True),
+                )
+                counts = facet_counts(df, prefs)
+                assert counts["matches"] == _brute(df, prefs)
+                for name, n in counts.items():
+                    if name != "matches":
+                        assert n == _brute(df, prefs, drop=name)
+
+
+def test_suggests_cheapest_relaxation_and_follows_edits():
+    df = _catalog(200)
+    prefs = UserPreferences(
+        city="Berlin",
+        cuisine="thai",
+        accessibility=AccessibilityNeeds(True, True, True),
+    )
+    df["access_step_free"] = False
+    counts = facet_counts(df, prefs)
+    assert counts["matches"] == 0 and counts["cuisine"] == 0
+    assert suggest_relaxation(df, prefs) == ("step_free", counts["step_free"])
+
+    first = int(np.flatnonzero(df["city"].eq("Berlin") & df["cuisine"].eq("thai"))[0])
+    df.loc[first, ["access_wheelchair", "access_step_free", "access_restroom"]] = True
+    rows_changed(df, [first])
+    assert facet_counts(df, prefs)["matches"] == 1
+    assert suggest_relaxation(df, prefs) is None
+
+
+def test_dialog_proposes_relaxation_then_applies_it():
+    df = _catalog(200)
+    df["access_step_free"] = False
+    prefs = UserPreferences(
+        city="Berlin",
+        cuisine="thai",
+        guests=2,
+        time="19:00",
+        accessibility=AccessibilityNeeds(
+            wheelchair=False, step_free=True, restroom=False
+        ),
+    )
+    session = Session("test", prefs=prefs)
+    reply, results = handle_turn(session, "recommend", df)
+    suggestion = suggest_relaxation(df, prefs)
+    assert suggestion is not None
+    n = suggestion[1]
+    assert results is None and f"entrances with steps, there are {n} matches" in reply
+    assert prefs.pending_relaxation == "step_free"
+
+    reply, results = handle_turn(session, "yes", df)
+    assert prefs.accessibility.step_free is False
+    assert results is not None and not results.empty
+    assert facet_counts(df, prefs)["matches"] == n
+
+
+def test_city_and_cuisine_without_hard_needs_still_rank():
+    df = _catalog(200)
+    prefs = UserPreferences(
+        city="Atlantis",
+        cuisine="thai",
+        guests=2,
+        time="19:00",
+        accessibility=AccessibilityNeeds(
+            wheelchair=False, step_free=False, restroom=False
+        ),
+    )
+    assert facet_counts(df, prefs)["matches"] == 0
+    _, results = handle_turn(Session("test", prefs=prefs), "recommend", df)
+    assert results is not None and not results.empty
+    assert prefs.pending_relaxation is None
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from src.models.preferences import AccessibilityNeeds, UserPreferences
+from src.reco.engine import RankingEngine, positions_to_frame
+from src.reco.group_rank import group_rank
+from src.reco.recommender import RESULT_COLS
+
+
+def _catalog():
+    return pd.DataFrame(
+        {
+            "id": [1, 2, 3, 4, 5],
+            "name": ["Trattoria", "Sushi Bar", "Curry House", "Pizzeria", "Taverna"],
+            "city": ["Berlin"] * 4 + ["Munich"],
+            "cuisine": ["italian", "japanese", "indian", "italian", "greek"],
+            "price": ["$$"] * 5,
+            "rating": [4.5, 4.4, 4.3, 4.35, 2.0],
+            "access_wheelchair": [False, True, True, True, False],
+            "access_step_free": [None] * 5,
+            "access_restroom": [None] * 5,
+        }
+    )
+
+
+def _member(cuisine, wheelchair=None):
+    return UserPreferences(
+        city="Berlin",
+        cuisine=cuisine,
+        accessibility=AccessibilityNeeds(wheelchair=wheelchair),
+    )
+
+
+def test_single_member_matches_individual_ranking():
+    df = _catalog()
+    for prefs in (_member("italian"), _member("indian", wheelchair=True)):
+        pos, scores = RankingEngine(df).rank(prefs, 3)
+        pd.testing.assert_frame_equal(
+            group_rank(df, [prefs], top_k=3),
+            positions_to_frame(df, pos, scores, RESULT_COLS),
+        )
+
+
+def test_union_applies_every_members_hard_needs():
+    df = _catalog()
+    group = [
+        _member("italian"),
+        _member("italian"),
+        _member("japanese", wheelchair=True),
+    ]
+    ids = group_rank(df, group, top_k=4)["id"].tolist()
+    assert 1 not in ids  # not wheelchair accessible
+    assert ids[0] == 4  # italian for the majority, accessible for everyone
+
+
+def test_least_misery_differs_from_average():
+    df = _catalog()
+    group = [_member("italian")] * 3 + [_member("japanese")]
+    avg = group_rank(df, group, top_k=1, strategy="average")["id"].tolist()
+    misery = group_rank(df, group, top_k=1, strategy="least_misery")["id"].tolist()
+    assert avg == [1]  # best for the italian majority
+    assert misery == [2]  # nobody is unhappy with it
+
+
+def test_large_identical_group_and_unknown_strategy():
+    df = _catalog()
+    many = [_member("japanese")] * 60
+    assert group_rank(df, many, top_k=1)["id"].tolist() == [2]
+    assert group_rank(df, [], top_k=3).empty
+    with pytest.raises(ValueError):
+        group_rank(df, many, strategy="loudest")
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from src.jeeves.recommender import ranker
+
+
+def _candidates(n=50, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "name": f"R{i}",
+            "distance_norm": float(rng.random()),
+            "rating_norm": float(rng.random()),
+            "price_norm": float(rng.random()),
+            "accessibility_norm": float(rng.random()),
+            "preference_fit_norm": float(rng.random()),
+            "distance_km": round(float(rng.uniform(0, 5)), 1),
+        }
+        for i in range(n)
+    ]
+
+
+def _loop_scores(cands, w):
+    # the original per-dict formula
+    return [
+        w["distance"] * (1.0 - c.get("distance_norm", 0.5))
+        + w["rating"] * c.get("rating_norm", 0.5)
+        + w["price"] * (1.0 - c.get("price_norm", 0.5))
+        + w["accessibility"] * c.get("accessibility_norm", 0.5)
+        + w["preference_fit"] * c.get("preference_fit_norm", 0.5)
+        for c in cands
+    ]
+
+
+def test_weights_come_from_app_yaml():
+    w = ranker.load_weights()
+    assert w["accessibility"] == 0.30 and w["distance"] == 0.25
+    assert ranker.load_weights() is w  # read once
+
+
+def test_rank_matches_loop_formula_for_all_input_types():
+    cands = _candidates()
+    cands[3].pop("price_norm")  # missing features count as 0.5
+    w = ranker.load_weights()
+    loop = np.array(_loop_scores(cands, w))
+    top = np.argsort(-loop, kind="stable")[:7]
+
+    df = pd.DataFrame(cands)
+    rec = df.drop(columns="name").to_records(index=False)
+    for data in (cands, df, rec):
+        out = ranker.rank(data, top_k=7)
+        assert [c["distance_km"] for c in out] == [cands[i]["distance_km"] for i in top]
+        assert np.allclose([c["score"] for c in out], loop[top])
+        assert set(out[0]["rationale"]) == {
+            "distance",
+            "rating",
+            "accessibility",
+            "preference_fit",
+        }
+    assert "score" not in cands[0]  # input left untouched
+
+
+def test_rank_keeps_input_order_on_ties():
+    cands = [{"name": n} for n in "abcde"]  # all features missing: equal scores
+    assert [c["name"] for c in ranker.rank(cands, top_k=3)] == ["a", "b", "c"]
+    assert ranker.rank([], top_k=3) == []
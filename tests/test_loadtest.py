@@ -0,0 +1,39 @@
+import anyio
+import httpx
+
+from src.jeeves.web import app as web
+from src.monitor import metrics
+from tests.test_web_app import _catalog
+from tools.loadtest import DEFAULT_SCRIPT, run_load
+
+USERS, DURATION_S, RPS = 4, 0.6, 100
+
+
+def test_scripted_load_against_in_process_app(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    app = web.create_app(df=_catalog(), asr_model="")
+
+    async def scenario():
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://t"
+            ) as http:
+                return await run_load(
+                    http, DEFAULT_SCRIPT, users=USERS, duration_s=DURATION_S, rps=RPS
+                )
+
+    rows = {r["endpoint"]: r for r in anyio.run(scenario)}
+    assert set(rows) == {
+        "POST /nlu/parse",
+        "POST /recs",
+        "POST /sessions/{id}/turn",
+        "DELETE /sessions/{id}",
+    }
+    assert all(r["error_rate"] == 0.0 for r in rows.values())
+    assert all(r["p50_ms"] <= r["p90_ms"] <= r["p99_ms"] for r in rows.values())
+    # paced: starts are 1/RPS apart, so at most RPS * DURATION_S slots fall
+    # in the run (+1 for the slot at its start), and each user may take one
+    # more that it was already waiting for when time ran out
+    total = sum(r["requests"] for r in rows.values())
+    assert USERS <= total <= RPS * DURATION_S + 1 + USERS
@@ -0,0 +1,101 @@
+import json
+import threading
+from collections import deque
+
+from fastapi.testclient import TestClient
+
+from src.jeeves.web import app as web
+from src.monitor import metrics
+from src.monitor.metrics import Registry
+from tests.test_web_app import _catalog
+
+
+def test_counters_and_histograms_sum_across_threads():
+    reg = Registry(buckets=(1, 10, 100))
+
+    def work():
+        for i in range(1000):
+            reg.inc("calls_total", kind="x")
+            reg.observe("call_ms", i % 200)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    reg.set("depth", 3, queue="q")
+
+    snap = reg.snapshot()
+    assert snap["counters"][("calls_total", (("kind", "x"),))] == 4000
+    counts, total = snap["histograms"][("call_ms", ())]
+    # each of 0..199 observed 5 times per thread; buckets are upper-inclusive
+    assert counts == [20 * 2, 20 * 9, 20 * 90, 20 * 99]
+    assert total == 4 * 5 * sum(range(200))
+
+    text = reg.exposition()
+    assert "# TYPE calls_total counter" in text
+    assert 'calls_total{kind="x"} 4000' in text
+    assert 'depth{queue="q"} 3' in text
+    assert 'call_ms_bucket{le="10"} 220' in text
+    assert 'call_ms_bucket{le="+Inf"} 4000' in text
+    assert "call_ms_count 4000" in text
+
+    reg.reset()
+    assert reg.exposition() == "\n"
+
+
+def test_events_are_buffered_then_flushed_to_the_path_at_log_time(
+    tmp_path, monkeypatch
+):
+    first, second = tmp_path / "a" / "metrics.log", tmp_path / "b.log"
+    monkeypatch.setattr(metrics, "FLUSH_INTERVAL_S", 3600.0)
+    monkeypatch.setattr(metrics, "LOG_PATH", str(first))
+    out, ms = metrics.timed(sum, [1, 2, 3])
+    metrics.log_event("hello", n=1)
+    monkeypatch.setattr(metrics, "LOG_PATH", str(second))
+    metrics.log_event("bye")
+    assert out == 6 and ms >= 0
+    assert not first.exists()  # nothing written on the calling thread
+
+    metrics.flush()
+    lines = [json.loads(line) for line in first.read_text().splitlines()]
+    assert lines[0]["fn"] == "sum"
+    assert lines[1]["event"] == "hello" and lines[1]["n"] == 1
+    assert lines[0]["ts"] <= lines[1]["ts"]
+    assert json.loads(second.read_text())["event"] == "bye"
+    counters = metrics.REGISTRY.snapshot()["counters"]
+    assert counters[("events_total", (("event", "hello"),))] >= 1
+
+
+def test_metrics_endpoint_exposes_request_latency_and_queue_gauges(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    with TestClient(web.create_app(df=_catalog(), asr_model="")) as client:
+        recs = client.post("/recs", json={"text": "italian in Berlin"})
+        assert recs.status_code == 200
+        text = client.get("/metrics").text
+    assert 'http_request_ms_count{method="POST",route="/recs",status="200"}' in text
+    assert 'queue_wait_ms_count{queue="dialog"}' in text
+    assert 'queue_depth{queue="dialog"} 0' in text
+    assert "sessions_active 0" in text
+
+
+def test_flush_survives_unwritable_logs_and_odd_fields(tmp_path, monkeypatch):
+    blocked, good = tmp_path / "blocked", tmp_path / "metrics.log"
+    blocked.write_text("")  # a file where the log directory should be
+    monkeypatch.setattr(metrics, "FLUSH_INTERVAL_S", 3600.0)
+    monkeypatch.setattr(metrics, "REGISTRY", Registry())
+    monkeypatch.setattr(metrics, "LOG_PATH", str(blocked / "metrics.log"))
+    metrics.log_event("lost")
+    monkeypatch.setattr(metrics, "LOG_PATH", str(good))
+    metrics.log_event("kept", path=tmp_path)  # not JSON-serializable as is
+    metrics.flush()
+    assert json.loads(good.read_text())["path"] == str(tmp_path)
+
+    monkeypatch.setattr(metrics, "_EVENTS", deque(maxlen=2))
+    for i in range(3):
+        metrics.log_event("burst", i=i)
+    assert [rec["i"] for _, rec in metrics._EVENTS] == [1, 2]
+    counters = metrics.REGISTRY.snapshot()["counters"]
+    assert counters[("events_dropped_total", ())] == 2  # one unwritable, one evicted
@@ -0,0 +1,57 @@
+import pandas as pd
+from src.places_local import _ascii_lower, search_near, search_with_fallback
+
+
+def _df():
+    rows = [
+        # name, city, cuisines, lat, lng
+        ("Pasta Uno", "Berlin", "Italian", 52.52, 13.40),
+        ("Curry 36", "Berlin", "German, Street Food", 52.49, 13.39),
+        ("Sushi Potsdam", "Potsdam", "Japanese, Sushi", 52.39, 13.06),
+        ("Sushi Munich", "Munich", "Sushi", 48.14, 11.58),
+        ("Tapas Madrid", "Madrid", "Spanish", 40.42, -3.70),
+        ("Lost Row", "Nowhere", "Sushi", 0.0, 0.0),
+    ]
+    df = pd.DataFrame(
+        [
+            {
+                "Restaurant Name": n,
+                "City": c,
+                "Cuisines": cu,
+                "Average Cost for two": 20,
+                "Aggregate rating": 4.0,
+                "Address": f"{n} street",
+                "Latitude": lat,
+                "Longitude": lng,
+            }
+            for n, c, cu, lat, lng in rows
+        ]
+    )
+    df["cuis_norm"] = df["Cuisines"].apply(_ascii_lower)
+    df["city_norm"] = df["City"].apply(_ascii_lower)
+    return df
+
+
+def test_nearest_city_fallback_picks_closest_city_serving_cuisine():
+    out = search_with_fallback(_df(), "sushi", "Berlin")
+    assert out["fallback"] == {"type": "nearest_city", "city": "Potsdam"}
+    assert [r["name"] for r in out["results"]] == ["Sushi Potsdam"]
+
+
+def test_unknown_city_falls_back_to_global_cuisine():
+    out = search_with_fallback(_df(), "sushi", "Atlantis")
+    assert out["fallback"] == {"type": "global_cuisine"}
+
+
+def test_exact_match_has_no_fallback():
+    out = search_with_fallback(_df(), "italian", "Berlin")
+    assert out["fallback"] is None
+
+
+def test_search_near_radius_nearest_first():
+    names = [r["name"] for r in search_near(_df(), 52.50, 13.39, radius_km=5)]
+    assert names == ["Curry 36", "Pasta Uno"]
+    assert (
+        search_near(_df(), 52.50, 13.39, radius_km=50, cuisine="sushi")[0]["name"]
+        == "Sushi Potsdam"
+    )
@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.dialog.manager import handle_turn
+from src.dialog.session import Session
+from src.models.preferences import AccessibilityNeeds, UserPreferences
+from src.monitor import metrics
+from src.reco.prefetch import Prefetcher, PREFETCHER
+from src.reco.recommender import _filter_and_rank_pandas, filter_and_rank
+from src.reco.state import session_state
+
+
+def _catalog(n=500, seed=11):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "id": np.arange(n),
+            "name": [f"R{i}" for i in range(n)],
+            "city": rng.choice(["Berlin", "Munich"], n),
+            "cuisine": rng.choice(["italian", "vegan", "thai"], n),
+            "price": "$$",
+            "rating": np.round(rng.uniform(2, 5, n), 1),
+            "access_wheelchair": rng.choice([True, False], n),
+            "access_step_free": rng.choice([True, False], n, p=[0.05, 0.95]),
+            "access_restroom": rng.choice([True, False], n),
+        }
+    )
+
+
+def test_time_answer_is_a_prefetch_hit(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    df = _catalog()
+    prefs = UserPreferences(
+        city="Berlin",
+        cuisine="vegan",
+        guests=2,
+        accessibility=AccessibilityNeeds(
+            wheelchair=True, step_free=False, restroom=False
+        ),
+    )
+    session = Session("test", prefs=prefs)
+    hits = PREFETCHER.hits
+    reply, _ = handle_turn(session, "hi", df)
+    assert reply.startswith("What time?")  # asked while ranking in the background
+
+    reply, results = handle_turn(session, "19:00", df)
+    assert PREFETCHER.hits == hits + 1 and results is not None
+    expected = _filter_and_rank_pandas(df, prefs, 5)
+    assert results["id"].tolist() == expected["id"].tolist()
+    metrics.flush()
+    event = json.loads((tmp_path / "metrics.log").read_text().splitlines()[-1])
+    assert event["event"] == "prefetch" and event["hit"] is True
+    assert event["saved_ms"] >= 0
+
+
+def test_changed_answer_is_a_miss_with_the_same_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    df = _catalog()
+    prefetcher = Prefetcher()
+    prefs = UserPreferences(city="Munich", accessibility=AccessibilityNeeds())
+    # a "yes" to step-free would keep ~5% of the rows: not worth prefetching
+    assert not prefetcher.worth_it(df, prefs, "step_free")
+    assert prefetcher.worth_it(df, prefs, "wheelchair")
+    assert prefetcher.worth_it(df, prefs, "cuisine")
+
+    prefetcher.submit(df, prefs, 5)
+    prefetcher.submit(df, prefs, 5)  # same query: no second job
+    prefs.cuisine = "thai"
+    prefs.accessibility.wheelchair = True
+    prefetcher.collect(df, prefs, 5)
+    prefetcher.collect(df, prefs, 5)  # nothing left to collect
+    assert prefetcher.stats()["misses"] == 1 and prefetcher.stats()["hits"] == 0
+    # the prefetched state re-scores to the same answer as a cold ranking
+    got = filter_and_rank(df, prefs, 5, state=session_state(prefs))
+    assert got["id"].tolist() == _filter_and_rank_pandas(df, prefs, 5)["id"].tolist()
@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.jeeves.web import app as web
+from src.monitor import metrics, profiler
+from src.monitor.profiler import SamplingProfiler
+from tests.test_web_app import _catalog
+
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(200))
+
+
+def test_sampler_sees_busy_worker_threads_and_skips_idle_ones(tmp_path):
+    parked = threading.Event()
+    idle = threading.Thread(target=parked.wait, name="idle-worker", daemon=True)
+    busy = threading.Thread(target=_spin, args=(0.3,), name="busy-worker")
+    idle.start()
+    prof = SamplingProfiler(hz=200).start()
+    busy.start()
+    busy.join()
+    profile = prof.stop()
+    parked.set()
+
+    threads = {thread for thread, _ in profile.stacks}
+    assert "busy-worker" in threads and "idle-worker" not in threads
+    assert profile.samples >= 20
+    spin = sum(n for (t, stack), n in profile.stacks.items() if "_spin" in stack[-1])
+    assert spin >= 20
+
+    collapsed, speedscope = profile.write("run", str(tmp_path))
+    lines = open(collapsed).read().splitlines()
+    assert any(
+        line.startswith("busy-worker;") and "_spin (test_profiler.py:" in line
+        for line in lines
+    )
+    doc = json.load(open(speedscope))
+    assert doc["$schema"].startswith("https://www.speedscope.app/")
+    (busy_profile,) = [p for p in doc["profiles"] if p["name"] == "busy-worker"]
+    assert len(busy_profile["samples"]) == len(busy_profile["weights"])
+    names = {f["name"] for f in doc["shared"]["frames"]}
+    assert "_spin" in names
+
+
+def test_turn_bounded_session_writes_profiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    profiler.turn_done()  # no session: a no-op
+    status = profiler.start_profile(turns=2, hz=200, root=str(tmp_path), reason="test")
+    assert status["running"] and status["turns"] == 2
+    for _ in range(2):
+        _spin(0.05)
+        profiler.turn_done()
+    # the session is already ending: this just waits for the files
+    files = profiler.stop_profile(timeout=5.0)
+    last = profiler.status()["last"]
+    assert not profiler.status()["running"] and last["name"].endswith("-test")
+    assert last["files"] == files
+    assert [p.rsplit("/", 1)[-1].split(".", 1)[1] for p in files] == [
+        "collapsed",
+        "speedscope.json",
+    ]
+    assert all(p.startswith(str(tmp_path)) and open(p).read() for p in files)
+
+
+def test_admin_endpoint_starts_and_stops_a_session(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    with TestClient(web.create_app(df=_catalog(), asr_model="")) as client:
+        assert client.post("/admin/profile", json={"seconds": 5}).status_code == 404
+    with TestClient(web.create_app(df=_catalog(), asr_model="", admin=True)) as client:
+        started = client.post("/admin/profile", json={"seconds": 5, "hz": 200})
+        assert started.status_code == 202 and started.json()["running"]
+        assert client.post("/admin/profile", json={"seconds": 5}).status_code == 409
+        client.post("/recs", json={"text": "italian in Berlin"})
+        stopped = client.delete("/admin/profile").json()
+    assert not stopped["running"]
+    assert all(p.startswith(str(tmp_path)) for p in stopped["last"]["files"])
+
+
+def test_rate_and_spec_are_read_when_a_session_starts(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("JEEVES_PROFILE_HZ", "250")
+    assert profiler.start_from_spec(" 0 ") is None
+    status = profiler.start_from_spec("5turns", reason="test")
+    assert status is not None and status["hz"] == 250 and status["turns"] == 5
+    profiler.stop_profile(timeout=5.0)
+
+    import run_local
+
+    assert run_local.parse_args(["--profile", "30s"]).profile == "30s"
+    assert run_local.parse_args([]).profile is None
+    with pytest.raises(SystemExit):
+        run_local.parse_args(["--profile", "soon"])
+
+
+def test_keyboard_loop_ends_a_turn_bounded_session(tmp_path, monkeypatch):
+    import run_local
+
+    log = tmp_path / "metrics.log"
+    monkeypatch.setattr(metrics, "LOG_PATH", str(log))
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(run_local, "USE_PIPELINE", False)
+    monkeypatch.setattr(run_local, "warm_up_in_background", lambda: None)
+    monkeypatch.setattr(run_local, "speak", lambda text, wait=False: None)
+    monkeypatch.setattr(run_local, "catalog", _catalog)
+    answers = iter(["italian", "in Berlin", "quit"])
+    monkeypatch.setattr(run_local, "ask_user", lambda slot=None: next(answers))
+    monkeypatch.setattr(
+        run_local, "handle_session_turn", lambda sid, text, df: (f"ok {text}", None)
+    )
+
+    run_local.main(["--profile", "2turns"])
+
+    assert not profiler.status()["running"]
+    files = profiler.status()["last"]["files"]
+    assert files and all(p.startswith(str(tmp_path)) for p in files)
+    metrics.flush()
+    records = [json.loads(line) for line in log.read_text().splitlines()]
+    (written,) = [r for r in records if r.get("event") == "profile_written"]
+    assert written["turns"] == 2
+
+
+def test_a_failed_write_still_ends_the_session(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    blocked = tmp_path / "not-a-dir"
+    blocked.write_text("")
+    profiler.start_profile(seconds=5, root=str(blocked), reason="test")
+    assert profiler.stop_profile(timeout=5.0) == []
+    assert not profiler.status()["running"]
+    status = profiler.start_profile(seconds=5, root=str(tmp_path), reason="test")
+    assert status["running"]
+    assert profiler.stop_profile(timeout=5.0)
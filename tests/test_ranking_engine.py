@@ -0,0 +1,122 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from src.data.loader import ACCESS_COLS, compact_dtypes
+from src.models.preferences import AccessibilityNeeds, UserPreferences
+from src.reco.engine import RankingEngine, positions_to_frame, top_k_order
+from src.reco.recommender import (
+    RESULT_COLS,
+    _filter_and_rank_pandas,
+    filter_and_rank,
+    rank_many,
+)
+
+
+# yes / no / unknown accessibility flags
+TRISTATE = np.array([True, False, None], dtype=object)
+
+
+def _catalog(n=600, seed=1):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "id": np.arange(n),
+            "name": [f"R{i}" for i in range(n)],
+            "city": rng.choice(["Berlin", "Munich", "Hamburg"], n).astype(object),
+            "cuisine": rng.choice(["Italian", "vegan", "Thai"], n),
+            "price": "$$",
+            "rating": np.round(rng.uniform(2, 5, n), 1),
+            "rating_count": rng.integers(0, 300, n),
+            "access_wheelchair": rng.choice(TRISTATE, n),
+            "access_step_free": rng.choice(TRISTATE, n, p=[0.05, 0.7, 0.25]),
+            "access_restroom": rng.choice(TRISTATE, n),
+        }
+    )
+    df.loc[rng.random(n) < 0.05, "rating"] = np.nan
+    df.loc[rng.random(n) < 0.05, "city"] = None
+    return df
+
+
+def _assert_engine_matches(df):
+    engine = RankingEngine(df)
+    for city, cuisine, w, s, r, k in itertools.product(
+        [None, "berlin", "Atlantis"],
+        [None, "italian"],
+        [None, True, False],
+        [None, True],
+        [None, True],
+        [1, 10, 1000],
+    ):
+        prefs = UserPreferences(
+            city=city, cuisine=cuisine, accessibility=AccessibilityNeeds(w, s, r)
+        )
+        pos, scores = engine.rank(prefs, k)
+        pd.testing.assert_frame_equal(
+            positions_to_frame(df, pos, scores, RESULT_COLS),
+            _filter_and_rank_pandas(df, prefs, k),
+            check_exact=True,
+        )
+
+
+def test_engine_matches_pandas_ranking():
+    _assert_engine_matches(_catalog())
+
+
+def test_engine_matches_on_compact_catalog():
+    df = compact_dtypes(
+        _catalog(),
+        categorical=["city", "cuisine", "price"],
+        float32=["rating"],
+        int32=["id", "rating_count"],
+        flags=ACCESS_COLS,
+    )
+    _assert_engine_matches(df)
+
+
+def test_engine_falls_back_when_hard_filters_match_nothing():
+    df = compact_dtypes(_catalog(n=50), flags=ACCESS_COLS)
+    df["access_step_free"] = False
+    df["access_step_free"] = df["access_step_free"].astype("boolean")
+    prefs = UserPreferences(
+        cuisine="vegan", accessibility=AccessibilityNeeds(step_free=True)
+    )
+    pos, scores = RankingEngine(df).rank(prefs, 5)
+    ref = _filter_and_rank_pandas(df, prefs, 5)
+    assert list(df["id"].to_numpy()[pos]) == list(ref["id"])
+    assert np.array_equal(scores, ref["score"].to_numpy())
+
+
+def test_top_k_order_ties_and_nan():
+    scores = np.array([0.5, np.nan, 0.9, 0.5, 0.5, 0.1])
+    assert list(top_k_order(scores, 3)) == [2, 0, 3]
+    assert list(top_k_order(scores, 6)) == [2, 0, 3, 4, 5, 1]
+    assert list(top_k_order(scores, 0)) == []
+
+
+def test_rank_many_matches_single_profile_ranking():
+    df = _catalog()
+    profiles = [
+        UserPreferences(
+            city=city, cuisine=cuisine, accessibility=AccessibilityNeeds(w, s, r)
+        )
+        for city, cuisine, w, s, r in itertools.product(
+            [None, "Munich", "Atlantis"],
+            [None, "VEGAN"],
+            [None, True],
+            [None, True],
+            [None, False],
+        )
+    ]
+    engine = RankingEngine(df)
+    engine_many = engine.rank_many(profiles, 7)
+    assert len(engine_many) == len(profiles)
+    for prefs, (pos, scores) in zip(profiles, engine_many):
+        ref_pos, ref_scores = engine.rank(prefs, 7)
+        assert np.array_equal(pos, ref_pos)
+        assert np.array_equal(scores, ref_scores, equal_nan=True)
+
+    frames = rank_many(df, profiles[:4], top_k=3)
+    for prefs, got in zip(profiles[:4], frames):
+        pd.testing.assert_frame_equal(got, filter_and_rank(df, prefs, top_k=3))
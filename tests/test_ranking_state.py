@@ -0,0 +1,70 @@
+import gc
+
+import numpy as np
+import pandas as pd
+
+from src.models.preferences import AccessibilityNeeds, UserPreferences
+from src.reco import state as state_mod
+from src.reco.engine import RankingEngine
+from src.reco.state import RankingState, session_state
+
+
+# yes / no / unknown accessibility flags
+TRISTATE = np.array([True, False, None], dtype=object)
+
+
+def _catalog(n=800, seed=3):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "id": np.arange(n),
+            "name": [f"R{i}" for i in range(n)],
+            "city": rng.choice(
+                np.array(["Berlin", "Munich", "Hamburg", None], dtype=object), n
+            ),
+            "cuisine": rng.choice(["italian", "vegan", "thai"], n),
+            "price": "$$",
+            "rating": np.round(rng.uniform(2, 5, n), 1),
+            "access_wheelchair": rng.choice(TRISTATE, n),
+            "access_step_free": rng.choice(TRISTATE, n, p=[0.02, 0.8, 0.18]),
+            "access_restroom": rng.choice(TRISTATE, n),
+        }
+    )
+
+
+def test_one_slot_turns_match_full_ranking():
+    engine = RankingEngine(_catalog())
+    state = RankingState()
+    prefs = UserPreferences(accessibility=AccessibilityNeeds())
+    turns = [
+        ("city", "Berlin"),
+        ("cuisine", "Italian"),
+        ("wheelchair", True),
+        ("cuisine", "thai"),  # "try another cuisine"
+        ("restroom", True),
+        ("step_free", True),  # likely nothing left: fallback
+        ("step_free", None),  # relax
+        ("wheelchair", False),
+        ("city", "Atlantis"),
+    ]
+    for slot, value in turns:
+        target = prefs if slot in ("city", "cuisine") else prefs.accessibility
+        setattr(target, slot, value)
+        for k in (5, 3):
+            pos, scores = state.rank(engine, prefs, k)
+            ref_pos, ref_scores = engine.rank(prefs, k)
+            assert np.array_equal(pos, ref_pos)
+            assert np.array_equal(scores, ref_scores, equal_nan=True)
+    # the k=3 repeat of each turn is a prefix of the k=5 answer: no extra work
+    assert state.reranks == len(turns)
+
+
+def test_session_state_follows_the_prefs_object():
+    a, b = UserPreferences(), UserPreferences()
+    assert session_state(a) is session_state(a)
+    assert session_state(a) is not session_state(b)
+
+    key = id(b)
+    del b
+    gc.collect()
+    assert key not in state_mod._STATES
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from src.data.catalog import rows_changed
+from src.models.preferences import AccessibilityNeeds, UserPreferences
+from src.reco.cache import RESULT_CACHE, ResultCache, ranking_key
+from src.reco.recommender import filter_and_rank
+
+
+def _catalog():
+    return pd.DataFrame(
+        {
+            "id": [1, 2, 3, 4],
+            "name": ["A", "B", "C", "D"],
+            "city": ["Berlin", "Berlin", "Munich", "Berlin"],
+            "cuisine": ["italian", "thai", "italian", "italian"],
+            "price": ["$$"] * 4,
+            "rating": [4.5, 3.0, 3.5, 4.0],
+            "access_wheelchair": [True, None, True, False],
+            "access_step_free": [None, None, None, None],
+            "access_restroom": [None, None, None, None],
+        }
+    )
+
+
+def test_key_normalizes_ranking_fields():
+    a = UserPreferences(city="Berlin ", cuisine="Italian")
+    b = UserPreferences(
+        city="berlin",
+        cuisine="italian",
+        accessibility=AccessibilityNeeds(restroom=False),
+    )
+    c = UserPreferences(
+        city="berlin",
+        cuisine="italian",
+        accessibility=AccessibilityNeeds(wheelchair=True),
+    )
+    assert ranking_key(a, 5) == ranking_key(b, 5)
+    assert ranking_key(a, 5) != ranking_key(c, 5)
+    assert ranking_key(a, 5) != ranking_key(a, 3)
+
+
+def test_repeated_query_is_served_from_cache():
+    df = _catalog()
+    prefs = UserPreferences(city="Berlin", cuisine="Italian")
+    first = filter_and_rank(df, prefs, top_k=3)
+    hits = RESULT_CACHE.hits
+    again = filter_and_rank(
+        df, UserPreferences(city="berlin", cuisine="italian"), top_k=3
+    )
+    assert RESULT_CACHE.hits == hits + 1
+    pd.testing.assert_frame_equal(first, again)
+
+
+def test_catalog_change_invalidates_entries():
+    df = _catalog()
+    prefs = UserPreferences(city="Berlin", cuisine="Italian")
+    assert filter_and_rank(df, prefs, top_k=1)["id"].tolist() == [1]
+    df.loc[3, "rating"] = 5.0
+    rows_changed(df, [3])
+    assert filter_and_rank(df, prefs, top_k=1)["id"].tolist() == [4]
+
+
+def test_lru_bound_and_ttl():
+    now = [0.0]
+    cache = ResultCache(maxsize=2, ttl_s=10, clock=lambda: now[0])
+    value = (np.array([0]), np.array([1.0]))
+    cache.put("a", value)
+    cache.put("b", value)
+    assert cache.get("a") is value  # "b" is now least recently used
+    cache.put("c", value)
+    assert cache.get("b") is None
+    now[0] = 11.0
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["evictions"], stats["expired"], stats["size"]) == (1, 1, 1)
@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.dialog.manager import _load_into, handle_session_turn
+from src.dialog.session import SessionStore
+from src.models.preferences import AccessibilityNeeds, UserPreferences
+from src.monitor import metrics
+
+CITIES = ["Berlin", "Munich", "Hamburg", "Cologne", "Leipzig"]
+
+
+def _catalog(n=300, seed=2):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "id": np.arange(n),
+            "name": [f"R{i}" for i in range(n)],
+            "city": rng.choice(CITIES, n),
+            "cuisine": rng.choice(["italian", "greek", "thai"], n),
+            "price": "$$",
+            "rating": np.round(rng.uniform(2, 5, n), 1),
+            "access_wheelchair": rng.choice([True, False], n),
+            "access_step_free": rng.choice([True, False], n),
+            "access_restroom": rng.choice([True, False], n),
+        }
+    )
+
+
+def test_store_evicts_lru_and_expires_idle_sessions():
+    now = [0.0]
+    store = SessionStore(maxsize=2, idle_ttl_s=10, clock=lambda: now[0])
+    a = store.get("a")
+    store.get("b")
+    assert store.get("a") is a
+    store.get("c")  # full: "b" is the least recently used
+    assert store.peek("b") is None and store.peek("a") is a
+    now[0] = 11.0
+    assert store.peek("a") is None  # idle too long
+    assert store.get("a") is not a
+    assert store.stats() == {"size": 1, "created": 4, "evictions": 1, "expired": 2}
+    with pytest.raises(AttributeError):
+        setattr(UserPreferences(), "extra", 1)  # __slots__: no per-instance dict
+
+
+def test_thousands_of_concurrent_sessions_stay_isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    df = _catalog()
+    store = SessionStore()
+    n = 2000
+
+    def converse(i):
+        sid = f"s{i}"
+        if i % 10 == 0:  # some sessions are in group mode meanwhile
+            handle_session_turn(sid, "start group of 2", df, store)
+            return handle_session_turn(sid, "add", df, store)
+        handle_session_turn(sid, f"italian in {CITIES[i % 5]}", df, store)
+        return handle_session_turn(sid, "yes", df, store)
+
+    with ThreadPoolExecutor(8) as pool:
+        replies = list(pool.map(converse, range(n)))
+
+    assert len(store) == n
+    for i, (reply, _) in enumerate(replies):
+        session = store.peek(f"s{i}")
+        assert session is not None
+        if i % 10 == 0:
+            assert session.group.active and len(session.group.members) == 1
+            assert session.prefs.city is None
+        else:
+            assert session.prefs.city == CITIES[i % 5].lower()
+            assert session.prefs.accessibility.wheelchair is True
+            assert session.prefs.pending_access_slot == "step_free"
+            assert not session.group.active
+
+
+def test_loading_stored_prefs_keeps_the_sessions_dialog_state():
+    prefs = UserPreferences(city="Munich", pending_required_slot="guests")
+    stored = UserPreferences(
+        city="Berlin",
+        cuisine="thai",
+        pending_access_slot="restroom",
+        pending_relaxation="city",
+    )
+    stored.accessibility = {"wheelchair": True}  # type: ignore[assignment]
+    _load_into(prefs, stored)
+    assert (prefs.city, prefs.cuisine) == ("Berlin", "thai")
+    assert prefs.accessibility == AccessibilityNeeds(wheelchair=True)
+    assert prefs.pending_required_slot == "guests"
+    assert prefs.pending_access_slot is None and prefs.pending_relaxation is None
@@ -0,0 +1,72 @@
+import gzip
+import json
+
+import numpy as np
+
+from src.monitor import metrics
+from src.monitor.sketch import QuantileSketch
+from tools.summarize_metrics import parse_time, summarize
+
+
+def test_sketch_quantiles_are_within_relative_accuracy_and_merge():
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(mean=4, sigma=1, size=20_000)
+    halves = QuantileSketch(), QuantileSketch()
+    for i, v in enumerate(values):
+        halves[i % 2].add(float(v))
+    merged, other = halves
+    merged.merge(other)
+    assert merged.count == len(values) and len(merged.buckets) < 1000
+    for q in (0.5, 0.9, 0.99):
+        exact = np.quantile(values, q, method="lower")
+        assert abs(merged.quantile(q) - exact) <= 0.02 * exact
+    assert merged.quantile(1.0) == values.max()
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def rank():
+    return None
+
+
+def test_log_rotates_and_summary_streams_across_files(tmp_path, monkeypatch):
+    log = tmp_path / "metrics.log"
+    monkeypatch.setattr(metrics, "LOG_PATH", str(log))
+    monkeypatch.setattr(metrics, "MAX_BYTES", 2_000)
+    monkeypatch.setattr(metrics, "BACKUPS", 2)
+    for _ in range(4):
+        for i in range(30):
+            metrics.log_event(
+                "turn_latency", asr_ms=100 + i, respond_ms=50, first_audio_ms=900
+            )
+            metrics.timed(rank)
+        metrics.flush()
+
+    files = metrics.log_files(str(log))
+    assert files == [f"{log}.2.gz", f"{log}.1.gz", str(log)]  # the oldest dropped off
+    with gzip.open(files[0], "rt") as f:
+        assert json.loads(f.readline())["event"] == "turn_latency"
+
+    report = summarize(files).report()
+    kept = report["records"]
+    assert 0 < kept < 240 and kept % 2 == 0
+    assert report["events"]["turn_latency"] == kept // 2
+    stage = report["stages"]["turn_latency.asr_ms"]
+    assert stage["count"] == kept // 2 and 100 <= stage["p50"] <= 129
+    assert report["functions"]["rank"]["count"] == kept // 2
+
+
+def test_time_window_filters_by_timestamp(tmp_path):
+    log = tmp_path / "metrics.log"
+    rows = [
+        {"ts": 1000.0, "fn": "f", "latency_ms": 1.0},
+        {"ts": 2000.0, "fn": "f", "latency_ms": 2.0},
+        {"fn": "f", "latency_ms": 3.0},  # written before timestamps
+        {"ts": 3000.0, "event": "booking_attempt", "success": True},
+    ]
+    log.write_text("\n".join(json.dumps(r) for r in rows) + "\n{torn")
+    assert summarize([str(log)]).report()["functions"]["f"]["count"] == 3
+    windowed = summarize([str(log)], since=1500, until=3000).report()
+    assert windowed["functions"]["f"]["count"] == 1
+    assert windowed["bookings"] == {"total": 1, "success": 1, "rate": 1.0}
+    assert parse_time("2h", now=10_000.0) == 10_000.0 - 7200
+    assert parse_time("1500") == 1500.0
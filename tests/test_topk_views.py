@@ -0,0 +1,73 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from src.data.catalog import rows_changed
+from src.models.preferences import AccessibilityNeeds, UserPreferences
+from src.reco.engine import RankingEngine
+from src.reco.recommender import (
+    RankingViews,
+    _filter_and_rank_pandas,
+    filter_and_rank,
+    ranking_views,
+)
+from src.reco.views import view_stats
+
+
+# yes / no / unknown accessibility flags
+TRISTATE = np.array([True, False, None], dtype=object)
+
+
+def _catalog(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "id": np.arange(n),
+            "name": [f"R{i}" for i in range(n)],
+            "city": rng.choice(["Berlin", "Munich", "Hamburg"], n),
+            "cuisine": rng.choice(["italian", "Japanese", "indian", "vegan"], n),
+            "price": "$$",
+            "rating": np.round(rng.uniform(2, 5, n), 1),
+            "access_wheelchair": rng.choice(TRISTATE, n),
+            "access_step_free": rng.choice(TRISTATE, n, p=[0.1, 0.6, 0.3]),
+            "access_restroom": rng.choice(TRISTATE, n),
+        }
+    )
+
+
+def test_view_answers_match_full_ranking():
+    df = _catalog()
+    for city, cuisine, wheel, step, k in itertools.product(
+        [None, "Berlin", " munich "],
+        [None, "japanese", "thai"],
+        [None, True],
+        [None, True],
+        [1, 5, 80],
+    ):
+        prefs = UserPreferences(
+            city=city,
+            cuisine=cuisine,
+            accessibility=AccessibilityNeeds(wheelchair=wheel, step_free=step),
+        )
+        pd.testing.assert_frame_equal(
+            filter_and_rank(df, prefs, top_k=k),
+            _filter_and_rank_pandas(df, prefs, top_k=k),
+            check_exact=True,
+        )
+    stats = view_stats()["ranking"]
+    assert stats["hits"] > 0 and 0.0 < stats["hit_rate"] <= 1.0
+
+
+def test_views_refresh_incrementally_on_row_change():
+    df = _catalog()
+    views = ranking_views(df)
+    df.loc[7, ["rating", "cuisine"]] = [4.9, "vegan"]
+    df.loc[8, "city"] = "Berlin"
+    rows_changed(df, [7, 8])
+
+    assert ranking_views(df) is views  # refreshed in place, not rebuilt
+    fresh = RankingViews(RankingEngine(df))
+    assert fresh.views.views.keys() == views.views.views.keys()
+    for key, rows in fresh.views.views.items():
+        assert np.array_equal(rows, views.views.views[key])
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import time
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from src.dialog.pipeline import TurnPipeline
+from src.jeeves.web import app as web
+from src.monitor import metrics, tracing
+from src.monitor.tracing import span, traced
+from tests.test_web_app import _catalog
+
+STAGES = ("capture", "asr", "respond", "ranking", "sentiment", "format", "tts")
+
+
+@traced("ranking")
+def _rank(text):
+    time.sleep(0.01)
+    return pd.DataFrame({"name": [text.upper()]})
+
+
+def test_disabled_tracing_records_nothing(monkeypatch):
+    monkeypatch.setattr(tracing, "ENABLED", False)
+    tracing.clear()
+    with span("outer") as s:
+        assert s is None
+        assert _rank("x")["name"][0] == "X"
+    assert tracing.spans() == []
+
+    t0 = time.perf_counter()
+    for _ in range(100_000):
+        with span("hot"):
+            pass
+    assert time.perf_counter() - t0 < 1.0  # ~1 us per span, generously
+
+
+def test_spans_nest_across_threads_and_export_as_chrome_json(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "ENABLED", True)
+    tracing.clear()
+
+    async def turn():
+        with span("respond", lane="respond", turn=1) as root:
+            await asyncio.to_thread(_rank, "thai")
+        return root
+
+    root = asyncio.run(turn())
+    with span("other"):
+        pass
+
+    (rank,) = [s for s in tracing.spans(root.trace_id) if s.name == "ranking"]
+    assert rank.parent_id == root.span_id and rank.lane == "respond"
+    assert root.start_ns <= rank.start_ns and rank.end_ns <= root.end_ns
+    assert tracing.breakdown(root.trace_id)["ranking"] >= 10
+    assert len({s.trace_id for s in tracing.spans()}) == 2
+
+    n = tracing.export_chrome(str(tmp_path / "t.json"))
+    events = json.loads((tmp_path / "t.json").read_text())["traceEvents"]
+    assert n == 3
+    complete = {e["name"]: e for e in events if e["ph"] == "X"}
+    assert complete["respond"]["args"] == {"trace_id": root.trace_id, "turn": 1}
+    assert complete["respond"]["tid"] == complete["ranking"]["tid"]
+    assert complete["ranking"]["dur"] >= 10_000  # microseconds
+    names = {e["args"]["name"] for e in events if e["ph"] == "M"}
+    assert "respond" in names
+
+
+def test_pipeline_records_one_trace_per_turn(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    monkeypatch.setattr(tracing, "ENABLED", True)
+    tracing.clear()
+    utterances = iter(["thai", "pizza"])
+    pipeline = TurnPipeline(
+        capture=lambda: next(utterances, None),
+        transcribe=lambda audio: audio,
+        respond=lambda text: (f"Got {text}.", _rank(text)),
+        sentiment=lambda text: {"label": "POSITIVE", "score": 0.9},
+        format_lines=lambda rows: (f"- {n}" for n in rows["name"]),
+        speak=lambda line: None,
+        show=lambda line: None,
+    )
+    timings = asyncio.run(pipeline.run())
+
+    assert len({t.trace_id for t in timings}) == 2
+    for t in timings:
+        names = [s.name for s in tracing.spans(t.trace_id)]
+        assert set(STAGES) <= set(names)
+        assert names.count("tts") == 2  # reply and one result line
+    metrics.flush()
+    lines = (tmp_path / "metrics.log").read_text().splitlines()
+    logged = [json.loads(line) for line in lines]
+    assert [r["trace_id"] for r in logged if r.get("event") == "turn_latency"] == [
+        t.trace_id for t in timings
+    ]
+
+
+def test_traces_are_served_only_with_the_admin_routes(monkeypatch):
+    monkeypatch.setattr(tracing, "ENABLED", True)
+    tracing.clear()
+    with span("respond", lane="respond", turn=1):
+        pass
+    app = web.create_app(df=_catalog())
+    with TestClient(app) as client:
+        assert client.get("/traces").status_code == 404
+        assert client.get("/admin/traces").status_code == 404
+        assert app.state.shared.asr is None  # no Whisper unless JEEVES_ASR
+    with TestClient(web.create_app(df=_catalog(), admin=True)) as client:
+        events = client.get("/admin/traces").json()["traceEvents"]
+    assert "respond" in {e["name"] for e in events if e["ph"] == "X"}
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from typing import List, Tuple
+
+from src.monitor import metrics
+from src.voice.tts import TTSCache, TTSWorker, split_chunks
+
+
+def _fake_renderer(calls):
+    def render(text, path, voice):
+        calls.append(text)
+        time.sleep(0.02)
+        path.write_bytes(f"{voice}:{text}".encode())
+
+    return render
+
+
+def test_cache_renders_each_text_once_per_voice(tmp_path):
+    calls: List[str] = []
+    cache = TTSCache("fake", "en", root=tmp_path, renderer=_fake_renderer(calls))
+    first = cache.render("In which city?")
+    assert cache.render("In which city?") == first
+    assert first.read_bytes() == b"en:In which city?"
+    other = TTSCache("fake", "de", root=tmp_path, renderer=_fake_renderer(calls))
+    assert other.render("In which city?") != first
+    assert calls == ["In which city?", "In which city?"]
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+    files = {p.name for p in tmp_path.iterdir()}  # no temporary files left behind
+    assert files == {first.name, other.path_for("In which city?").name}
+
+
+def test_worker_does_not_block_and_plays_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    calls: List[str] = []
+    played: List[str] = []
+    cache = TTSCache("fake", root=tmp_path / "cache", renderer=_fake_renderer(calls))
+    release = threading.Event()
+
+    def play(path):
+        release.wait()
+        played.append(path.read_bytes().decode().split(":", 1)[1])
+
+    worker = TTSWorker(cache, play=play)
+    worker.prerender(["Hi!"]).join()
+    t0 = time.perf_counter()
+    done = [worker.say(text) for text in ("Hi!", "line 1", "line 2")]
+    assert time.perf_counter() - t0 < 0.02  # say() only enqueues
+    assert not done[0].is_set()
+    release.set()
+    worker.wait()
+    assert all(d.is_set() for d in done)
+    assert played == ["Hi!", "line 1", "line 2"]
+    assert calls == ["Hi!", "line 1", "line 2"]  # the greeting came from the cache
+    assert cache.hits == 1
+    worker.close()
+
+
+def test_replies_stream_sentence_by_sentence(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    assert split_chunks(
+        "Here are good matches:\n• A (italian)\n 2. B. Closes at 22:00"
+    ) == [
+        "Here are good matches:",
+        "A (italian)",
+        "B.",
+        "Closes at 22:00",
+    ]
+    assert split_chunks("What time? (e.g., 7 p.m. or 18:30)") == [
+        "What time? (e.g., 7 p.m. or 18:30)"
+    ]
+
+    calls: List[str] = []
+    events: List[Tuple[str, str]] = []
+    cache = TTSCache("fake", root=tmp_path / "cache", renderer=_fake_renderer(calls))
+
+    def play(path):
+        events.append(("play", path.read_bytes().decode().split(":", 1)[1]))
+        time.sleep(0.03)
+
+    def render(text, path, voice):
+        events.append(("render", text))
+        _fake_renderer(calls)(text, path, voice)
+
+    cache.renderer = render
+    worker = TTSWorker(cache, play=play)
+    worker.say("Here are good matches:\n• A\n• B\n• C", wait=True)
+    # playback starts after the first chunk, not after the whole reply,
+    # and the next chunk is rendered while the current one plays
+    assert events[0] == ("render", "Here are good matches:")
+    assert events.index(("play", "Here are good matches:")) < events.index(
+        ("render", "B")
+    )
+    assert [e for e in events if e[0] == "play"] == [
+        ("play", "Here are good matches:"),
+        ("play", "A"),
+        ("play", "B"),
+        ("play", "C"),
+    ]
+    (ttfa,) = worker.first_audio_ms
+    assert 15 <= ttfa < 60  # one chunk render, not four
+    assert worker.stats()["utterances"] == 1
+    metrics.flush()
+    assert "tts_first_audio" in (tmp_path / "metrics.log").read_text()
+    worker.close()
+
+
+def test_utterance_is_done_once_buffered_audio_has_drained(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    calls: List[str] = []
+    cache = TTSCache("fake", root=tmp_path / "cache", renderer=_fake_renderer(calls))
+    buffered: List[str] = []
+    heard = threading.Event()
+
+    class BufferingPlayer:
+        def __call__(self, path):
+            buffered.append(path.read_bytes().decode())  # returns before playing
+
+        def drain(self):
+            heard.wait()
+
+    worker = TTSWorker(cache, play=BufferingPlayer())
+    done = worker.say("First. Second.")
+    while len(buffered) < 2:
+        time.sleep(0.005)
+    assert not done.wait(0.05)  # handed over, but still buffered
+    heard.set()
+    assert done.wait(1.0)
+    worker.close()
+
+
+def test_cache_evicts_the_least_recently_used_files(tmp_path):
+    calls: List[str] = []
+    cache = TTSCache(
+        "fake", root=tmp_path, renderer=_fake_renderer(calls), max_bytes=35
+    )
+    old, kept = cache.render("result one"), cache.render("result two")  # 15 bytes each
+    os.utime(kept, ns=(1, 1))  # older than `old` until it is hit
+    os.utime(old, ns=(2, 2))
+    assert cache.render("result two") == kept  # a hit: now the most recent
+    new = cache.render("result six")
+    assert not old.exists() and kept.exists() and new.exists()
+    assert cache.evictions == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([kept.name, new.name])
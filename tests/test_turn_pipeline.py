@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+from typing import Dict, List
+
+import pandas as pd
+
+from src.dialog.pipeline import FRUSTRATION_REPLY, TurnPipeline, latency_report
+from src.monitor import metrics
+
+
+def test_stages_overlap_and_turn_latency_is_recorded(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    utterances = iter(["italian", "this is useless", "quit", "never heard"])
+    events = []
+    lock = threading.Lock()
+
+    def log(what):
+        with lock:
+            events.append((what, time.perf_counter()))
+
+    def capture():
+        log("capture")
+        time.sleep(0.01)
+        return next(utterances, None)
+
+    def respond(text):
+        log("respond:start")
+        time.sleep(0.05)
+        log("respond:end")
+        results = pd.DataFrame({"name": ["A", "B", "C", "D"]})
+        return f"Got {text}.", results
+
+    def sentiment(text):
+        log("sentiment:start")
+        time.sleep(0.05)
+        label = "NEGATIVE" if "useless" in text else "POSITIVE"
+        return {"label": label, "score": 0.95}
+
+    spoken = []
+
+    def speak(line):
+        log(f"speak:start:{line}")
+        time.sleep(0.03)
+        log(f"speak:end:{line}")
+        spoken.append(line)
+
+    pipeline = TurnPipeline(
+        capture=capture,
+        respond=respond,
+        speak=speak,
+        sentiment=sentiment,
+        format_lines=lambda rows: (f"- {name}" for name in rows["name"]),
+        lines_to_speak=2,
+        show=lambda line: None,
+    )
+    timings = asyncio.run(pipeline.run(greeting="Hi!"))
+
+    # exit word ends the loop: no fourth capture, no reply to "quit"
+    assert [w for w, _ in events].count("capture") == 3
+    assert spoken == [
+        "Hi!",
+        "Got italian.",
+        "- A",
+        "- B",
+        FRUSTRATION_REPLY,
+        "Got this is useless.",
+        "- A",
+        "- B",
+    ]
+    at: Dict[str, List[float]] = {}
+    for what, t in events:
+        at.setdefault(what, []).append(t)
+    # sentiment runs alongside the dialog turn, not after it
+    assert at["sentiment:start"][0] < at["respond:end"][0]
+    # the next capture starts while the last result line is still playing
+    assert at["capture"][1] < at["speak:end:- B"][0]
+
+    assert [t.turn for t in timings] == [1, 2]
+    assert all(t.first_audio_ms >= t.respond_ms >= 45 for t in timings)
+    report = latency_report(timings)
+    assert report["turns"] == 2 and report["within_target"] == 1.0
+    assert report["p50_ms"] <= report["p90_ms"] <= report["max_ms"]
+    metrics.flush()
+    assert (tmp_path / "metrics.log").read_text().count("turn_latency") == 2
@@ -0,0 +1,115 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from src.jeeves.web import app as web
+from src.monitor import metrics
+from src.privacy import data_privacy
+
+
+def _catalog(n=200, seed=5):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "id": np.arange(n),
+            "name": [f"R{i}" for i in range(n)],
+            "city": rng.choice(["Berlin", "Munich"], n),
+            "cuisine": rng.choice(["italian", "greek", "thai"], n),
+            "price": "$$",
+            "rating": np.round(rng.uniform(2, 5, n), 1),
+            "access_wheelchair": rng.choice([True, False], n),
+            "access_step_free": rng.choice([True, False], n),
+            "access_restroom": rng.choice([True, False], n),
+        }
+    )
+
+
+def test_endpoints_use_the_dialog_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    df = _catalog()
+    with TestClient(web.create_app(df=df, workers=2, asr_model="")) as client:
+        text = "Book italian with wheelchair access in Berlin"
+        parsed = client.post("/nlu/parse", json={"text": text})
+        assert parsed.json() == {
+            "intent": "book_restaurant",
+            "slots": {
+                "city": "berlin",
+                "cuisine": "italian",
+                "accessibility": {"wheelchair": True},
+            },
+            "sentiment": "neutral",
+        }
+
+        recs = client.post(
+            "/recs", json={"text": "italian with wheelchair access"}
+        ).json()
+        assert len(recs) == 5
+        assert all(r["rationale"]["wheelchair"] is True for r in recs)
+        assert [r["rationale"]["cuisine"] for r in recs[:2]] == ["italian", "italian"]
+
+        sid = "/sessions/u1/turn"
+        assert client.post(sid, json={"text": "italian in Berlin"}).json()["reply"] == (
+            "Do you need wheelchair access?"
+        )
+        for text in ("yes", "no", "no", "two people"):
+            reply = client.post(sid, json={"text": text}).json()
+        assert reply["results"] == []
+        reply = client.post(sid, json={"text": "19:00"}).json()
+        assert reply["session_id"] == "u1" and len(reply["results"]) == 5
+        assert all(r["rationale"]["wheelchair"] for r in reply["results"])
+        # another user's session is independent
+        other = client.post("/sessions/u2/turn", json={"text": "greek"}).json()
+        assert other["reply"] == "Do you need wheelchair access?"
+
+        health = client.get("/health").json()
+        assert health["restaurants"] == len(df) and health["sessions"]["size"] == 2
+        assert client.delete("/sessions/u1").json() == {"ended": True}
+        assert client.delete("/sessions/u1").json() == {"ended": False}
+
+
+def test_blocking_work_runs_off_the_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    loaded = []
+
+    def load(path):
+        loaded.append(path)
+        return _catalog()
+
+    monkeypatch.setattr(web, "load_restaurants", load)
+    threads = set()
+    real = web.filter_and_rank
+
+    def spy(*args, **kw):
+        threads.add(threading.current_thread().name)
+        return real(*args, **kw)
+
+    with TestClient(web.create_app("some.csv", workers=1, asr_model="")) as client:
+        monkeypatch.setattr(web, "filter_and_rank", spy)
+        for _ in range(3):
+            assert client.post("/recs", json={"text": "greek"}).status_code == 200
+        assert client.get("/health").json()["queues"]["dialog"]["concurrency"] == 1
+    assert loaded == ["some.csv"]  # once, at startup
+    assert threads and threading.main_thread().name not in threads
+
+
+def test_web_sessions_cannot_reach_the_shared_preference_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    monkeypatch.setattr(data_privacy, "STORE_PATH", str(tmp_path / "prefs.enc"))
+    monkeypatch.setattr(data_privacy, "KEY_PATH", str(tmp_path / "secret.key"))
+    app = web.create_app(df=_catalog(), workers=2, asr_model="")
+    with TestClient(app) as client:
+        alice, bob = "/sessions/alice/turn", "/sessions/bob/turn"
+        client.post(alice, json={"text": "greek in Munich"})
+        saved = client.post(alice, json={"text": "remember my preferences"}).json()
+        assert saved["reply"] == web.LOCAL_ONLY_REPLY
+        for text in ("load my preferences", "Lösche meine Daten"):
+            assert client.post(bob, json={"text": text}).json()["reply"] == (
+                web.LOCAL_ONLY_REPLY
+            )
+        sessions = app.state.shared.sessions
+        assert sessions.peek("bob") is None  # refused before the dialog ran
+        alice_session = sessions.peek("alice")
+        assert alice_session is not None and alice_session.prefs.city == "munich"
+    assert not any(tmp_path.glob("prefs.enc*")) and not any(tmp_path.glob("secret*"))
@@ -0,0 +1,161 @@
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from src.jeeves.web import app as web
+from src.jeeves.web import converse
+from src.monitor import metrics
+from src.voice.vad import EnergyVAD
+from tests.test_web_app import _catalog
+
+RATE = 16_000
+
+
+def _tone(seconds):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return 0.3 * np.sin(2 * np.pi * 220 * t)
+
+
+def _pcm(*parts):
+    audio = np.concatenate(parts)
+    return (audio * 32767).astype("<i2").tobytes()
+
+
+def _silence(seconds):
+    return np.zeros(int(RATE * seconds))
+
+
+def _fake_asr(audio):
+    # long utterance: the opening request, short one: an answer
+    return "italian in Berlin" if len(audio) > RATE else "yes"
+
+
+def test_vad_segments_utterances_with_preroll():
+    vad = EnergyVAD()
+    audio = np.concatenate([_silence(0.5), _tone(1.2), _silence(0.8)]).astype(
+        np.float32
+    )
+    events = vad.feed(audio)
+    assert [e for e, _ in events] == ["start", "end"]
+    segment = events[1][1]
+    assert segment is not None
+    assert 1.2 <= len(segment) / RATE < 1.2 + 0.3 + 0.1  # preroll, trimmed hangover
+    assert vad.feed(_tone(0.3).astype(np.float32)) == [("start", None)]
+    rest = vad.flush()
+    assert rest is not None and len(rest) >= 0.3 * RATE and not vad.in_speech
+
+
+def test_stream_audio_get_transcripts_and_replies(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    monkeypatch.setattr(converse, "PARTIAL_EVERY_S", 0.0)
+    app = web.create_app(df=_catalog(), workers=2, asr=_fake_asr)
+    frames = _pcm(_silence(0.3), _tone(1.5), _silence(0.9), _tone(0.5))
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/converse?session_id=w1") as ws:
+            assert ws.receive_json() == {"type": "ready", "session_id": "w1"}
+            for i in range(0, len(frames), 640):  # 20 ms frames
+                ws.send_bytes(frames[i : i + 640])
+            ws.send_json({"type": "flush"})
+            msgs: List[Dict[str, Any]] = []
+            while not msgs or msgs[-1]["type"] != "flushed":
+                msgs.append(ws.receive_json())
+        health = client.get("/health").json()
+
+    kinds = [m["type"] for m in msgs if m["type"] != "partial"]
+    assert kinds == [
+        "speech_start",
+        "final",
+        "reply",
+        "speech_start",
+        "final",
+        "reply",
+        "flushed",
+    ]
+    finals = [m["text"] for m in msgs if m["type"] == "final"]
+    assert finals == ["italian in Berlin", "yes"]
+    replies = [m for m in msgs if m["type"] == "reply"]
+    assert [r["reply"] for r in replies] == [
+        "Do you need wheelchair access?",
+        "Should I only show step-free entrances?",
+    ]
+    assert all(
+        r["session_id"] == "w1" and r["latency_ms"]["total"] >= 0 for r in replies
+    )
+    # partial transcripts while speaking; none between a final and its reply
+    first_final = next(i for i, m in enumerate(msgs) if m["type"] == "final")
+    assert "partial" in {m["type"] for m in msgs[:first_final]}
+    assert msgs[first_final + 1]["type"] == "reply"
+    assert health["sessions"]["size"] == 1
+    metrics.flush()
+    assert (tmp_path / "metrics.log").read_text().count("ws_turn") == 2
+
+
+def test_speech_endpoint_closes_without_asr(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    with TestClient(web.create_app(df=_catalog(), asr_model="")) as client:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            with client.websocket_connect("/ws/converse"):
+                pass
+    assert closed.value.code == 1011
+
+
+def _until_flushed(ws):
+    msgs: List[Dict[str, Any]] = []
+    while not msgs or msgs[-1]["type"] != "flushed":
+        msgs.append(ws.receive_json())
+    return [m for m in msgs if m["type"] != "partial"]
+
+
+def test_bad_frames_get_errors_and_the_conversation_goes_on(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+    calls = []
+
+    def flaky_asr(audio):
+        calls.append(len(audio))
+        if len(calls) == 1:
+            raise RuntimeError("decoder blew up")
+        return _fake_asr(audio)
+
+    app = web.create_app(df=_catalog(), workers=2, asr=flaky_asr)
+    frames = _pcm(_silence(0.3), _tone(1.5), _silence(0.9))
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/converse?session_id=w2") as ws:
+            ws.receive_json()
+            ws.send_bytes(b"\x00\x01\x02")  # odd length: the last byte waits
+            ws.send_bytes(b"\x00")
+            for text in ("not json", "[1, 2]", '{"type": 3}', '{"type": "nope"}'):
+                ws.send_text(text)
+            for _ in range(2):  # the first turn's ASR fails, the second's works
+                for i in range(0, len(frames), 641):  # frames split mid-sample
+                    ws.send_bytes(frames[i : i + 641])
+                ws.send_json({"type": "flush"})
+            first, second = _until_flushed(ws), _until_flushed(ws)
+
+    errors = [m for m in first if m["type"] == "error"]
+    assert [m["error"] for m in errors] == ["bad_message"] * 4 + ["asr_failed"]
+    assert [m["type"] for m in second] == ["speech_start", "final", "reply", "flushed"]
+    assert second[1]["text"] == "italian in Berlin"
+    assert second[2]["reply"] == "Do you need wheelchair access?"
+    assert len(calls) == 2 and calls[0] == calls[1]  # carried bytes kept alignment
+    metrics.flush()
+    assert '"stage": "asr"' in (tmp_path / "metrics.log").read_text()
+
+
+def test_unexpected_failure_closes_with_internal_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "LOG_PATH", str(tmp_path / "metrics.log"))
+
+    def broken(buf):
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr(converse, "pcm16_to_float", broken)
+    app = web.create_app(df=_catalog(), asr=_fake_asr)
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/converse") as ws:
+            ws.receive_json()
+            ws.send_bytes(b"\x00\x01")
+            with pytest.raises(WebSocketDisconnect) as closed:
+                ws.receive_json()
+    assert closed.value.code == 1011
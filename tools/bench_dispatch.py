@@ -0,0 +1,94 @@
+"""
+Command recognition microbenchmark: the compiled command table against the
+original handle_turn preamble (a dozen substring checks, the group-text
+normalization and three group regexes, plus the "show results" set).
+
+    PYTHONPATH=. python tools/bench_dispatch.py [--repeat 20000]
+
+Both sides only recognize the command (no handler runs). Utterances are a
+mix of slot answers, which match nothing and so pay for every check, and
+commands.
+"""
+
+import argparse
+import re
+import timeit
+from typing import Optional
+
+from src.dialog.manager import COMMANDS
+
+UTTERANCES = [
+    "italian in berlin",
+    "yes",
+    "for four people at 7 pm",
+    "do you need wheelchair access? no, but an accessible restroom please",
+    "start group of 3",
+    "add",
+    "and group",
+    "show results",
+    "lösche meine daten",
+    "what do you store about me",
+]
+
+# --- the original preamble, kept as the reference ---------------------------
+_START_RE = re.compile(r"\b(start|create|new)\s+group(?:\s+of\s+(\d+))?\b", re.I)
+_ADD_RE = re.compile(r"\b(add|member|person)\b", re.I)
+_END_RE = re.compile(r"\b(end|finish)\s+group\b", re.I)
+
+
+def _normalize_group_text(text: str) -> str:
+    t = (text or "").strip().lower()
+    t = t.replace("and group", "end group")
+    t = t.replace("in group", "end group")
+    t = t.replace("ant group", "end group")
+    t = t.replace("en group", "end group")
+    t = t.replace("finish the group", "finish group")
+    return t
+
+
+def preamble(text: str, group_active: bool = True) -> Optional[str]:
+    low = text.lower()
+    if "what do you store" in low or "welche daten speicherst du" in low:
+        return "gdpr_info"
+    if "remember my preferences" in low or "speichere meine daten" in low:
+        return "gdpr_save"
+    if "load my preferences" in low or "lade meine daten" in low:
+        return "gdpr_load"
+    if (
+        "delete my data" in low
+        or "lösche meine daten" in low
+        or "loesche meine daten" in low
+    ):
+        return "gdpr_delete"
+    t = _normalize_group_text(text)
+    if _START_RE.search(t):
+        return "group_start"
+    if _END_RE.search(t):
+        return "group_end"
+    if group_active and _ADD_RE.search(t):
+        return "group_add"
+    if low in {"show results", "zeige ergebnisse", "results", "recommend"}:
+        return "show_results"
+    return None
+
+
+def table(text: str) -> Optional[str]:
+    found = COMMANDS.find(text)
+    return found[0][0] if found else None
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20000)
+    args = ap.parse_args()
+    for u in UTTERANCES:
+        assert preamble(u) == table(u), u
+    print(f"{'utterance':<44} {'if-chain us':>11} {'table us':>9}")
+    for u in UTTERANCES:
+        a = timeit.timeit(lambda: preamble(u), number=args.repeat) / args.repeat * 1e6
+        b = timeit.timeit(lambda: table(u), number=args.repeat) / args.repeat * 1e6
+        print(f"{u[:44]:<44} {a:>11.2f} {b:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
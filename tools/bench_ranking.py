@@ -0,0 +1,153 @@
+"""
+Ranking benchmark: original pandas `filter_and_rank` vs the NumPy engine,
+on synthetic catalogs from 10k to 1M rows.
+
+    PYTHONPATH=. python tools/bench_ranking.py [--sizes 10000 100000 1000000]
+
+The engine timings exclude the one-off build (reported separately) and the
+top-k views, so they measure the scoring path every view miss falls back to.
+The second table compares `rank_many` on P profiles with P `rank` calls.
+"""
+
+import argparse
+import itertools
+import time
+from statistics import median
+
+import numpy as np
+import pandas as pd
+
+from src.models.preferences import AccessibilityNeeds, UserPreferences
+from src.reco.engine import RankingEngine, positions_to_frame
+from src.reco.recommender import RESULT_COLS, _filter_and_rank_pandas
+
+CITIES = [f"City{i}" for i in range(200)]
+CUISINES = [
+    "italian",
+    "japanese",
+    "indian",
+    "vegan",
+    "greek",
+    "mexican",
+    "thai",
+    "french",
+]
+
+QUERIES = [
+    UserPreferences(),
+    UserPreferences(city="city3", cuisine="italian"),
+    UserPreferences(cuisine="vegan", accessibility=AccessibilityNeeds(wheelchair=True)),
+    UserPreferences(
+        city="city7", accessibility=AccessibilityNeeds(wheelchair=True, restroom=True)
+    ),
+]
+
+
+def synth_catalog(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    tri = np.array([True, False, None], dtype=object)
+    return pd.DataFrame(
+        {
+            "id": np.arange(n),
+            "name": [f"R{i}" for i in range(n)],
+            "city": rng.choice(CITIES, n),
+            "cuisine": rng.choice(CUISINES, n),
+            "price": rng.choice(["$", "$$", "$$$"], n),
+            "rating": np.round(rng.uniform(1.0, 5.0, n), 1),
+            "rating_count": rng.integers(0, 5000, n),
+            "access_wheelchair": rng.choice(tri, n),
+            "access_step_free": rng.choice(tri, n),
+            "access_restroom": rng.choice(tri, n),
+        }
+    )
+
+
+def profiles(count: int) -> list:
+    combos = itertools.cycle(
+        itertools.product(
+            [None, "city1", "city42"], [None, *CUISINES[:4]], [None, True], [None, True]
+        )
+    )
+    return [
+        UserPreferences(
+            city=city,
+            cuisine=cuisine,
+            accessibility=AccessibilityNeeds(wheelchair=w, step_free=s),
+        )
+        for city, cuisine, w, s in itertools.islice(combos, count)
+    ]
+
+
+def _ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return median(times)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    ap.add_argument("--top-k", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--profiles", type=int, nargs="+", default=[1, 8, 32, 128])
+    ap.add_argument("--batch-rows", type=int, default=100_000)
+    args = ap.parse_args()
+
+    print(
+        f"{'rows':>9} {'build ms':>9} {'pandas ms':>10} {'engine ms':>10} {'speedup':>8}"
+    )
+    for n in args.sizes:
+        df = synth_catalog(n)
+        t0 = time.perf_counter()
+        engine = RankingEngine(df)
+        build = (time.perf_counter() - t0) * 1000
+
+        ref_ms = eng_ms = 0.0
+        for prefs in QUERIES:
+            ref = _filter_and_rank_pandas(df, prefs, args.top_k)
+            pos, scores = engine.rank(prefs, args.top_k)
+            got = positions_to_frame(df, pos, scores, RESULT_COLS)
+            pd.testing.assert_frame_equal(got, ref, check_exact=True)
+
+            repeat = max(1, args.repeat if n <= 100_000 else args.repeat // 2)
+            ref_ms += _ms(
+                lambda: _filter_and_rank_pandas(df, prefs, args.top_k), repeat
+            )
+            eng_ms += _ms(
+                lambda: positions_to_frame(
+                    df, *engine.rank(prefs, args.top_k), RESULT_COLS
+                ),
+                repeat,
+            )
+        ref_ms /= len(QUERIES)
+        eng_ms /= len(QUERIES)
+        print(
+            f"{n:>9} {build:>9.1f} {ref_ms:>10.1f} {eng_ms:>10.2f} {ref_ms / eng_ms:>7.1f}x"
+        )
+
+    df = synth_catalog(args.batch_rows)
+    print(f"\nrank_many on {args.batch_rows} rows (cold = fresh engine, first call)")
+    print(
+        f"{'profiles':>9} {'loop ms':>9} {'cold ms':>9} {'warm ms':>9} {'profiles/s':>11}"
+    )
+    for count in args.profiles:
+        batch = profiles(count)
+        engine = RankingEngine(df)
+        loop_ms = _ms(lambda: [engine.rank(p, args.top_k) for p in batch], args.repeat)
+        t0 = time.perf_counter()
+        engine.rank_many(batch, args.top_k)
+        cold_ms = (time.perf_counter() - t0) * 1000
+        warm_ms = _ms(lambda: engine.rank_many(batch, args.top_k), args.repeat)
+        print(
+            f"{count:>9} {loop_ms:>9.1f} {cold_ms:>9.1f} {warm_ms:>9.1f}"
+            f" {count / warm_ms * 1000:>11.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
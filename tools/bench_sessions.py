@@ -0,0 +1,78 @@
+"""
+Session load test: thousands of concurrent dialog sessions in one process,
+each driven through a full conversation with `handle_session_turn`.
+
+    PYTHONPATH=. python tools/bench_sessions.py [--sessions 5000] [--threads 8]
+
+Reports turn throughput and latency, then (in a second, traced run) the
+memory each live session holds: preferences, group state and ranking state.
+"""
+
+import argparse
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from src.dialog.manager import handle_session_turn
+from src.dialog.session import SessionStore
+from src.monitor import metrics
+from tools.bench_ranking import synth_catalog
+
+# one conversation up to the recommendation (city varies per session)
+TURNS = ["italian", "no", "no", "no", "City{city}", "2", "19:00"]
+
+
+def converse(store: SessionStore, df: pd.DataFrame, i: int) -> List[float]:
+    lat = []
+    for turn in TURNS:
+        t0 = time.perf_counter()
+        handle_session_turn(f"s{i}", turn.format(city=i % 200), df, store)
+        lat.append((time.perf_counter() - t0) * 1000.0)
+    return lat
+
+
+def run(df: pd.DataFrame, sessions: int, threads: int) -> List[float]:
+    store = SessionStore(maxsize=sessions)
+    with ThreadPoolExecutor(threads) as pool:
+        runs = pool.map(lambda i: converse(store, df, i), range(sessions))
+        return [ms for lat in runs for ms in lat]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, default=5000)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--rows", type=int, default=10_000)
+    args = ap.parse_args()
+    metrics.LOG_PATH = "/dev/null"  # keep prefetch events out of the log
+    df = synth_catalog(args.rows)
+    run(df, 50, 1)  # build the engine, views and facets
+
+    t0 = time.perf_counter()
+    lat = run(df, args.sessions, args.threads)
+    wall = time.perf_counter() - t0
+
+    tracemalloc.start()
+    store = SessionStore(maxsize=args.sessions)
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(args.sessions):
+        converse(store, df, i)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(
+        f"{'sessions':>9} {'turns':>7} {'turns/s':>8} {'p50 ms':>7} {'p99 ms':>7} {'KB/session':>11}"
+    )
+    print(
+        f"{args.sessions:>9} {len(lat):>7} {len(lat) / wall:>8.0f} "
+        f"{np.percentile(lat, 50):>7.2f} {np.percentile(lat, 99):>7.2f} "
+        f"{held / 1024 / len(store):>11.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Time to first prompt of run_local.py in keyboard mode: starts it as a
+subprocess (JEEVES_WHISPER=0, JEEVES_TTS=0), waits for the "> " input
+prompt after the greeting, then types "quit".
+
+    PYTHONPATH=. python tools/bench_startup.py [--runs 5] [--profile]
+
+--profile sets JEEVES_STARTUP_PROFILE=1 and prints run_local's own report
+of the costliest imports and startup phases (from the last run).
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT = b"> "
+
+
+def time_to_first_prompt(
+    extra_env: Optional[Dict[str, str]] = None, timeout_s: float = 60.0
+) -> Tuple[float, str]:
+    """Seconds from process start to the first input prompt, and its stderr."""
+    env = {
+        **os.environ,
+        "JEEVES_WHISPER": "0",
+        "JEEVES_TTS": "0",
+        "PYTHONUNBUFFERED": "1",
+        **(extra_env or {}),
+    }
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "run_local.py"],
+        cwd=ROOT,
+        env=env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    assert proc.stdout is not None and proc.stdin is not None
+    seen = b""
+    try:
+        while not seen.endswith(PROMPT):
+            if time.perf_counter() - t0 > timeout_s:
+                raise TimeoutError(
+                    f"no prompt after {timeout_s:.0f} s: {seen[-200:]!r}"
+                )
+            byte = proc.stdout.read(1)
+            if not byte:
+                _, err = proc.communicate()
+                raise RuntimeError(
+                    f"run_local.py exited before prompting:\n{err.decode()}"
+                )
+            seen += byte
+        elapsed = time.perf_counter() - t0
+        _, err = proc.communicate(b"quit\n", timeout=timeout_s)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    return elapsed, err.decode()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--profile", action="store_true", help="print the startup report")
+    args = ap.parse_args()
+    extra = {"JEEVES_STARTUP_PROFILE": "1"} if args.profile else None
+    times: List[float] = []
+    err = ""
+    for _ in range(args.runs):
+        t, err = time_to_first_prompt(extra)
+        times.append(t)
+    ms = sorted(t * 1000.0 for t in times)
+    print(
+        f"time to first prompt over {args.runs} runs: median {statistics.median(ms):.0f} ms, "
+        f"min {ms[0]:.0f} ms, max {ms[-1]:.0f} ms"
+    )
+    if args.profile:
+        print(err.rstrip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Load generator for the HTTP API: virtual users replay scripted
+conversations against /nlu/parse, /recs and the session endpoints, with
+a fixed concurrency and an optional target request rate.
+
+    PYTHONPATH=. python tools/loadtest.py [--users 32] [--rps 0] [--duration 10]
+        [--script convos.json] [--url http://localhost:8000] [--rows 10000]
+        [--profile]
+
+Without --url the app runs in-process over httpx's ASGI transport (no
+network; a synthetic catalog of --rows restaurants, no Whisper). Reports
+p50/p90/p99 latency, error rate and throughput per endpoint. --profile
+samples the in-process app for the whole run into data/profiles/.
+
+A script is JSON: {"conversations": [{"name", "weight", "steps"}]}, each
+step one of {"parse": text}, {"recs": text}, {"turn": text}, {"end": null}.
+"{user}" in a text is replaced by the user's number.
+"""
+
+import argparse
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+
+import anyio
+import httpx
+import numpy as np
+
+from src.monitor import profiler
+
+DEFAULT_SCRIPT: Dict[str, Any] = {
+    "conversations": [
+        {
+            "name": "booking",
+            "weight": 2,
+            "steps": [
+                {"turn": "italian"},
+                {"turn": "yes"},
+                {"turn": "no"},
+                {"turn": "no"},
+                {"turn": "City{user}"},
+                {"turn": "two people"},
+                {"turn": "19:00"},
+                {"end": None},
+            ],
+        },
+        {
+            "name": "search",
+            "weight": 1,
+            "steps": [
+                {"parse": "book a greek place with wheelchair access in City{user}"},
+                {"recs": "greek with wheelchair access in City{user}"},
+            ],
+        },
+    ]
+}
+
+
+@dataclass
+class Stats:
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    rejected: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def record(self, endpoint: str, ms: float, status: Optional[int]) -> None:
+        self.latencies[endpoint].append(ms)
+        if status is None or status >= 400:
+            self.errors[endpoint] += 1
+        if status == 503:
+            self.rejected[endpoint] += 1
+
+    def report(self, wall_s: float) -> List[Dict[str, Any]]:
+        rows = []
+        for endpoint in sorted(self.latencies):
+            lat = np.array(self.latencies[endpoint])
+            rows.append(
+                {
+                    "endpoint": endpoint,
+                    "requests": len(lat),
+                    "rps": len(lat) / wall_s,
+                    "error_rate": self.errors[endpoint] / len(lat),
+                    "rejected": self.rejected[endpoint],
+                    "p50_ms": float(np.percentile(lat, 50)),
+                    "p90_ms": float(np.percentile(lat, 90)),
+                    "p99_ms": float(np.percentile(lat, 99)),
+                }
+            )
+        return rows
+
+
+class Pacer:
+    """Spaces request starts 1/rps apart across all users (0: no limit)."""
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps if rps > 0 else 0.0
+        self.next = time.perf_counter()
+        self.lock = anyio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.perf_counter()
+            start = max(self.next, now)
+            self.next = start + self.interval
+        await anyio.sleep(start - now)
+
+
+def step(
+    http: httpx.AsyncClient, op: str, text: Any, sid: str
+) -> Tuple[str, Awaitable[httpx.Response]]:
+    """The endpoint label and the (not yet awaited) request for one script step."""
+    if op == "parse":
+        return "POST /nlu/parse", http.post("/nlu/parse", json={"text": text})
+    if op == "recs":
+        return "POST /recs", http.post("/recs", json={"text": text})
+    if op == "turn":
+        return "POST /sessions/{id}/turn", http.post(
+            f"/sessions/{sid}/turn", json={"text": text}
+        )
+    if op == "end":
+        return "DELETE /sessions/{id}", http.delete(f"/sessions/{sid}")
+    raise ValueError(f"unknown step {op!r}")
+
+
+async def user(
+    http: httpx.AsyncClient,
+    n: int,
+    script: Dict[str, Any],
+    pacer: Pacer,
+    stats: Stats,
+    stop_at: float,
+    rng: random.Random,
+) -> None:
+    convos = script["conversations"]
+    weights = [c.get("weight", 1) for c in convos]
+    k = 0
+    while time.perf_counter() < stop_at:
+        convo = rng.choices(convos, weights)[0]
+        sid = f"u{n}-{k}"
+        k += 1
+        for s in convo["steps"]:
+            if time.perf_counter() >= stop_at:
+                return
+            ((op, text),) = s.items()
+            if isinstance(text, str):
+                text = text.replace("{user}", str(n))
+            await pacer.wait()
+            endpoint, request = step(http, op, text, sid)
+            t0 = time.perf_counter()
+            try:
+                status: Optional[int] = (await request).status_code
+            except httpx.HTTPError:
+                status = None
+            stats.record(endpoint, (time.perf_counter() - t0) * 1000.0, status)
+
+
+async def run_load(
+    http: httpx.AsyncClient,
+    script: Dict[str, Any],
+    users: int,
+    duration_s: float,
+    rps: float = 0.0,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """Drive `users` concurrent scripted users for `duration_s`; per-endpoint report."""
+    stats = Stats()
+    pacer = Pacer(rps)
+    t0 = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for n in range(users):
+            tg.start_soon(
+                user,
+                http,
+                n,
+                script,
+                pacer,
+                stats,
+                t0 + duration_s,
+                random.Random(seed + n),
+            )
+    return stats.report(time.perf_counter() - t0)
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=30) as http:
+            rows = await run_load(http, script, args.users, args.duration, args.rps)
+    else:
+        from src.jeeves.web.app import create_app
+        from tools.bench_ranking import synth_catalog
+
+        app = create_app(df=synth_catalog(args.rows), asr_model="")
+        async with app.router.lifespan_context(app):
+            if args.profile:
+                profiler.start_profile(seconds=args.duration, reason="loadtest")
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://load"
+            ) as http:
+                rows = await run_load(http, script, args.users, args.duration, args.rps)
+            if args.profile:
+                files = await anyio.to_thread.run_sync(profiler.stop_profile, 10.0)
+                print(f"profile: {', '.join(files or [])}")
+    print(
+        f"{'endpoint':<26} {'reqs':>6} {'req/s':>7} {'err %':>6} {'503':>5} "
+        f"{'p50 ms':>7} {'p90 ms':>7} {'p99 ms':>7}"
+    )
+    for r in rows:
+        print(
+            f"{r['endpoint']:<26} {r['requests']:>6} {r['rps']:>7.1f} "
+            f"{100 * r['error_rate']:>6.1f} {r['rejected']:>5} "
+            f"{r['p50_ms']:>7.2f} {r['p90_ms']:>7.2f} {r['p99_ms']:>7.2f}"
+        )
+    total = sum(r["requests"] for r in rows)
+    print(f"total: {total} requests, {sum(r['rps'] for r in rows):.1f} req/s")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=32, help="concurrent virtual users")
+    ap.add_argument(
+        "--rps",
+        type=float,
+        default=0.0,
+        help="target request rate (0: as fast as possible)",
+    )
+    ap.add_argument("--duration", type=float, default=10.0, help="seconds")
+    ap.add_argument("--script", default=None, help="conversation script (JSON)")
+    ap.add_argument(
+        "--url", default=None, help="running service; default: in-process app"
+    )
+    ap.add_argument("--rows", type=int, default=10_000)
+    ap.add_argument("--profile", action="store_true", help="sample the in-process app")
+    args = ap.parse_args()
+    if args.url is None:
+        from src.monitor import metrics
+
+        metrics.LOG_PATH = "/dev/null"  # keep prefetch events out of the log
+    anyio.run(main_async, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,191 @@
+"""
+Summarize the metrics log in one streaming pass: latency quantiles per
+timed function and per turn stage, event counts and the booking
+completion rate.
+
+    PYTHONPATH=. python tools/summarize_metrics.py [--log data/metrics.log]
+        [--since 1h] [--until 2026-10-19T12:00] [--json]
+
+Reads the log's rotated predecessors (metrics.log.N.gz) first, line by
+line. Latencies go into mergeable quantile sketches (src/monitor/sketch.py),
+so memory stays constant however large the logs are. --since/--until take
+an ISO time, epoch seconds or an age such as 30m, 2h or 7d; records without
+a timestamp (older logs) are skipped when a window is given.
+"""
+
+import argparse
+import gzip
 import json
-import statistics
-import pathlib
+import re
+import time
 from collections import defaultdict
-from typing import DefaultDict, List
-
-lat: DefaultDict[str, List[float]] = defaultdict(list)
-counts: DefaultDict[str, int] = defaultdict(int)
-
-
-path = pathlib.Path("data/metrics.log")
-lat = defaultdict(list)
-counts = defaultdict(int)
-if path.exists():
-    for line in path.read_text().splitlines():
-        try:
-            rec = json.loads(line)
-            if rec.get("event") == "booking_attempt":
-                counts["bookings_total"] += 1
-                if rec.get("success"):
-                    counts["bookings_success"] += 1
-            elif "latency_ms" in rec:
-                lat[rec.get("fn", "")].append(rec["latency_ms"])
-        except Exception:
-            pass
-
-
-def stats(vals):
-    if not vals:
-        return "-"
-    return f"avg {statistics.mean(vals):.1f} ms | p50 {statistics.median(vals):.1f} ms | p90 {statistics.quantiles(vals, n=10)[8]:.1f} ms"
-
-
-print("Latency:")
-for k, v in lat.items():
-    print(f"  {k:>14}: {stats(v)}")
-bt = counts["bookings_total"]
-bs = counts["bookings_success"]
-rate = (bs / bt * 100) if bt else 0
-print(f"\nBooking completion: {bs}/{bt} = {rate:.1f}%")
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from src.monitor.metrics import LOG_PATH, log_files
+from src.monitor.sketch import QuantileSketch
+
+# latency fields (ms) of the events that break a turn into stages
+STAGES: Dict[str, tuple] = {
+    "turn_latency": ("asr_ms", "respond_ms", "first_audio_ms"),
+    "ws_turn": ("asr", "turn", "total"),
+    "tts_first_audio": ("ms",),
+    "prefetch": ("saved_ms",),
+}
+_AGE = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+_UNIT_S = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+@dataclass
+class Summary:
+    fns: Dict[str, QuantileSketch] = field(
+        default_factory=lambda: defaultdict(QuantileSketch)
+    )
+    stages: Dict[str, QuantileSketch] = field(
+        default_factory=lambda: defaultdict(QuantileSketch)
+    )
+    events: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    bookings_total: int = 0
+    bookings_success: int = 0
+    records: int = 0
+    first_ts: Optional[float] = None
+    last_ts: Optional[float] = None
+
+    def add(self, rec: Dict[str, Any]) -> None:
+        self.records += 1
+        ts = rec.get("ts")
+        if ts is not None:
+            if self.first_ts is None or ts < self.first_ts:
+                self.first_ts = ts
+            if self.last_ts is None or ts > self.last_ts:
+                self.last_ts = ts
+        event = rec.get("event")
+        if event is None:
+            if "latency_ms" in rec:
+                self.fns[rec.get("fn", "")].add(rec["latency_ms"])
+            return
+        self.events[event] += 1
+        if event == "booking_attempt":
+            self.bookings_total += 1
+            self.bookings_success += bool(rec.get("success"))
+        for name in STAGES.get(event, ()):
+            value = rec.get(name)
+            if isinstance(value, (int, float)):
+                self.stages[f"{event}.{name}"].add(value)
+
+    def report(self) -> Dict[str, Any]:
+        total = self.bookings_total
+        rate = self.bookings_success / total if total else None
+        return {
+            "records": self.records,
+            "first_ts": self.first_ts,
+            "last_ts": self.last_ts,
+            "functions": {k: s.summary() for k, s in sorted(self.fns.items())},
+            "stages": {k: s.summary() for k, s in sorted(self.stages.items())},
+            "events": dict(sorted(self.events.items())),
+            "bookings": {
+                "total": self.bookings_total,
+                "success": self.bookings_success,
+                "rate": rate,
+            },
+        }
+
+
+def parse_time(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Epoch seconds from an ISO time, epoch seconds or an age (30m, 2h, 7d)."""
+    if not value:
+        return None
+    m = _AGE.match(value)
+    if m:
+        return (time.time() if now is None else now) - float(m[1]) * _UNIT_S[m[2]]
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def iter_records(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    decode = json.JSONDecoder().decode
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as f:
+            for line in f:
+                try:
+                    rec = decode(line)
+                except ValueError:
+                    continue  # a torn last line
+                if isinstance(rec, dict):
+                    yield rec
+
+
+def summarize(
+    paths: Iterable[str], since: Optional[float] = None, until: Optional[float] = None
+) -> Summary:
+    summary = Summary()
+    windowed = since is not None or until is not None
+    for rec in iter_records(paths):
+        if windowed:
+            ts = rec.get("ts")
+            if ts is None:
+                continue
+            if (since is not None and ts < since) or (until is not None and ts > until):
+                continue
+        summary.add(rec)
+    return summary
+
+
+def _fmt_ms(v: Optional[float]) -> str:
+    return "-" if v is None else f"{v:.1f}"
+
+
+def print_text(report: Dict[str, Any]) -> None:
+    print(f"{report['records']} records")
+    sections = (
+        ("Latency by function (ms)", "functions"),
+        ("Latency by stage (ms)", "stages"),
+    )
+    for title, key in sections:
+        rows: Dict[str, Dict[str, Any]] = report[key]
+        if not rows:
+            continue
+        print(f"\n{title}:")
+        print(
+            f"  {'':>28} {'count':>7} {'avg':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}"
+        )
+        for name, s in rows.items():
+            print(
+                f"  {name:>28} {s['count']:>7} {_fmt_ms(s['mean']):>8} {_fmt_ms(s['p50']):>8} "
+                f"{_fmt_ms(s['p90']):>8} {_fmt_ms(s['p99']):>8} {_fmt_ms(s['max']):>8}"
+            )
+    if report["events"]:
+        print("\nEvents:")
+        for name, n in report["events"].items():
+            print(f"  {name:>28} {n:>7}")
+    b = report["bookings"]
+    rate = 100 * b["rate"] if b["rate"] is not None else 0.0
+    print(f"\nBooking completion: {b['success']}/{b['total']} = {rate:.1f}%")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument(
+        "--log", default=LOG_PATH, help="live log; rotated .N.gz files are included"
+    )
+    ap.add_argument(
+        "--since", default=None, help="ISO time, epoch seconds or age (30m, 2h, 7d)"
+    )
+    ap.add_argument("--until", default=None, help="same formats as --since")
+    ap.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = ap.parse_args()
+    files: List[str] = log_files(args.log)
+    summary = summarize(files, parse_time(args.since), parse_time(args.until))
+    report = summary.report()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_text(report)
+
+
+if __name__ == "__main__":
+    main()
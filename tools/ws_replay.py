@@ -0,0 +1,138 @@
+"""
+Replay WAV files (16 kHz mono int16, like the repo's recordings) into
+/ws/converse at real-time speed, one file per turn, and report latency.
+
+    PYTHONPATH=. python tools/ws_replay.py test.wav b1.wav [--url ws://localhost:8000/ws/converse]
+
+Without --url the app runs in-process (the Whisper model from JEEVES_ASR,
+base by default; --fake-asr TEXT skips Whisper to time everything around
+it). Per reply: the server's latency from end of speech (ASR, dialog turn,
+total) and the client's from the last audio frame sent to the reply arriving.
+The server behind --url needs JEEVES_ASR set to accept speech.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+import wave
+from typing import Any, Dict, List, Optional
+
+FRAME_MS = 20
+
+
+class _InProcess:
+    """Starlette's test client behind the same send/recv calls as websockets."""
+
+    def __init__(self, fake_asr: Optional[str]):
+        from fastapi.testclient import TestClient
+
+        from src.jeeves.web.app import create_app
+
+        asr = (lambda audio: fake_asr) if fake_asr else None
+        model = os.environ.get("JEEVES_ASR") or "base"
+        self.client = TestClient(create_app(asr=asr, asr_model=model))
+        self.client.__enter__()
+        self.ws = self.client.websocket_connect("/ws/converse?session_id=replay")
+        self.ws.__enter__()
+
+    def send(self, data: Any) -> None:
+        if isinstance(data, bytes):
+            self.ws.send_bytes(data)
+        else:
+            self.ws.send_text(data)
+
+    def recv(self) -> str:
+        return self.ws.receive_text()
+
+    def close(self) -> None:
+        self.ws.__exit__(None, None, None)
+        self.client.__exit__(None, None, None)
+
+
+def connect(url: Optional[str], fake_asr: Optional[str]) -> Any:
+    if url is None:
+        return _InProcess(fake_asr)
+    try:
+        from websockets.sync.client import connect as ws_connect
+    except ImportError:
+        raise SystemExit("--url needs websockets:\n  pip install websockets") from None
+    return ws_connect(url)
+
+
+def read_pcm(path: str) -> bytes:
+    with wave.open(path) as w:
+        if (w.getframerate(), w.getnchannels(), w.getsampwidth()) != (16000, 1, 2):
+            raise SystemExit(f"{path}: expected 16 kHz mono 16-bit PCM")
+        return w.readframes(w.getnframes())
+
+
+def replay(ws: Any, path: str) -> List[Dict[str, Any]]:
+    pcm = read_pcm(path)
+    step = 16000 * 2 * FRAME_MS // 1000
+    sent = {"last": 0.0}
+
+    def sender() -> None:
+        t0 = time.perf_counter()
+        for k, i in enumerate(range(0, len(pcm), step)):
+            delay = t0 + k * FRAME_MS / 1000.0 - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)  # real time: one frame per FRAME_MS
+            ws.send(pcm[i : i + step])
+        sent["last"] = time.perf_counter()
+        ws.send(json.dumps({"type": "flush"}))
+
+    thread = threading.Thread(target=sender)
+    thread.start()
+    turns: List[Dict[str, Any]] = []
+    text = ""
+    while True:
+        msg = json.loads(ws.recv())
+        if msg["type"] == "final":
+            text = msg["text"]
+        elif msg["type"] == "reply":
+            # None: the server's VAD ended the turn before the file did
+            client_ms = (
+                (time.perf_counter() - sent["last"]) * 1000.0 if sent["last"] else None
+            )
+            turns.append(
+                {
+                    "file": path,
+                    "text": text,
+                    "reply": msg["reply"],
+                    "client_ms": client_ms,
+                }
+                | msg["latency_ms"]
+            )
+        elif msg["type"] == "flushed":
+            break
+    thread.join()
+    return turns
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("wavs", nargs="+")
+    ap.add_argument("--url", default=None)
+    ap.add_argument("--fake-asr", default=None, metavar="TEXT")
+    args = ap.parse_args()
+    ws = connect(args.url, args.fake_asr)
+    print(f"ready: {json.loads(ws.recv())}")
+    print(
+        f"{'file':<16} {'asr ms':>7} {'turn ms':>8} {'total ms':>9} {'client ms':>10}  transcript -> reply"
+    )
+    try:
+        for path in args.wavs:
+            for t in replay(ws, path):
+                client = f"{t['client_ms']:.0f}" if t["client_ms"] is not None else "-"
+                print(
+                    f"{t['file']:<16} {t['asr']:>7.0f} {t['turn']:>8.1f} {t['total']:>9.0f} "
+                    f"{client:>10}  {t['text']!r} -> {t['reply']!r}"
+                )
+    finally:
+        ws.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -17,39 +17,33 @@ import sys
 import time
 import queue
 from pathlib import Path
-from typing import Optional
-from scipy.io import wavfile as _wavfile
-import whisper
+from typing import Any, Optional
 import numpy as np
-import sounddevice as sd
 
 import os
 
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-# Prefer 'soundfile' for writing WAV; fall back to scipy
-try:
-    import soundfile as sf
-
-    _USE_SF = True
-except Exception:
-    from scipy.io import wavfile as _wavfile
-
-    _USE_SF = False
-
-# Core ML deps
-try:
-    import torch
-    import whisper
-except Exception:
-    print(
-        "ERROR: Missing packages.\n"
-        "  pip install openai-whisper sounddevice numpy scipy\n"
-        "If ffmpeg is missing:\n"
-        "  conda install -c conda-forge ffmpeg",
-        file=sys.stderr,
-    )
-    raise
+# sounddevice, soundfile/scipy and torch + whisper are imported on first
+# use: importing this module (run_local.py does) stays cheap, and
+# keyboard mode runs without any of them installed.
+_MISSING = (
+    "ERROR: Missing packages.\n"
+    "  pip install openai-whisper sounddevice numpy scipy\n"
+    "If ffmpeg is missing:\n"
+    "  conda install -c conda-forge ffmpeg"
+)
+
+
+def _ml() -> Any:
+    """(torch, whisper), imported on first use."""
+    try:
+        import torch
+        import whisper
+    except Exception:
+        print(_MISSING, file=sys.stderr)
+        raise
+    return torch, whisper
 
 
 # ----------------------------- Recording ---------------------------------- #
@@ -64,6 +58,8 @@ def record(
     """
     Record audio from default (or given) microphone and return mono float32 array in [-1, 1].
     """
+    import sounddevice as sd
+
     q: queue.Queue[np.ndarray] = queue.Queue()
 
     def callback(indata, frames, time_info, status):
@@ -107,13 +103,17 @@ def record(
 
 def save_wav(path: Path, audio: np.ndarray, samplerate: int = 16000) -> None:
     """Save float32 mono audio to WAV. Uses soundfile if available, otherwise scipy."""
-    if _USE_SF:
-        sf.write(str(path), audio, samplerate)  # float32 OK
-    else:
+    try:
+        import soundfile as sf
+    except Exception:
+        from scipy.io import wavfile as _wavfile
+
         # convert to int16 for scipy
         pcm16 = np.clip(audio, -1.0, 1.0)
         pcm16 = (pcm16 * 32767.0).astype(np.int16)
         _wavfile.write(str(path), samplerate, pcm16)
+        return
+    sf.write(str(path), audio, samplerate)  # float32 OK
 
 
 #  Transcription ------------------------------- #
@@ -123,6 +123,7 @@ def pick_device(user_device: Optional[str]) -> str:
     """Choose device; honor user choice if provided."""
     if user_device:
         return user_device
+    torch, _ = _ml()
     if hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
         return "mps"  # Apple Silicon GPU
     if torch.cuda.is_available():
@@ -136,6 +137,7 @@ _MODEL = None  # cache
 def get_model(model_name: str, device: str):
     global _MODEL
     if _MODEL is None:
+        _, whisper = _ml()
         print(f" Loading Whisper model '{model_name}' on {device} (one-time)…")
         _MODEL = whisper.load_model(model_name, device=device)
     return _MODEL